@@ -0,0 +1,52 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""Compiled duplicate group scoring kernel for the analyzer.
+
+Optional: build in place with ``cythonize -i src/core/_analyzer_fast.pyx``.
+Mirrors ``_score_group`` in analyzer.py.
+"""
+
+import numpy as np
+
+
+def score_group(
+    const double[::1] res,
+    const double[::1] size,
+    const double[::1] depth,
+    const double[::1] name_len,
+    bint prefer_resolution,
+    bint prefer_size,
+    bint prefer_shorter_path
+):
+    """Score a group of images from their per-criterion float64 arrays."""
+    cdef Py_ssize_t n = res.shape[0]
+    cdef Py_ssize_t i
+    cdef double max_res = 0.0, max_size = 0.0, max_depth = 0.0, max_name = 0.0
+    cdef double score
+
+    out = np.zeros(n, dtype=np.float64)
+    cdef double[::1] scores = out
+
+    with nogil:
+        for i in range(n):
+            if res[i] > max_res:
+                max_res = res[i]
+            if size[i] > max_size:
+                max_size = size[i]
+            if depth[i] > max_depth:
+                max_depth = depth[i]
+            if name_len[i] > max_name:
+                max_name = name_len[i]
+
+        for i in range(n):
+            score = 0.0
+            if prefer_resolution and max_res > 0:
+                score += res[i] * (40.0 / max_res)
+            if prefer_size and max_size > 0:
+                score += size[i] * (35.0 / max_size)
+            if prefer_shorter_path and max_depth > 0:
+                score += 15.0 - depth[i] * (15.0 / max_depth)
+            if max_name > 0:
+                score += 10.0 - name_len[i] * (10.0 / max_name)
+            scores[i] = score
+
+    return out
@@ -1,12 +1,126 @@
 """Analyzer for determining which images to keep or delete."""
 
-from typing import List, Dict, Tuple, Optional
+from typing import Iterable, List, Dict, Tuple, Optional
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+import multiprocessing
+import operator
+
+import numpy as np
+
+try:
+    from ._analyzer_fast import score_group as _score_group_compiled
+    CYTHON_AVAILABLE = True
+except ImportError:
+    CYTHON_AVAILABLE = False
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
 
 from ..models.image_file import ImageFile
 from ..models.duplicate_group import DuplicateGroup
 
 
+# Groups at least this large are scored with NumPy array ops; below this the
+# cost of building the arrays outweighs the per-image Python arithmetic.
+VECTORIZE_MIN_GROUP_SIZE = 8
+
+# Units used by _format_size, indexed by power of 1024
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
+
+# Attributes reported by compare_images: (ImageSummary field, field shown in
+# the message, "first value is better" test, message template)
+_COMPARISON_SPECS = (
+    ("resolution", "dimensions", operator.gt, "Image %d has higher resolution (%s vs %s)"),
+    ("size", "size_str", operator.gt, "Image %d is larger (%s vs %s)"),
+    ("path_depth", "path_depth", operator.lt, "Image %d has shorter path (depth %d vs %d)"),
+)
+
+# Reason templates used by get_recommendation
+_REASON_RESOLUTION = "Higher resolution: %s vs %s"
+_REASON_SIZE = "Larger file: %s vs %s"
+_REASON_PATH = "Shorter path: depth %d vs %d"
+
+
+def _score_group(
+    res: np.ndarray,
+    size: np.ndarray,
+    depth: np.ndarray,
+    name_len: np.ndarray,
+    prefer_resolution: bool,
+    prefer_size: bool,
+    prefer_shorter_path: bool
+) -> np.ndarray:
+    """
+    Score a group of images from their per-criterion float64 arrays.
+
+    Written as explicit loops so it can be compiled with Numba; only used
+    when Numba is available.
+    """
+    n = res.shape[0]
+    max_res = 0.0
+    max_size = 0.0
+    max_depth = 0.0
+    max_name = 0.0
+    for i in range(n):
+        max_res = max(max_res, res[i])
+        max_size = max(max_size, size[i])
+        max_depth = max(max_depth, depth[i])
+        max_name = max(max_name, name_len[i])
+
+    scores = np.zeros(n, dtype=np.float64)
+    for i in range(n):
+        score = 0.0
+        if prefer_resolution and max_res > 0:
+            score += res[i] * (40.0 / max_res)
+        if prefer_size and max_size > 0:
+            score += size[i] * (35.0 / max_size)
+        if prefer_shorter_path and max_depth > 0:
+            score += 15.0 - depth[i] * (15.0 / max_depth)
+        if max_name > 0:
+            score += 10.0 - name_len[i] * (10.0 / max_name)
+        scores[i] = score
+    return scores
+
+
+def _score_all_groups(
+    res: np.ndarray,
+    size: np.ndarray,
+    depth: np.ndarray,
+    name_len: np.ndarray,
+    group_starts: np.ndarray,
+    prefer_resolution: bool,
+    prefer_size: bool,
+    prefer_shorter_path: bool
+) -> np.ndarray:
+    """
+    Score images from many groups laid out back to back in flat arrays.
+
+    Group g occupies indices group_starts[g]:group_starts[g + 1]. Groups are
+    scored independently (in parallel when compiled with Numba).
+    """
+    scores = np.zeros(res.shape[0], dtype=np.float64)
+    for g in prange(group_starts.shape[0] - 1):
+        start = group_starts[g]
+        end = group_starts[g + 1]
+        scores[start:end] = _score_group(
+            res[start:end], size[start:end], depth[start:end], name_len[start:end],
+            prefer_resolution, prefer_size, prefer_shorter_path
+        )
+    return scores
+
+
+if NUMBA_AVAILABLE:
+    # nogil lets recommendation worker threads score groups concurrently
+    _score_group = njit(cache=True, nogil=True)(_score_group)
+    _score_all_groups = njit(cache=True, parallel=True)(_score_all_groups)
+
+
 class ImageAnalyzer:
     """Analyzes duplicate groups and provides recommendations."""
 
@@ -28,35 +142,61 @@ class ImageAnalyzer:
         self.prefer_size = prefer_size
         self.prefer_shorter_path = prefer_shorter_path
 
-    def analyze_groups(self, groups: List[DuplicateGroup]) -> Dict[str, any]:
+    def analyze_groups(
+        self,
+        groups: Iterable[DuplicateGroup],
+        num_workers: Optional[int] = None
+    ) -> Dict[str, any]:
         """
         Analyze all duplicate groups and return summary statistics.
 
         Args:
-            groups: List of DuplicateGroup objects.
+            groups: DuplicateGroup objects. Any iterable is accepted (e.g. a
+                generator); it is consumed exactly once.
+            num_workers: When given, also add "recommendations" computed by
+                get_recommendations with this many threads (0 = auto-detect).
 
         Returns:
-            Dictionary with analysis results.
+            Dictionary with analysis results. "groups" is the given list, or
+            a list of the groups consumed from a non-list iterable.
         """
-        total_files = sum(len(g) for g in groups)
-        total_duplicate_files = sum(len(g.suggested_delete) for g in groups)
-        total_size = sum(g.total_size for g in groups)
-        potential_savings = sum(g.potential_savings for g in groups)
-
-        intra_directory_groups = [g for g in groups if g.is_intra_directory]
-        cross_directory_groups = [g for g in groups if not g.is_intra_directory]
-
-        return {
-            "total_groups": len(groups),
+        # Keep the consumed groups only if the caller didn't give us a list
+        collected: Optional[List[DuplicateGroup]] = None if isinstance(groups, list) else []
+
+        total_groups = 0
+        total_files = 0
+        total_duplicate_files = 0
+        total_size = 0
+        potential_savings = 0
+        intra_directory_groups = 0
+
+        # Single pass over the groups instead of one pass per statistic
+        for g in groups:
+            total_groups += 1
+            total_files += len(g)
+            total_duplicate_files += len(g.suggested_delete)
+            total_size += g.total_size
+            potential_savings += g.potential_savings
+            if g.is_intra_directory:
+                intra_directory_groups += 1
+            if collected is not None:
+                collected.append(g)
+
+        all_groups = groups if collected is None else collected
+        analysis = {
+            "total_groups": total_groups,
             "total_files": total_files,
             "total_duplicate_files": total_duplicate_files,
             "total_size": total_size,
             "potential_savings": potential_savings,
             "potential_savings_str": self._format_size(potential_savings),
-            "intra_directory_groups": len(intra_directory_groups),
-            "cross_directory_groups": len(cross_directory_groups),
-            "groups": groups
+            "intra_directory_groups": intra_directory_groups,
+            "cross_directory_groups": total_groups - intra_directory_groups,
+            "groups": all_groups
         }
+        if num_workers is not None:
+            analysis["recommendations"] = self.get_recommendations(all_groups, num_workers)
+        return analysis
 
     def rank_images(self, group: DuplicateGroup) -> List[Tuple[ImageFile, float]]:
         """
@@ -70,96 +210,343 @@ class ImageAnalyzer:
         Returns:
             List of (ImageFile, score) tuples, sorted by score descending.
         """
-        if not group.images:
+        images = group.images
+        if not images:
             return []
 
-        # Normalize values for scoring
-        max_resolution = max((img.resolution for img in group.images), default=1)
-        max_size = max((img.file_size for img in group.images), default=1)
-        max_path_depth = max((img.path_depth for img in group.images), default=1)
+        scored = list(zip(images, self._score_images(images)))
+
+        # Sort by score descending (reverse=True keeps ties in group order)
+        scored.sort(key=itemgetter(1), reverse=True)
+        return scored
+
+    def _score_images(self, images: List[ImageFile]) -> List[float]:
+        """
+        Score images by quality/preference, in the order given.
 
-        scored: List[Tuple[ImageFile, float]] = []
+        Args:
+            images: Non-empty list of images from one group.
 
-        for img in group.images:
+        Returns:
+            List of scores aligned with images.
+        """
+        if len(images) == 1:
+            # A lone image is the group maximum for every criterion, so it
+            # gets full resolution/size points and none for depth/name
+            img = images[0]
             score = 0.0
+            if self.prefer_resolution and img.resolution > 0:
+                score += 40.0
+            if self.prefer_size and img.file_size > 0:
+                score += 35.0
+            return [score]
+
+        if len(images) >= VECTORIZE_MIN_GROUP_SIZE:
+            return self._score_images_vectorized(images).tolist()
+
+        # Normalize values for scoring: collect the group maxima in one pass
+        max_resolution = max_size = max_path_depth = max_name_len = 0
+        for img in images:
+            resolution = img.resolution
+            file_size = img.file_size
+            path_depth = img.path_depth
+            name_len = len(img.filename)
+            if resolution > max_resolution:
+                max_resolution = resolution
+            if file_size > max_size:
+                max_size = file_size
+            if path_depth > max_path_depth:
+                max_path_depth = path_depth
+            if name_len > max_name_len:
+                max_name_len = name_len
+
+        # Per-criterion weights scaled by the group maximum (0 disables a criterion)
+        res_weight = 40.0 / max_resolution if self.prefer_resolution and max_resolution > 0 else 0.0
+        size_weight = 35.0 / max_size if self.prefer_size and max_size > 0 else 0.0
+        depth_weight = 15.0 / max_path_depth if self.prefer_shorter_path and max_path_depth > 0 else 0.0
+        name_weight = 10.0 / max_name_len if max_name_len > 0 else 0.0
+
+        # Path depth and filename length score "shorter is better", so their
+        # contribution is (1 - ratio) * points, i.e. points - value * weight
+        depth_points = 15.0 if depth_weight else 0.0
+        name_points = 10.0 if name_weight else 0.0
+
+        # Resolution (0-40), file size (0-35), path depth (0-15, shorter is
+        # better) and filename length as tiebreaker (0-10, shorter is better)
+        return [
+            img.resolution * res_weight
+            + img.file_size * size_weight
+            + depth_points - img.path_depth * depth_weight
+            + name_points - len(img.filename) * name_weight
+            for img in images
+        ]
+
+    def _score_images_vectorized(self, images: List[ImageFile]) -> np.ndarray:
+        """
+        Score a large group of images using NumPy array operations.
+
+        Uses the compiled scoring kernel when available: the Cython
+        extension if it has been built, otherwise Numba if installed.
+        Produces the same scores as the per-image loop in _score_images.
+
+        Args:
+            images: Non-empty list of images to score.
 
-            # Resolution score (0-40 points)
-            if self.prefer_resolution and max_resolution > 0:
-                score += (img.resolution / max_resolution) * 40
+        Returns:
+            Array of scores aligned with images.
+        """
+        n = len(images)
+        res = np.fromiter((img.resolution for img in images), dtype=np.float64, count=n)
+        size = np.fromiter((img.file_size for img in images), dtype=np.float64, count=n)
+        depth = np.fromiter((img.path_depth for img in images), dtype=np.float64, count=n)
+        name_len = np.fromiter((len(img.filename) for img in images), dtype=np.float64, count=n)
+
+        if CYTHON_AVAILABLE:
+            return _score_group_compiled(
+                res, size, depth, name_len,
+                self.prefer_resolution, self.prefer_size, self.prefer_shorter_path
+            )
 
-            # File size score (0-35 points)
-            if self.prefer_size and max_size > 0:
-                score += (img.file_size / max_size) * 35
+        if NUMBA_AVAILABLE:
+            return _score_group(
+                res, size, depth, name_len,
+                self.prefer_resolution, self.prefer_size, self.prefer_shorter_path
+            )
 
-            # Path depth score (0-15 points, shorter is better)
-            if self.prefer_shorter_path and max_path_depth > 0:
-                depth_ratio = img.path_depth / max_path_depth
-                score += (1 - depth_ratio) * 15
+        scores = np.zeros(n, dtype=np.float64)
 
-            # Filename length as tiebreaker (0-10 points, shorter is better)
-            max_name_len = max((len(i.filename) for i in group.images), default=1)
-            if max_name_len > 0:
-                name_ratio = len(img.filename) / max_name_len
-                score += (1 - name_ratio) * 10
+        max_resolution = res.max()
+        if self.prefer_resolution and max_resolution > 0:
+            scores += res * (40.0 / max_resolution)
 
-            scored.append((img, score))
+        max_size = size.max()
+        if self.prefer_size and max_size > 0:
+            scores += size * (35.0 / max_size)
 
-        # Sort by score descending
-        scored.sort(key=lambda x: -x[1])
-        return scored
+        max_path_depth = depth.max()
+        if self.prefer_shorter_path and max_path_depth > 0:
+            scores += 15.0 - depth * (15.0 / max_path_depth)
+
+        max_name_len = name_len.max()
+        if max_name_len > 0:
+            scores += 10.0 - name_len * (10.0 / max_name_len)
+
+        return scores
+
+    @staticmethod
+    def _top_two(scores: List[float]) -> Tuple[int, Optional[int]]:
+        """
+        Find the indices of the best and second-best scores in one pass.
+
+        Ties resolve to the earlier index, matching the stable sort in
+        rank_images.
+
+        Args:
+            scores: Non-empty list of scores.
+
+        Returns:
+            Tuple of (best index, runner-up index or None).
+        """
+        best = 0
+        runner_up = None
+        for i in range(1, len(scores)):
+            score = scores[i]
+            if score > scores[best]:
+                runner_up = best
+                best = i
+            elif runner_up is None or score > scores[runner_up]:
+                runner_up = i
+        return best, runner_up
+
+    def rank_all_groups(
+        self,
+        groups: List[DuplicateGroup]
+    ) -> List[List[Tuple[ImageFile, float]]]:
+        """
+        Rank the images of many groups in one batch.
+
+        Every image from every group is scored in a single array pass, which
+        avoids per-group call overhead when there are many small groups.
+
+        Args:
+            groups: List of DuplicateGroup objects to rank.
+
+        Returns:
+            One ranked list per group (same order as groups), each as returned
+            by rank_images.
+        """
+        ranked: List[List[Tuple[ImageFile, float]]] = [[] for _ in groups]
+        batch = [(i, g.images) for i, g in enumerate(groups) if g.images]
+        if not batch:
+            return ranked
+
+        images = [img for _, group_images in batch for img in group_images]
+        n = len(images)
+        lengths = np.array([len(group_images) for _, group_images in batch], dtype=np.int64)
+        group_starts = np.zeros(len(batch) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=group_starts[1:])
+
+        res = np.fromiter((img.resolution for img in images), dtype=np.float64, count=n)
+        size = np.fromiter((img.file_size for img in images), dtype=np.float64, count=n)
+        depth = np.fromiter((img.path_depth for img in images), dtype=np.float64, count=n)
+        name_len = np.fromiter((len(img.filename) for img in images), dtype=np.float64, count=n)
+
+        if NUMBA_AVAILABLE:
+            scores = _score_all_groups(
+                res, size, depth, name_len, group_starts,
+                self.prefer_resolution, self.prefer_size, self.prefer_shorter_path
+            )
+        else:
+            # Per-group maxima broadcast back to every image of the group
+            starts = group_starts[:-1]
+            max_res = np.repeat(np.maximum.reduceat(res, starts), lengths)
+            max_size = np.repeat(np.maximum.reduceat(size, starts), lengths)
+            max_depth = np.repeat(np.maximum.reduceat(depth, starts), lengths)
+            max_name = np.repeat(np.maximum.reduceat(name_len, starts), lengths)
+
+            scores = np.zeros(n, dtype=np.float64)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                if self.prefer_resolution:
+                    scores += np.where(max_res > 0, res * (40.0 / max_res), 0.0)
+                if self.prefer_size:
+                    scores += np.where(max_size > 0, size * (35.0 / max_size), 0.0)
+                if self.prefer_shorter_path:
+                    scores += np.where(max_depth > 0, 15.0 - depth * (15.0 / max_depth), 0.0)
+                scores += np.where(max_name > 0, 10.0 - name_len * (10.0 / max_name), 0.0)
+
+        # Sort by group, then score descending; lexsort is stable so equal
+        # scores keep their order within the group
+        group_ids = np.repeat(np.arange(len(batch)), lengths)
+        order = np.lexsort((-scores, group_ids))
+
+        for b, (i, _) in enumerate(batch):
+            start, end = group_starts[b], group_starts[b + 1]
+            ranked[i] = [(images[j], float(scores[j])) for j in order[start:end]]
+
+        return ranked
 
     def get_recommendation(
         self,
-        group: DuplicateGroup
+        group: DuplicateGroup,
+        with_scores: bool = True
     ) -> Dict[str, any]:
         """
         Get detailed recommendation for a duplicate group.
 
         Args:
             group: DuplicateGroup to analyze.
+            with_scores: Include scores in the result. When False, "keep_score"
+                is omitted and "delete" is a plain list of ImageFile objects in
+                group order, which avoids sorting the group.
 
         Returns:
             Dictionary with recommendation details.
         """
-        ranked = self.rank_images(group)
-
-        if not ranked:
+        images = group.images
+        if not images:
             return {"keep": None, "delete": [], "reasons": []}
 
-        keep_image, keep_score = ranked[0]
-        delete_images = [(img, score) for img, score in ranked[1:]]
+        scores = self._score_images(images)
+        keep_index, runner_up_index = self._top_two(scores)
+        keep_image = images[keep_index]
+
+        if with_scores:
+            delete_images = [
+                (img, score)
+                for i, (img, score) in enumerate(zip(images, scores))
+                if i != keep_index
+            ]
+            delete_images.sort(key=itemgetter(1), reverse=True)
+            savings = sum(img.file_size for img, _ in delete_images)
+        else:
+            delete_images = [img for i, img in enumerate(images) if i != keep_index]
+            savings = sum(img.file_size for img in delete_images)
 
         # Generate reasons for the recommendation
         reasons = []
 
-        if len(ranked) > 1:
-            runner_up, runner_up_score = ranked[1]
+        if runner_up_index is not None:
+            runner_up = images[runner_up_index]
+            keep_depth = keep_image.path_depth
+            runner_up_depth = runner_up.path_depth
 
             if keep_image.resolution > runner_up.resolution:
                 reasons.append(
-                    f"Higher resolution: {keep_image.dimensions_str} vs {runner_up.dimensions_str}"
+                    _REASON_RESOLUTION % (keep_image.dimensions_str, runner_up.dimensions_str)
                 )
 
             if keep_image.file_size > runner_up.file_size:
                 reasons.append(
-                    f"Larger file: {keep_image.file_size_str} vs {runner_up.file_size_str}"
+                    _REASON_SIZE % (keep_image.file_size_str, runner_up.file_size_str)
                 )
 
-            if keep_image.path_depth < runner_up.path_depth:
-                reasons.append(
-                    f"Shorter path: depth {keep_image.path_depth} vs {runner_up.path_depth}"
-                )
+            if keep_depth < runner_up_depth:
+                reasons.append(_REASON_PATH % (keep_depth, runner_up_depth))
 
-        return {
+        recommendation = {
             "keep": keep_image,
-            "keep_score": keep_score,
             "delete": delete_images,
             "reasons": reasons,
-            "savings": sum(img.file_size for img, _ in delete_images),
-            "savings_str": self._format_size(
-                sum(img.file_size for img, _ in delete_images)
-            )
+            "savings": savings,
+            "savings_str": self._format_size(savings)
         }
+        if with_scores:
+            recommendation["keep_score"] = scores[keep_index]
+        return recommendation
+
+    def get_recommendations(
+        self,
+        groups: List[DuplicateGroup],
+        num_workers: int = 0,
+        with_scores: bool = True
+    ) -> List[Dict[str, any]]:
+        """
+        Get recommendations for many duplicate groups.
+
+        Only groups of VECTORIZE_MIN_GROUP_SIZE or more images go to a thread
+        pool, and only when a compiled scoring kernel (Cython or Numba) is
+        available: the kernel releases the GIL. Smaller groups are scored in
+        pure Python, where worker threads would just contend for the GIL, so
+        they are handled on the calling thread.
+
+        Args:
+            groups: List of DuplicateGroup objects.
+            num_workers: Number of worker threads (0 = auto-detect CPU cores).
+            with_scores: Passed to get_recommendation.
+
+        Returns:
+            List of recommendation dictionaries, in the same order as groups.
+        """
+        if num_workers <= 0:
+            num_workers = multiprocessing.cpu_count()
+
+        pooled: List[int] = []
+        if (CYTHON_AVAILABLE or NUMBA_AVAILABLE) and num_workers > 1:
+            pooled = [
+                i for i, group in enumerate(groups)
+                if len(group.images) >= VECTORIZE_MIN_GROUP_SIZE
+            ]
+        if len(pooled) < 2:
+            return [self.get_recommendation(group, with_scores) for group in groups]
+
+        recommendations: List[Optional[Dict[str, any]]] = [None] * len(groups)
+        with ThreadPoolExecutor(
+            max_workers=min(num_workers, len(pooled)),
+            thread_name_prefix="recommend"
+        ) as executor:
+            # Large groups are submitted first so they run while the small
+            # ones are scored here
+            results = executor.map(
+                lambda i: self.get_recommendation(groups[i], with_scores), pooled
+            )
+            pooled_set = set(pooled)
+            for i, group in enumerate(groups):
+                if i not in pooled_set:
+                    recommendations[i] = self.get_recommendation(group, with_scores)
+            for i, recommendation in zip(pooled, results):
+                recommendations[i] = recommendation
+
+        return recommendations
 
     def compare_images(
         self,
@@ -174,69 +561,40 @@ class ImageAnalyzer:
             img2: Second image.
 
         Returns:
-            Dictionary with comparison details.
+            Dictionary with the details of each image under "img1" and "img2",
+            and a list of human-readable "differences".
         """
-        comparison = {
-            "img1": {
-                "path": str(img1.path),
-                "filename": img1.filename,
-                "size": img1.file_size,
-                "size_str": img1.file_size_str,
-                "resolution": img1.resolution,
-                "dimensions": img1.dimensions_str,
-                "path_depth": img1.path_depth
-            },
-            "img2": {
-                "path": str(img2.path),
-                "filename": img2.filename,
-                "size": img2.file_size,
-                "size_str": img2.file_size_str,
-                "resolution": img2.resolution,
-                "dimensions": img2.dimensions_str,
-                "path_depth": img2.path_depth
-            },
-            "differences": []
-        }
-
-        # Resolution comparison
-        if img1.resolution != img2.resolution:
-            if img1.resolution > img2.resolution:
-                comparison["differences"].append(
-                    f"Image 1 has higher resolution ({img1.dimensions_str} vs {img2.dimensions_str})"
-                )
-            else:
-                comparison["differences"].append(
-                    f"Image 2 has higher resolution ({img2.dimensions_str} vs {img1.dimensions_str})"
-                )
-
-        # Size comparison
-        if img1.file_size != img2.file_size:
-            if img1.file_size > img2.file_size:
-                comparison["differences"].append(
-                    f"Image 1 is larger ({img1.file_size_str} vs {img2.file_size_str})"
-                )
+        summary1 = img1.summary
+        summary2 = img2.summary
+        differences = []
+
+        for field, display_field, is_better, template in _COMPARISON_SPECS:
+            value1 = getattr(summary1, field)
+            value2 = getattr(summary2, field)
+            if value1 == value2:
+                continue
+            if is_better(value1, value2):
+                differences.append(template % (
+                    1, getattr(summary1, display_field), getattr(summary2, display_field)
+                ))
             else:
-                comparison["differences"].append(
-                    f"Image 2 is larger ({img2.file_size_str} vs {img1.file_size_str})"
-                )
+                differences.append(template % (
+                    2, getattr(summary2, display_field), getattr(summary1, display_field)
+                ))
 
-        # Path depth comparison
-        if img1.path_depth != img2.path_depth:
-            if img1.path_depth < img2.path_depth:
-                comparison["differences"].append(
-                    f"Image 1 has shorter path (depth {img1.path_depth} vs {img2.path_depth})"
-                )
-            else:
-                comparison["differences"].append(
-                    f"Image 2 has shorter path (depth {img2.path_depth} vs {img1.path_depth})"
-                )
+        comparison = {
+            "img1": summary1._asdict(),
+            "img2": summary2._asdict(),
+            "differences": differences
+        }
 
         return comparison
 
     def _format_size(self, size: int) -> str:
         """Format size in bytes to human-readable string."""
-        for unit in ["B", "KB", "MB", "GB"]:
-            if size < 1024:
-                return f"{size:.1f} {unit}"
-            size /= 1024
-        return f"{size:.1f} TB"
+        if size < 1024:
+            return f"{size:.1f} B"
+        # Each unit is 2**10 times the previous one, so the unit index is
+        # floor(log2(size) / 10), capped at TB
+        index = min((int(size).bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+        return f"{size / (1 << (10 * index)):.1f} {_SIZE_UNITS[index]}"
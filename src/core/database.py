@@ -1,16 +1,58 @@
 """SQLite database manager for persistent hash storage."""
 
+import atexit
+import json
+import queue
 import sqlite3
+import sys
 import threading
+import weakref
+from collections import OrderedDict
 from contextlib import contextmanager
 from dataclasses import dataclass
-from datetime import datetime
+from functools import lru_cache
+from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Tuple
-
-
-# Database schema version for migrations
-SCHEMA_VERSION = 1
+from time import sleep, time as _time
+from typing import Optional, List, Dict, Any, FrozenSet, Iterable, Iterator, NamedTuple, Tuple
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# Database schema version for migrations. SCHEMA_SQL only runs against
+# databases at an older version, so bump this whenever it changes.
+SCHEMA_VERSION = 7
+
+# Memory-mapped I/O only pays off with a 64-bit address space
+MMAP_SUPPORTED = sys.maxsize > 2**32
+
+# Milliseconds a connection waits on a locked database before raising
+BUSY_TIMEOUT_MS = 5000
+
+# Applied once per database file; journal_mode=WAL is persisted in the file
+# and lets UI readers proceed while the scanner is committing.
+DATABASE_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+)
+
+# Applied to every new connection; these settings are per-connection in SQLite.
+CONNECTION_PRAGMAS = (
+    "PRAGMA foreign_keys = ON",
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA journal_size_limit = 67108864",
+    # Checkpoint every ~40 MB of WAL rather than ~4 MB so long scans stall
+    # less often; scans and the maintenance thread also truncate the WAL
+    "PRAGMA wal_autocheckpoint = 10000",
+    # Freed pages are not zero-filled, so whole-table deletes stay cheap
+    "PRAGMA secure_delete = OFF",
+) + (("PRAGMA mmap_size = 536870912",) if MMAP_SUPPORTED else ())
 
 SCHEMA_SQL = """
 -- Volumes/Drives table
@@ -46,14 +88,60 @@ CREATE TABLE IF NOT EXISTS files (
     file_modified_at TEXT,
     indexed_at TEXT NOT NULL,
     is_deleted INTEGER DEFAULT 0,
+    directory TEXT NOT NULL DEFAULT '',  -- relative_path without the filename
     FOREIGN KEY (volume_id) REFERENCES volumes(id) ON DELETE CASCADE,
     UNIQUE(volume_id, relative_path)
 );
-CREATE INDEX IF NOT EXISTS idx_files_volume ON files(volume_id);
-CREATE INDEX IF NOT EXISTS idx_files_extension ON files(extension);
-CREATE INDEX IF NOT EXISTS idx_files_file_type ON files(file_type);
 CREATE INDEX IF NOT EXISTS idx_files_size ON files(file_size_bytes);
-CREATE INDEX IF NOT EXISTS idx_files_deleted ON files(is_deleted);
+-- Live-row filters. Queries keep "is_deleted = 0" in their WHERE clause.
+-- (volume_id, is_deleted) covers the live file ID lists duplicate detection
+-- builds (the rowid is implicit), and replaces the plain volume indexes.
+-- File type filters always come with a volume, so idx_files_type_live
+-- replaces the plain file_type index
+DROP INDEX IF EXISTS idx_files_deleted;
+DROP INDEX IF EXISTS idx_files_volume;
+DROP INDEX IF EXISTS idx_files_volume_live;
+DROP INDEX IF EXISTS idx_files_file_type;
+CREATE INDEX IF NOT EXISTS idx_files_volume_deleted ON files(volume_id, is_deleted);
+CREATE INDEX IF NOT EXISTS idx_files_type_live ON files(file_type, volume_id) WHERE is_deleted = 0;
+-- Covers directory listings and extension count rebuilds (and replaces the
+-- plain extension index). is_deleted is a key column rather than a
+-- partial-index filter, which SQLite would not treat as covering
+DROP INDEX IF EXISTS idx_files_extension;
+CREATE INDEX IF NOT EXISTS idx_files_ext_dir ON files(extension, is_deleted, directory, volume_id);
+
+-- Live file count per extension, kept current by the triggers below
+CREATE TABLE IF NOT EXISTS extension_counts (
+    extension TEXT PRIMARY KEY,
+    cnt INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_files_ext_count_insert
+AFTER INSERT ON files
+WHEN NEW.is_deleted = 0 AND NEW.extension IS NOT NULL AND NEW.extension != ''
+BEGIN
+    INSERT INTO extension_counts (extension, cnt) VALUES (NEW.extension, 1)
+    ON CONFLICT(extension) DO UPDATE SET cnt = cnt + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_files_ext_count_delete
+AFTER DELETE ON files
+WHEN OLD.is_deleted = 0 AND OLD.extension IS NOT NULL AND OLD.extension != ''
+BEGIN
+    UPDATE extension_counts SET cnt = cnt - 1 WHERE extension = OLD.extension;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_files_ext_count_update
+AFTER UPDATE OF extension, is_deleted ON files
+WHEN OLD.extension IS NOT NEW.extension OR OLD.is_deleted IS NOT NEW.is_deleted
+BEGIN
+    UPDATE extension_counts SET cnt = cnt - 1
+    WHERE extension = OLD.extension AND OLD.is_deleted = 0;
+    INSERT INTO extension_counts (extension, cnt)
+    SELECT NEW.extension, 1
+    WHERE NEW.is_deleted = 0 AND NEW.extension IS NOT NULL AND NEW.extension != ''
+    ON CONFLICT(extension) DO UPDATE SET cnt = cnt + 1;
+END;
 
 -- Hashes table (multiple hash types per file)
 CREATE TABLE IF NOT EXISTS hashes (
@@ -65,8 +153,12 @@ CREATE TABLE IF NOT EXISTS hashes (
     FOREIGN KEY (file_id) REFERENCES files(id) ON DELETE CASCADE,
     UNIQUE(file_id, hash_type)
 );
-CREATE INDEX IF NOT EXISTS idx_hashes_type_value ON hashes(hash_type, hash_value);
-CREATE INDEX IF NOT EXISTS idx_hashes_file ON hashes(file_id);
+-- Covering index: duplicate lookups by (hash_type, hash_value) never touch the table
+DROP INDEX IF EXISTS idx_hashes_type_value;
+CREATE INDEX IF NOT EXISTS idx_hashes_cover ON hashes(hash_type, hash_value, file_id);
+-- Lookups by file_id (and cascading deletes) use the UNIQUE(file_id, hash_type)
+-- index, so a separate file_id index only slowed down every hash insert
+DROP INDEX IF EXISTS idx_hashes_file;
 
 -- Duplicate groups table
 CREATE TABLE IF NOT EXISTS duplicate_groups (
@@ -78,7 +170,7 @@ CREATE TABLE IF NOT EXISTS duplicate_groups (
     status TEXT DEFAULT 'pending'
 );
 
--- Duplicate group members
+-- Duplicate group members, stored in primary key order (no rowid)
 CREATE TABLE IF NOT EXISTS duplicate_group_files (
     group_id INTEGER NOT NULL,
     file_id INTEGER NOT NULL,
@@ -87,7 +179,9 @@ CREATE TABLE IF NOT EXISTS duplicate_group_files (
     FOREIGN KEY (group_id) REFERENCES duplicate_groups(id) ON DELETE CASCADE,
     FOREIGN KEY (file_id) REFERENCES files(id) ON DELETE CASCADE,
     PRIMARY KEY (group_id, file_id)
-);
+) WITHOUT ROWID;
+-- Lets deletes from files find memberships without a full table scan
+CREATE INDEX IF NOT EXISTS idx_duplicate_group_files_file ON duplicate_group_files(file_id);
 
 -- Scan sessions for tracking history
 CREATE TABLE IF NOT EXISTS scan_sessions (
@@ -106,6 +200,9 @@ CREATE TABLE IF NOT EXISTS scan_sessions (
     error_message TEXT,
     FOREIGN KEY (volume_id) REFERENCES volumes(id)
 );
+-- Session lists filter by status or volume and sort newest first
+CREATE INDEX IF NOT EXISTS idx_scan_sessions_status ON scan_sessions(status, started_at);
+CREATE INDEX IF NOT EXISTS idx_scan_sessions_volume ON scan_sessions(volume_id, started_at);
 
 -- Scan checkpoints for pause/resume functionality
 CREATE TABLE IF NOT EXISTS scan_checkpoints (
@@ -115,11 +212,32 @@ CREATE TABLE IF NOT EXISTS scan_checkpoints (
     current_directory TEXT,
     files_processed INTEGER DEFAULT 0,
     files_total INTEGER DEFAULT 0,
-    directories_completed TEXT,
     FOREIGN KEY (session_id) REFERENCES scan_sessions(id) ON DELETE CASCADE
 );
 CREATE INDEX IF NOT EXISTS idx_checkpoints_session ON scan_checkpoints(session_id);
 
+-- Directories fully scanned by a session (appended to at each checkpoint)
+CREATE TABLE IF NOT EXISTS scan_checkpoint_dirs (
+    session_id INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    FOREIGN KEY (session_id) REFERENCES scan_sessions(id) ON DELETE CASCADE,
+    PRIMARY KEY (session_id, path)
+) WITHOUT ROWID;
+
+-- Whole-file hashes from the in-memory deduplicator, keyed by file identity.
+-- A row only counts as a hit while size and mtime_ns still match the file.
+-- used_on is the last date the row was read or written, for pruning.
+CREATE TABLE IF NOT EXISTS file_hash_cache (
+    device INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    hash_type TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash_value TEXT NOT NULL,
+    used_on TEXT NOT NULL,
+    PRIMARY KEY (device, inode, hash_type)
+) WITHOUT ROWID;
+
 -- Schema version tracking
 CREATE TABLE IF NOT EXISTS schema_version (
     version INTEGER PRIMARY KEY
@@ -132,7 +250,8 @@ CREATE TABLE IF NOT EXISTS custom_extensions (
     action TEXT NOT NULL,  -- 'include' or 'exclude'
     added_at TEXT NOT NULL
 );
-CREATE INDEX IF NOT EXISTS idx_custom_extensions_action ON custom_extensions(action);
+DROP INDEX IF EXISTS idx_custom_extensions_action;
+CREATE INDEX IF NOT EXISTS idx_custom_extensions_action_ext ON custom_extensions(action, extension);
 
 -- Unknown file extensions encountered during scanning
 CREATE TABLE IF NOT EXISTS unknown_extensions (
@@ -153,7 +272,10 @@ CREATE TABLE IF NOT EXISTS extension_sample_paths (
     FOREIGN KEY (volume_id) REFERENCES volumes(id) ON DELETE CASCADE,
     UNIQUE(extension, volume_id, relative_path)
 );
-CREATE INDEX IF NOT EXISTS idx_extension_sample_paths_ext ON extension_sample_paths(extension);
+-- Returns sample paths already in display order without touching the table
+DROP INDEX IF EXISTS idx_extension_sample_paths_ext;
+CREATE INDEX IF NOT EXISTS idx_extension_sample_paths_order
+    ON extension_sample_paths(extension, file_count DESC, relative_path, volume_id);
 
 -- Excluded paths per volume (directories to skip during scanning)
 CREATE TABLE IF NOT EXISTS excluded_paths (
@@ -164,10 +286,400 @@ CREATE TABLE IF NOT EXISTS excluded_paths (
     FOREIGN KEY (volume_id) REFERENCES volumes(id) ON DELETE CASCADE,
     UNIQUE(volume_id, relative_path)
 );
-CREATE INDEX IF NOT EXISTS idx_excluded_paths_volume ON excluded_paths(volume_id);
+-- Lookups by volume use the UNIQUE(volume_id, relative_path) index
+DROP INDEX IF EXISTS idx_excluded_paths_volume;
 """
 
 
+class FileRow(NamedTuple):
+    """A row of the files table.
+
+    Built straight from the result tuple, which is far smaller than a dict
+    per row when listing whole volumes.
+    """
+    id: int
+    volume_id: int
+    relative_path: str
+    filename: str
+    extension: Optional[str]
+    file_size_bytes: int
+    file_type: str
+    width: Optional[int]
+    height: Optional[int]
+    duration_seconds: Optional[float]
+    file_created_at: Optional[str]
+    file_modified_at: Optional[str]
+    indexed_at: str
+    is_deleted: int
+
+
+# Column list matching FileRow field order
+FILE_COLUMNS = ", ".join(FileRow._fields)
+
+
+# Hot-path statements, kept as constants so every call hits the connection's
+# prepared-statement cache with an identical SQL string.
+SQL_UPSERT_FILE = """
+    INSERT INTO files
+    (volume_id, relative_path, filename, extension, file_size_bytes,
+     file_type, width, height, duration_seconds, file_created_at,
+     file_modified_at, indexed_at, directory)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(volume_id, relative_path) DO UPDATE SET
+        filename = excluded.filename,
+        extension = excluded.extension,
+        file_size_bytes = excluded.file_size_bytes,
+        file_type = excluded.file_type,
+        width = excluded.width,
+        height = excluded.height,
+        duration_seconds = excluded.duration_seconds,
+        file_created_at = excluded.file_created_at,
+        file_modified_at = excluded.file_modified_at,
+        indexed_at = excluded.indexed_at,
+        is_deleted = 0
+"""
+
+SQL_UPSERT_FILE_RETURNING_ID = SQL_UPSERT_FILE + "RETURNING id\n"
+
+SQL_GET_FILE_BY_ID = f"SELECT {FILE_COLUMNS} FROM files WHERE id = ?"
+
+# IDs for a JSON array of relative paths on one volume (executemany cannot
+# return rows, so add_files_bulk looks them up afterwards)
+SQL_GET_FILE_IDS_BY_PATHS = """
+    SELECT id, relative_path FROM files
+    WHERE volume_id = ? AND relative_path IN (SELECT value FROM json_each(?))
+"""
+
+SQL_GET_FILE_BY_PATH = f"""
+    SELECT {FILE_COLUMNS} FROM files
+    WHERE volume_id = ? AND relative_path = ? AND is_deleted = 0
+"""
+
+SQL_GET_FILE_ID_BY_PATH = """
+    SELECT id FROM files
+    WHERE volume_id = ? AND relative_path = ? AND is_deleted = 0
+"""
+
+# What an incremental rescan needs to classify a file as new, changed or unchanged
+# has_hash is 0 when the file row was committed but its hashes never were
+# (e.g. the process stopped before the write-behind queue drained)
+SQL_GET_FILE_MODIFIED_BY_PATH = """
+    SELECT id, file_modified_at,
+           EXISTS (SELECT 1 FROM hashes WHERE file_id = files.id) AS has_hash
+    FROM files
+    WHERE volume_id = ? AND relative_path = ? AND is_deleted = 0
+"""
+
+SQL_FILE_EXISTS = """
+    SELECT 1 FROM files
+    WHERE volume_id = ? AND relative_path = ? AND is_deleted = 0
+    LIMIT 1
+"""
+
+# Unchanged hashes are left alone so idempotent rescans write no pages
+SQL_ADD_HASH = """
+    INSERT INTO hashes (file_id, hash_type, hash_value, computed_at)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(file_id, hash_type) DO UPDATE SET
+        hash_value = excluded.hash_value,
+        computed_at = excluded.computed_at
+    WHERE hash_value <> excluded.hash_value
+"""
+
+# Only the columns duplicate grouping needs; the hash side is answered
+# entirely from idx_hashes_cover.
+SQL_FIND_BY_HASH = """
+    SELECT f.id, f.volume_id, f.relative_path, f.filename, f.file_size_bytes,
+           f.width, f.height
+    FROM hashes h
+    JOIN files f ON f.id = h.file_id
+    WHERE h.hash_type = ? AND h.hash_value = ? AND f.is_deleted = 0
+"""
+
+# Duplicate hash values, optionally limited to a JSON array of volume IDs.
+# Live file IDs are filtered first so the GROUP BY walks idx_hashes_cover in
+# hash_value order without joining back to files for every row.
+SQL_FIND_DUPLICATE_HASHES = """
+    SELECT hash_value, COUNT(*) as cnt
+    FROM hashes
+    WHERE hash_type = ?
+      AND file_id IN (SELECT id FROM files WHERE is_deleted = 0)
+    GROUP BY hash_value
+    HAVING cnt > 1
+    ORDER BY cnt DESC
+"""
+
+SQL_FIND_DUPLICATE_HASHES_IN_VOLUMES = """
+    SELECT hash_value, COUNT(*) as cnt
+    FROM hashes
+    WHERE hash_type = ?
+      AND file_id IN (
+          SELECT id FROM files
+          WHERE is_deleted = 0
+            AND volume_id IN (SELECT value FROM json_each(?))
+      )
+    GROUP BY hash_value
+    HAVING cnt > 1
+    ORDER BY cnt DESC
+"""
+
+# Cached file hashes for a JSON array of [device, inode] pairs. Callers
+# compare size and mtime_ns to decide whether a row is still valid.
+SQL_GET_CACHED_FILE_HASHES = """
+    SELECT c.device, c.inode, c.size, c.mtime_ns, c.hash_value
+    FROM json_each(?) AS k
+    JOIN file_hash_cache c
+      ON c.device = json_extract(k.value, '$[0]')
+     AND c.inode = json_extract(k.value, '$[1]')
+     AND c.hash_type = ?
+"""
+
+# Rows already stored with the same values and date are left alone, so
+# re-caching unchanged files writes no pages
+SQL_CACHE_FILE_HASH = """
+    INSERT INTO file_hash_cache
+    (device, inode, hash_type, size, mtime_ns, hash_value, used_on)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(device, inode, hash_type) DO UPDATE SET
+        size = excluded.size,
+        mtime_ns = excluded.mtime_ns,
+        hash_value = excluded.hash_value,
+        used_on = excluded.used_on
+    WHERE used_on <> excluded.used_on
+       OR size <> excluded.size
+       OR mtime_ns <> excluded.mtime_ns
+       OR hash_value <> excluded.hash_value
+"""
+
+# Extension bookkeeping written while scanning. The count is a parameter so
+# single-file and bulk callers share one prepared statement.
+SQL_SET_CUSTOM_EXTENSION = """
+    INSERT OR REPLACE INTO custom_extensions (extension, action, added_at)
+    VALUES (?, ?, ?)
+"""
+
+SQL_ADD_UNKNOWN_EXTENSION = """
+    INSERT INTO unknown_extensions
+    (extension, occurrence_count, first_seen_at, last_seen_at)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(extension) DO UPDATE SET
+        occurrence_count = occurrence_count + excluded.occurrence_count,
+        last_seen_at = excluded.last_seen_at
+"""
+
+SQL_ADD_EXTENSION_SAMPLE_PATH = """
+    INSERT INTO extension_sample_paths (extension, volume_id, relative_path, file_count)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(extension, volume_id, relative_path)
+    DO UPDATE SET file_count = file_count + excluded.file_count
+"""
+
+SQL_GET_EXTENSION_SAMPLE_PATHS = """
+    SELECT
+        esp.relative_path as directory,
+        esp.volume_id,
+        v.name as volume_name,
+        v.mount_point,
+        esp.file_count
+    FROM extension_sample_paths esp
+    JOIN volumes v ON esp.volume_id = v.id
+    WHERE esp.extension = ?
+    ORDER BY esp.file_count DESC, esp.relative_path ASC
+"""
+
+SQL_GET_EXTENSION_COUNTS = """
+    SELECT extension, cnt FROM extension_counts WHERE cnt > 0
+"""
+
+# Recomputes extension_counts from scratch (the triggers keep it current)
+SQL_REBUILD_EXTENSION_COUNTS = """
+    INSERT INTO extension_counts (extension, cnt)
+    SELECT extension, COUNT(*)
+    FROM files
+    WHERE is_deleted = 0 AND extension IS NOT NULL AND extension != ''
+    GROUP BY extension
+"""
+
+# Grouped straight from idx_files_ext_dir; volumes are joined per group
+SQL_GET_DIRECTORIES_BY_EXTENSION = """
+    SELECT d.directory, d.volume_id, v.name as volume_name, v.mount_point, d.file_count
+    FROM (
+        SELECT directory, volume_id, COUNT(*) as file_count
+        FROM files
+        WHERE extension = ? AND is_deleted = 0
+        GROUP BY directory, volume_id
+    ) d
+    JOIN volumes v ON d.volume_id = v.id
+    ORDER BY d.file_count DESC, d.directory ASC
+"""
+
+# Size of the per-connection prepared-statement cache (sqlite3 default is 128)
+CACHED_STATEMENTS = 256
+
+# Write-behind queue for hash rows: capacity, rows per transaction, and how
+# long the writer waits for more rows before committing a partial batch
+WRITE_QUEUE_MAXSIZE = 100_000
+WRITE_BATCH_SIZE = 1000
+WRITE_BATCH_TIMEOUT_S = 0.05
+
+# Seconds the writer waits before retrying a batch that found the database
+# busy, and how long it keeps retrying before reporting the error
+WRITE_RETRY_DELAY_S = 0.1
+WRITE_RETRY_TIMEOUT_S = 30.0
+
+# Seconds between background WAL truncation / statistics refreshes
+MAINTENANCE_INTERVAL_S = 900
+
+# Bounds the rows ANALYZE samples per index during background maintenance
+ANALYSIS_LIMIT = 400
+
+# Cached file hashes not used for this many days are pruned by maintenance;
+# rows for deleted or replaced files are never used again
+FILE_HASH_CACHE_MAX_AGE_DAYS = 90
+
+# Maximum number of per-thread writer connections kept open at once
+MAX_THREAD_CONNECTIONS = 16
+
+# Seconds a per-thread connection may sit unused before maintenance closes it
+IDLE_CONNECTION_TIMEOUT_S = 300
+
+# Maximum number of pooled read-only connections, and how long a read waits
+# for one to be returned before opening a temporary connection instead
+READONLY_POOL_SIZE = 8
+READONLY_WAIT_S = 1.0
+
+# Applied to every pooled read-only connection. Duplicate scans read most of
+# the hashes table, so readers map up to 1 GiB of the file directly and keep
+# a smaller private page cache.
+READONLY_PRAGMAS = (
+    "PRAGMA query_only = ON",
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -20000",
+) + (("PRAGMA mmap_size = 1073741824",) if MMAP_SUPPORTED else ())
+
+# Each PRAGMA list as one script, applied with a single executescript() call
+CONNECTION_PRAGMA_SCRIPT = ";\n".join(CONNECTION_PRAGMAS) + ";"
+READONLY_PRAGMA_SCRIPT = ";\n".join(READONLY_PRAGMAS) + ";"
+
+
+def _split_statements(script: str) -> List[str]:
+    """Split a SQL script into complete statements.
+
+    Unlike str.split(';'), semicolons inside comments or string literals do
+    not end a statement.
+    """
+    statements = []
+    buffer = ""
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statements.append(buffer.strip())
+            buffer = ""
+    return statements
+
+
+def _json_array(values: List[Any]) -> str:
+    """Encode a list as JSON text for binding to json_each(?).
+
+    Uses orjson when installed. Its bytes output is decoded because SQLite
+    would treat a bound BLOB as binary JSONB rather than JSON text.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(values).decode()
+    return json.dumps(values)
+
+
+_timestamp_cache: Tuple[int, str] = (0, "")
+
+
+def _now() -> str:
+    """Current local time as an ISO-8601 string, at one-second resolution.
+
+    The formatted string is reused until the second changes, so tight write
+    loops do not build a datetime for every row.
+    """
+    global _timestamp_cache
+    second = int(_time())
+    if _timestamp_cache[0] != second:
+        _timestamp_cache = (second, datetime.fromtimestamp(second).isoformat())
+    return _timestamp_cache[1]
+
+
+@lru_cache(maxsize=4096)
+def _normalize_extension(extension: str) -> str:
+    """Lowercase an extension and drop any leading dot.
+
+    Extensions come from a small set, so results are cached and interned.
+    """
+    return sys.intern(extension.lower().lstrip('.'))
+
+
+def _dict_rows(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+    """Fetch the remaining rows of an executed cursor as dicts.
+
+    Column names are read from the cursor description once and shared by
+    every row, which is cheaper than dict(row) on sqlite3.Row objects.
+    """
+    columns = [description[0] for description in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _directory_dict(row: Tuple) -> Dict[str, Any]:
+    """Turn a (directory, volume_id, volume_name, mount_point, file_count) row into a dict."""
+    return {
+        'directory': row[0] or '/',
+        'volume_id': row[1],
+        'volume_name': row[2],
+        'mount_point': row[3],
+        'file_count': row[4]
+    }
+
+
+def _maintenance_loop(manager_ref: 'weakref.ref[DatabaseManager]', stop: threading.Event):
+    """Run periodic maintenance until stopped or the manager is collected."""
+    while not stop.wait(MAINTENANCE_INTERVAL_S):
+        manager = manager_ref()
+        if manager is None:
+            return
+        manager.run_maintenance()
+        manager.close_idle(IDLE_CONNECTION_TIMEOUT_S)
+        del manager
+
+
+def _final_maintenance(manager_ref: 'weakref.ref[DatabaseManager]', stop: threading.Event):
+    """Stop the maintenance thread and refresh statistics once at exit."""
+    stop.set()
+    manager = manager_ref()
+    if manager is not None:
+        manager.run_maintenance(checkpoint=False)
+
+
+@dataclass
+class _ThreadConnection:
+    """A writer connection owned by one thread, with its usage state."""
+    conn: sqlite3.Connection
+    last_used: float
+    active: int = 0         # Open connection()/bulk() blocks using it
+    in_bulk: bool = False   # Inside a bulk() transaction
+
+
+def _close_connection(conn: sqlite3.Connection):
+    """Close a connection, letting SQLite refresh planner statistics first."""
+    try:
+        conn.execute("PRAGMA optimize")
+    except sqlite3.Error:
+        pass
+    conn.close()
+
+
+def _is_busy(error: sqlite3.Error) -> bool:
+    """Whether an error means another connection held a lock past the timeout."""
+    return isinstance(error, sqlite3.OperationalError) and (
+        "locked" in str(error) or "busy" in str(error)
+    )
+
+
 def get_db_path() -> Path:
     """Get the database file path."""
     db_dir = Path.home() / ".dedupe"
@@ -189,17 +701,42 @@ class DatabaseManager:
         """
         self.db_path = db_path or get_db_path()
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self._local = threading.local()
+        self._connections: 'OrderedDict[int, _ThreadConnection]' = OrderedDict()
+        self._connections_lock = threading.Lock()
+        self._readonly_pool: queue.Queue = queue.Queue(maxsize=READONLY_POOL_SIZE)
+        self._readonly_created = 0
+        self._readonly_lock = threading.Lock()
+        self._write_queue: queue.Queue = queue.Queue(maxsize=WRITE_QUEUE_MAXSIZE)
+        self._writer_thread: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._write_error: Optional[BaseException] = None
+        self._custom_extensions_cache: Dict[str, FrozenSet[str]] = {}
+        self._configure_database()
         self._init_schema()
+        self._start_maintenance()
 
     @classmethod
     def get_instance(cls, db_path: Optional[Path] = None) -> 'DatabaseManager':
-        """Get singleton instance of database manager."""
-        if cls._instance is None:
+        """Get singleton instance of database manager.
+
+        The lock is only taken while the instance is being created; later
+        calls read the class attribute directly.
+
+        Raises:
+            ValueError: If db_path names a different database than the
+                existing instance.
+        """
+        instance = cls._instance
+        if instance is None:
             with cls._lock:
-                if cls._instance is None:
-                    cls._instance = cls(db_path)
-        return cls._instance
+                instance = cls._instance
+                if instance is None:
+                    instance = cls._instance = cls(db_path)
+        if db_path is not None and Path(db_path) != instance.db_path:
+            raise ValueError(
+                f"Database already open at {instance.db_path}, not {db_path}"
+            )
+        return instance
 
     @classmethod
     def reset_instance(cls):
@@ -207,28 +744,257 @@ class DatabaseManager:
         with cls._lock:
             cls._instance = None
 
-    def _get_connection(self) -> sqlite3.Connection:
-        """Get thread-local database connection."""
-        if not hasattr(self._local, 'conn') or self._local.conn is None:
-            self._local.conn = sqlite3.connect(
-                str(self.db_path),
-                check_same_thread=False
+    def _open_connection(self) -> sqlite3.Connection:
+        """Open a new writer connection."""
+        conn = sqlite3.connect(
+            str(self.db_path),
+            check_same_thread=False,
+            cached_statements=CACHED_STATEMENTS
+        )
+        conn.row_factory = sqlite3.Row
+        # No transaction is open yet, so executescript() has nothing to commit
+        conn.executescript(CONNECTION_PRAGMA_SCRIPT)
+        return conn
+
+    @contextmanager
+    def _checkout(self):
+        """Context manager for the calling thread's connection entry.
+
+        Connections are cached per thread in an LRU bounded by
+        MAX_THREAD_CONNECTIONS. Entries in use or mid-transaction are never
+        evicted, so the cap may be exceeded briefly.
+        """
+        tid = threading.get_ident()
+        evicted = []
+        with self._connections_lock:
+            entry = self._connections.get(tid)
+            if entry is None:
+                entry = _ThreadConnection(self._open_connection(), _time())
+                self._connections[tid] = entry
+                excess = len(self._connections) - MAX_THREAD_CONNECTIONS
+                for other_tid, other in list(self._connections.items()):
+                    if excess <= 0:
+                        break
+                    if other is not entry and self._is_idle(other):
+                        del self._connections[other_tid]
+                        evicted.append(other.conn)
+                        excess -= 1
+            else:
+                self._connections.move_to_end(tid)
+            entry.active += 1
+
+        for conn in evicted:
+            _close_connection(conn)
+
+        try:
+            yield entry
+        finally:
+            with self._connections_lock:
+                entry.active -= 1
+                entry.last_used = _time()
+
+    @staticmethod
+    def _is_idle(entry: _ThreadConnection) -> bool:
+        """Whether a connection entry can be closed safely."""
+        return entry.active == 0 and not entry.conn.in_transaction
+
+    def close_idle(self, max_age_s: float):
+        """Close per-thread connections unused for more than max_age_s seconds."""
+        cutoff = _time() - max_age_s
+        stale = []
+        with self._connections_lock:
+            for tid, entry in list(self._connections.items()):
+                if entry.last_used <= cutoff and self._is_idle(entry):
+                    del self._connections[tid]
+                    stale.append(entry.conn)
+
+        for conn in stale:
+            _close_connection(conn)
+
+    def close(self):
+        """Close this thread's connection and idle read-only connections.
+
+        SQLite gets a chance to refresh its query planner statistics first.
+        """
+        while True:
+            try:
+                readonly_conn = self._readonly_pool.get_nowait()
+            except queue.Empty:
+                break
+            readonly_conn.close()
+            with self._readonly_lock:
+                self._readonly_created -= 1
+
+        with self._connections_lock:
+            entry = self._connections.get(threading.get_ident())
+            if entry is None or entry.active:
+                return
+            del self._connections[threading.get_ident()]
+        _close_connection(entry.conn)
+
+    def _start_maintenance(self):
+        """Start the background maintenance thread and the exit-time refresh."""
+        self._maintenance_stop = threading.Event()
+        manager_ref = weakref.ref(self)
+        self._maintenance_thread = threading.Thread(
+            target=_maintenance_loop,
+            args=(manager_ref, self._maintenance_stop),
+            name="db_maintenance",
+            daemon=True
+        )
+        self._maintenance_thread.start()
+        weakref.finalize(self, self._maintenance_stop.set)
+        atexit.register(_final_maintenance, manager_ref, self._maintenance_stop)
+
+    def run_maintenance(self, checkpoint: bool = True):
+        """Prune stale cached file hashes, truncate the WAL and refresh statistics.
+
+        Uses a short-lived connection so it can run from any thread. Errors are
+        ignored: maintenance is best-effort and retried on the next interval.
+
+        Args:
+            checkpoint: Also run PRAGMA wal_checkpoint(TRUNCATE)
+        """
+        try:
+            conn = sqlite3.connect(
+                Path(self.db_path).resolve().as_uri() + "?mode=rw",
+                uri=True,
+                timeout=BUSY_TIMEOUT_MS / 1000
             )
-            self._local.conn.row_factory = sqlite3.Row
-            # Enable foreign keys
-            self._local.conn.execute("PRAGMA foreign_keys = ON")
-        return self._local.conn
+        except sqlite3.Error:
+            return
+        try:
+            cutoff = date.today() - timedelta(days=FILE_HASH_CACHE_MAX_AGE_DAYS)
+            with conn:
+                conn.execute(
+                    "DELETE FROM file_hash_cache WHERE used_on < ?",
+                    (cutoff.isoformat(),)
+                )
+            if checkpoint:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            # A fresh connection has run no queries, so PRAGMA optimize alone
+            # would skip every table; a bounded ANALYZE covers them all.
+            conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+            conn.execute("ANALYZE")
+            conn.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass
+        finally:
+            conn.close()
+
+    def _open_readonly_connection(self) -> sqlite3.Connection:
+        """Open a new read-only connection for the pool."""
+        conn = sqlite3.connect(
+            Path(self.db_path).resolve().as_uri() + "?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            cached_statements=CACHED_STATEMENTS
+        )
+        conn.row_factory = sqlite3.Row
+        conn.executescript(READONLY_PRAGMA_SCRIPT)
+        return conn
 
     @contextmanager
-    def connection(self):
-        """Context manager for database connections with auto-commit."""
-        conn = self._get_connection()
+    def readonly(self):
+        """Context manager for a pooled read-only connection.
+
+        Under WAL, pooled readers run in parallel with each other and with the
+        writer. A thread with uncommitted writes keeps using its own connection
+        so it still sees them, as does every read of an in-memory database,
+        which read-only URI connections cannot open.
+
+        When every pooled connection stays busy for READONLY_WAIT_S (e.g. held
+        by open iterators), a temporary connection serves the read.
+        """
+        entry = self._connections.get(threading.get_ident())
+        in_memory = str(self.db_path) == ":memory:"
+        if in_memory or (entry is not None and entry.conn.in_transaction):
+            with self._checkout() as entry:
+                yield entry.conn
+            return
+
+        try:
+            readonly_conn = self._readonly_pool.get_nowait()
+        except queue.Empty:
+            with self._readonly_lock:
+                create = self._readonly_created < READONLY_POOL_SIZE
+                if create:
+                    self._readonly_created += 1
+            if create:
+                try:
+                    readonly_conn = self._open_readonly_connection()
+                except Exception:
+                    with self._readonly_lock:
+                        self._readonly_created -= 1
+                    raise
+            else:
+                try:
+                    readonly_conn = self._readonly_pool.get(timeout=READONLY_WAIT_S)
+                except queue.Empty:
+                    temporary_conn = self._open_readonly_connection()
+                    try:
+                        yield temporary_conn
+                    finally:
+                        temporary_conn.close()
+                    return
+
         try:
-            yield conn
-            conn.commit()
-        except Exception:
-            conn.rollback()
-            raise
+            yield readonly_conn
+        finally:
+            self._readonly_pool.put(readonly_conn)
+
+    def _scalar(self, sql: str, params: Tuple = ()) -> Any:
+        """Run a single-value query on a read-only connection.
+
+        Returns the first column of the first row, or None if there is none.
+        """
+        with self.readonly() as conn:
+            row = conn.execute(sql, params).fetchone()
+            return row[0] if row else None
+
+    @contextmanager
+    def connection(self):
+        """Context manager for database connections with auto-commit.
+
+        Inside a bulk() block the commit is deferred to the outer transaction.
+        """
+        with self._checkout() as entry:
+            conn = entry.conn
+            if entry.in_bulk:
+                yield conn
+                return
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    @contextmanager
+    def bulk(self):
+        """Group every write in the block into a single transaction.
+
+        Nested connection()/cursor() blocks skip their own commits, so many
+        small writes share one commit. Nested bulk() blocks join the outer one.
+        """
+        with self._checkout() as entry:
+            conn = entry.conn
+            if entry.in_bulk:
+                yield conn
+                return
+
+            if conn.in_transaction:
+                conn.commit()
+            conn.execute("BEGIN IMMEDIATE")
+            entry.in_bulk = True
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                entry.in_bulk = False
 
     @contextmanager
     def cursor(self):
@@ -240,10 +1006,45 @@ class DatabaseManager:
             finally:
                 cursor.close()
 
+    def _configure_database(self):
+        """Apply file-level PRAGMAs once, before any thread-local connection.
+
+        Records the journal mode SQLite actually granted in self.journal_mode;
+        WAL is refused for in-memory databases and some network filesystems.
+        """
+        if str(self.db_path) == ":memory:":
+            self.journal_mode = "memory"
+            return
+
+        conn = sqlite3.connect(str(self.db_path), timeout=BUSY_TIMEOUT_MS / 1000)
+        try:
+            for pragma in DATABASE_PRAGMAS:
+                conn.execute(pragma)
+            self.journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        finally:
+            conn.close()
+
     def _init_schema(self):
-        """Initialize database schema."""
+        """Initialize database schema.
+
+        A database already at SCHEMA_VERSION is left untouched, so opening it
+        costs one SELECT instead of replaying every statement in SCHEMA_SQL.
+        """
         with self.connection() as conn:
-            conn.executescript(SCHEMA_SQL)
+            try:
+                row = conn.execute("SELECT version FROM schema_version LIMIT 1").fetchone()
+            except sqlite3.OperationalError:
+                row = None  # New database
+            if row is not None and row[0] == SCHEMA_VERSION:
+                return
+
+            # executescript() would commit on its own; run the DDL statements
+            # individually so schema setup is one explicit transaction.
+            conn.execute("BEGIN")
+            self._migrate_schema(conn)
+            for statement in _split_statements(SCHEMA_SQL):
+                conn.execute(statement)
+            self._finish_migration(conn)
 
             # Check/set schema version
             cursor = conn.execute("SELECT version FROM schema_version LIMIT 1")
@@ -251,6 +1052,79 @@ class DatabaseManager:
             if row is None:
                 conn.execute("INSERT INTO schema_version (version) VALUES (?)",
                            (SCHEMA_VERSION,))
+            upgraded = row is not None and row[0] < SCHEMA_VERSION
+            if upgraded:
+                if row[0] < 3:
+                    # extension_counts is new in version 3; fill it from existing files
+                    conn.execute("DELETE FROM extension_counts")
+                    conn.execute(SQL_REBUILD_EXTENSION_COUNTS)
+                conn.execute("UPDATE schema_version SET version = ?", (SCHEMA_VERSION,))
+
+            # Give the planner statistics from the first open, and again when
+            # an upgrade has added indexes; sqlite_stat1 persists in the file.
+            has_stats = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            ).fetchone()
+            if upgraded or not has_stats:
+                conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+                conn.execute("ANALYZE")
+
+    def _migrate_schema(self, conn: sqlite3.Connection):
+        """Bring tables from an older schema up to date before SCHEMA_SQL runs.
+
+        SCHEMA_SQL only creates what is missing, so columns added since a
+        database was created (and any indexes over them) are handled here.
+        """
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(files)")}
+        if columns and 'directory' not in columns:
+            conn.execute("ALTER TABLE files ADD COLUMN directory TEXT NOT NULL DEFAULT ''")
+            conn.execute("""
+                UPDATE files
+                SET directory = SUBSTR(relative_path, 1, LENGTH(relative_path) - LENGTH(filename) - 1)
+                WHERE INSTR(relative_path, '/') > 0
+            """)
+
+        # duplicate_group_files became WITHOUT ROWID in version 5. Move the
+        # old table aside so SCHEMA_SQL recreates it; rows are copied back by
+        # _finish_migration().
+        row = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'duplicate_group_files'"
+        ).fetchone()
+        if row and 'WITHOUT ROWID' not in row[0].upper():
+            conn.execute("ALTER TABLE duplicate_group_files RENAME TO duplicate_group_files_old")
+
+        # file_hash_cache gained used_on in version 7. The rows can all be
+        # recomputed, so the table is dropped and recreated empty.
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(file_hash_cache)")}
+        if columns and 'used_on' not in columns:
+            conn.execute("DROP TABLE file_hash_cache")
+
+    def _finish_migration(self, conn: sqlite3.Connection):
+        """Copy rows left in old tables and columns into the current schema."""
+        if conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'duplicate_group_files_old'"
+        ).fetchone():
+            conn.execute("""
+                INSERT INTO duplicate_group_files
+                (group_id, file_id, is_suggested_keep, similarity_score)
+                SELECT group_id, file_id, is_suggested_keep, similarity_score
+                FROM duplicate_group_files_old
+            """)
+            conn.execute("DROP TABLE duplicate_group_files_old")
+
+        # Completed directories used to be a JSON list in
+        # scan_checkpoints.directories_completed. Copy them to
+        # scan_checkpoint_dirs so paused scans keep their resume state, then
+        # clear the column so a later upgrade does not copy them again.
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(scan_checkpoints)")}
+        if 'directories_completed' in columns:
+            conn.execute("""
+                INSERT OR IGNORE INTO scan_checkpoint_dirs (session_id, path)
+                SELECT c.session_id, j.value
+                FROM scan_checkpoints c, json_each(c.directories_completed) j
+                WHERE c.directories_completed IS NOT NULL
+            """)
+            conn.execute("UPDATE scan_checkpoints SET directories_completed = NULL")
 
     # ==================== Volume Operations ====================
 
@@ -267,31 +1141,25 @@ class DatabaseManager:
 
         Returns the volume ID.
         """
-        now = datetime.now().isoformat()
+        now = _now()
 
         with self.cursor() as cursor:
-            # Try to update existing
             cursor.execute("""
-                UPDATE volumes
-                SET name = ?, mount_point = ?, is_internal = ?,
-                    total_size_bytes = ?, filesystem = ?, last_seen_at = ?
-                WHERE uuid = ?
-            """, (name, mount_point, int(is_internal), total_size_bytes,
-                  filesystem, now, uuid))
-
-            if cursor.rowcount == 0:
-                # Insert new
-                cursor.execute("""
-                    INSERT INTO volumes
-                    (uuid, name, mount_point, is_internal, total_size_bytes,
-                     filesystem, first_seen_at, last_seen_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (uuid, name, mount_point, int(is_internal), total_size_bytes,
-                      filesystem, now, now))
-                return cursor.lastrowid
-            else:
-                cursor.execute("SELECT id FROM volumes WHERE uuid = ?", (uuid,))
-                return cursor.fetchone()[0]
+                INSERT INTO volumes
+                (uuid, name, mount_point, is_internal, total_size_bytes,
+                 filesystem, first_seen_at, last_seen_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(uuid) DO UPDATE SET
+                    name = excluded.name,
+                    mount_point = excluded.mount_point,
+                    is_internal = excluded.is_internal,
+                    total_size_bytes = excluded.total_size_bytes,
+                    filesystem = excluded.filesystem,
+                    last_seen_at = excluded.last_seen_at
+                RETURNING id
+            """, (uuid, name, mount_point, int(is_internal), total_size_bytes,
+                  filesystem, now, now))
+            return cursor.fetchone()[0]
 
     def get_volume_by_uuid(self, uuid: str) -> Optional[Dict[str, Any]]:
         """Get a volume by its UUID."""
@@ -309,22 +1177,26 @@ class DatabaseManager:
 
     def get_all_volumes(self) -> List[Dict[str, Any]]:
         """Get all known volumes."""
-        with self.cursor() as cursor:
+        with self.readonly() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
             cursor.execute("SELECT * FROM volumes ORDER BY last_seen_at DESC")
-            return [dict(row) for row in cursor.fetchall()]
+            return _dict_rows(cursor)
 
     def get_indexed_volumes(self) -> List[Dict[str, Any]]:
         """Get volumes that have indexed files (file_count > 0).
 
         This is the authoritative source for volume dropdowns in UI components.
         """
-        with self.cursor() as cursor:
+        with self.readonly() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
             cursor.execute("""
                 SELECT * FROM volumes
                 WHERE file_count > 0
                 ORDER BY last_seen_at DESC
             """)
-            return [dict(row) for row in cursor.fetchall()]
+            return _dict_rows(cursor)
 
     def update_volume_scan_status(
         self,
@@ -333,7 +1205,7 @@ class DatabaseManager:
         file_count: Optional[int] = None
     ):
         """Update volume scan status."""
-        now = datetime.now().isoformat()
+        now = _now()
 
         with self.cursor() as cursor:
             if file_count is not None:
@@ -383,6 +1255,7 @@ class DatabaseManager:
         with self.cursor() as cursor:
             # Delete in order to respect foreign key constraints
             # (though CASCADE should handle most of this)
+            cursor.execute("DELETE FROM scan_checkpoint_dirs")
             cursor.execute("DELETE FROM scan_checkpoints")
             cursor.execute("DELETE FROM scan_sessions")
             cursor.execute("DELETE FROM duplicate_group_files")
@@ -415,46 +1288,50 @@ class DatabaseManager:
 
         Returns the file ID.
         """
-        now = datetime.now().isoformat()
+        now = _now()
 
         with self.cursor() as cursor:
-            # Try to update existing
-            cursor.execute("""
-                UPDATE files
-                SET filename = ?, extension = ?, file_size_bytes = ?,
-                    file_type = ?, width = ?, height = ?, duration_seconds = ?,
-                    file_created_at = ?, file_modified_at = ?, indexed_at = ?,
-                    is_deleted = 0
-                WHERE volume_id = ? AND relative_path = ?
-            """, (filename, extension, file_size_bytes, file_type, width, height,
-                  duration_seconds, file_created_at, file_modified_at, now,
-                  volume_id, relative_path))
+            cursor.execute(SQL_UPSERT_FILE_RETURNING_ID,
+                           (volume_id, relative_path, filename, extension, file_size_bytes,
+                            file_type, width, height, duration_seconds, file_created_at,
+                            file_modified_at, now, relative_path.rpartition('/')[0]))
+            return cursor.fetchone()[0]
 
-            if cursor.rowcount == 0:
-                # Insert new
-                cursor.execute("""
-                    INSERT INTO files
-                    (volume_id, relative_path, filename, extension, file_size_bytes,
-                     file_type, width, height, duration_seconds, file_created_at,
-                     file_modified_at, indexed_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (volume_id, relative_path, filename, extension, file_size_bytes,
-                      file_type, width, height, duration_seconds, file_created_at,
-                      file_modified_at, now))
-                return cursor.lastrowid
-            else:
-                cursor.execute("""
-                    SELECT id FROM files
-                    WHERE volume_id = ? AND relative_path = ?
-                """, (volume_id, relative_path))
-                return cursor.fetchone()[0]
+    def add_files_bulk(
+        self,
+        volume_id: int,
+        rows: List[Tuple]
+    ) -> List[int]:
+        """Add or update many files on one volume in a single transaction.
+
+        Each row holds the add_file arguments after volume_id, in order:
+        (relative_path, filename, extension, file_size_bytes, file_type,
+        width, height, duration_seconds, file_created_at, file_modified_at).
+
+        Returns the file IDs in the same order as rows.
+        """
+        if not rows:
+            return []
+
+        now = _now()
+        params = [(volume_id, *row, now, row[0].rpartition('/')[0]) for row in rows]
+        paths = [row[0] for row in rows]
+
+        with self.cursor() as cursor:
+            cursor.executemany(SQL_UPSERT_FILE, params)
+
+            cursor.execute(SQL_GET_FILE_IDS_BY_PATHS, (volume_id, _json_array(paths)))
+            ids_by_path = {path: file_id for file_id, path in cursor.fetchall()}
+
+        return [ids_by_path[path] for path in paths]
 
     def get_file_by_id(self, file_id: int) -> Optional[Dict[str, Any]]:
         """Get a file by its ID."""
         with self.cursor() as cursor:
-            cursor.execute("SELECT * FROM files WHERE id = ?", (file_id,))
+            cursor.row_factory = None
+            cursor.execute(SQL_GET_FILE_BY_ID, (file_id,))
             row = cursor.fetchone()
-            return dict(row) if row else None
+            return FileRow._make(row)._asdict() if row else None
 
     def get_file_by_path(
         self,
@@ -463,12 +1340,73 @@ class DatabaseManager:
     ) -> Optional[Dict[str, Any]]:
         """Get a file by volume and path."""
         with self.cursor() as cursor:
-            cursor.execute("""
-                SELECT * FROM files
-                WHERE volume_id = ? AND relative_path = ? AND is_deleted = 0
-            """, (volume_id, relative_path))
+            cursor.row_factory = None
+            cursor.execute(SQL_GET_FILE_BY_PATH, (volume_id, relative_path))
             row = cursor.fetchone()
-            return dict(row) if row else None
+            return FileRow._make(row)._asdict() if row else None
+
+    def get_file_id_by_path(
+        self,
+        volume_id: int,
+        relative_path: str
+    ) -> Optional[int]:
+        """Get the ID of a live file by volume and path."""
+        with self.cursor() as cursor:
+            cursor.row_factory = None
+            cursor.execute(SQL_GET_FILE_ID_BY_PATH, (volume_id, relative_path))
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+    def get_file_modified_by_path(
+        self,
+        volume_id: int,
+        relative_path: str
+    ) -> Optional[Tuple[int, Optional[str], int]]:
+        """Get (id, file_modified_at, has_hash) of a live file by volume and path."""
+        with self.cursor() as cursor:
+            cursor.row_factory = None
+            cursor.execute(SQL_GET_FILE_MODIFIED_BY_PATH, (volume_id, relative_path))
+            return cursor.fetchone()
+
+    def file_exists(self, volume_id: int, relative_path: str) -> bool:
+        """Check whether a live file is recorded at the given path."""
+        with self.cursor() as cursor:
+            cursor.row_factory = None
+            cursor.execute(SQL_FILE_EXISTS, (volume_id, relative_path))
+            return cursor.fetchone() is not None
+
+    def iter_files_by_volume(
+        self,
+        volume_id: int,
+        file_type: Optional[str] = None,
+        include_deleted: bool = False,
+        chunk_size: int = 1000
+    ) -> Iterator[FileRow]:
+        """Yield the files of a volume one at a time.
+
+        Rows are fetched chunk_size at a time from a read-only connection, so
+        memory stays flat regardless of how many files the volume holds.
+        """
+        query = f"SELECT {FILE_COLUMNS} FROM files WHERE volume_id = ?"
+        params = [volume_id]
+
+        if not include_deleted:
+            query += " AND is_deleted = 0"
+
+        if file_type:
+            query += " AND file_type = ?"
+            params.append(file_type)
+
+        with self.readonly() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.arraysize = chunk_size
+            try:
+                cursor.execute(query, params)
+                while rows := cursor.fetchmany():
+                    yield from map(FileRow._make, rows)
+            finally:
+                cursor.close()
 
     def get_files_by_volume(
         self,
@@ -477,19 +1415,10 @@ class DatabaseManager:
         include_deleted: bool = False
     ) -> List[Dict[str, Any]]:
         """Get all files for a volume."""
-        with self.cursor() as cursor:
-            query = "SELECT * FROM files WHERE volume_id = ?"
-            params = [volume_id]
-
-            if not include_deleted:
-                query += " AND is_deleted = 0"
-
-            if file_type:
-                query += " AND file_type = ?"
-                params.append(file_type)
-
-            cursor.execute(query, params)
-            return [dict(row) for row in cursor.fetchall()]
+        return [
+            row._asdict()
+            for row in self.iter_files_by_volume(volume_id, file_type, include_deleted)
+        ]
 
     def mark_file_deleted(self, file_id: int):
         """Mark a file as deleted (soft delete)."""
@@ -514,12 +1443,10 @@ class DatabaseManager:
 
     def get_file_count_by_volume(self, volume_id: int) -> int:
         """Get count of files for a volume."""
-        with self.cursor() as cursor:
-            cursor.execute("""
-                SELECT COUNT(*) FROM files
-                WHERE volume_id = ? AND is_deleted = 0
-            """, (volume_id,))
-            return cursor.fetchone()[0]
+        return self._scalar("""
+            SELECT COUNT(*) FROM files
+            WHERE volume_id = ? AND is_deleted = 0
+        """, (volume_id,))
 
     # ==================== Hash Operations ====================
 
@@ -530,23 +1457,104 @@ class DatabaseManager:
         hash_value: str
     ):
         """Add or update a hash for a file."""
-        now = datetime.now().isoformat()
+        now = _now()
 
         with self.cursor() as cursor:
-            cursor.execute("""
-                INSERT OR REPLACE INTO hashes (file_id, hash_type, hash_value, computed_at)
-                VALUES (?, ?, ?, ?)
-            """, (file_id, hash_type, hash_value, now))
+            cursor.execute(SQL_ADD_HASH, (file_id, hash_type, hash_value, now))
+
+    def add_hashes_bulk(self, rows: List[Tuple[int, str, str]]):
+        """Add or update many (file_id, hash_type, hash_value) rows in one transaction."""
+        if not rows:
+            return
+
+        now = _now()
+
+        with self.cursor() as cursor:
+            cursor.executemany(SQL_ADD_HASH, [
+                (file_id, hash_type, hash_value, now)
+                for file_id, hash_type, hash_value in rows
+            ])
+
+    def queue_hashes(self, rows: List[Tuple[int, str, str]]):
+        """Queue (file_id, hash_type, hash_value) rows for a background writer.
+
+        A single writer thread drains the queue and stores rows in batches of
+        up to WRITE_BATCH_SIZE per transaction, so callers never wait on a
+        commit. Call flush_writes() before reading the rows back.
+
+        A thread with its own transaction open writes the rows into it
+        instead; the writer thread would only wait on that transaction's lock.
+        """
+        if not rows:
+            return
+
+        entry = self._connections.get(threading.get_ident())
+        if entry is not None and entry.conn.in_transaction:
+            self.add_hashes_bulk(rows)
+            return
+
+        with self._writer_lock:
+            if self._writer_thread is None or not self._writer_thread.is_alive():
+                self._writer_thread = threading.Thread(
+                    target=self._writer_loop, name="db_writer", daemon=True
+                )
+                self._writer_thread.start()
+
+        for row in rows:
+            self._write_queue.put(row)
+
+    def flush_writes(self):
+        """Wait until every queued row is stored.
+
+        Raises the first error the background writer hit since the last flush.
+        """
+        self._write_queue.join()
+        error, self._write_error = self._write_error, None
+        if error is not None:
+            raise error
+
+    def _writer_loop(self):
+        """Drain the write queue in batched transactions (runs in db_writer).
+
+        A batch that finds the database busy is retried for up to
+        WRITE_RETRY_TIMEOUT_S. Errors that outlast it, and any other error,
+        are kept for flush_writes() to raise.
+        """
+        while True:
+            batch = [self._write_queue.get()]
+            deadline = _time() + WRITE_BATCH_TIMEOUT_S
+            while len(batch) < WRITE_BATCH_SIZE:
+                remaining = deadline - _time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._write_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                retry_until = _time() + WRITE_RETRY_TIMEOUT_S
+                while True:
+                    try:
+                        self.add_hashes_bulk(batch)
+                        break
+                    except sqlite3.Error as e:
+                        if not _is_busy(e) or _time() >= retry_until:
+                            raise
+                        sleep(WRITE_RETRY_DELAY_S)
+            except Exception as e:
+                if self._write_error is None:
+                    self._write_error = e
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
 
     def get_hash(self, file_id: int, hash_type: str) -> Optional[str]:
         """Get a specific hash for a file."""
-        with self.cursor() as cursor:
-            cursor.execute("""
-                SELECT hash_value FROM hashes
-                WHERE file_id = ? AND hash_type = ?
-            """, (file_id, hash_type))
-            row = cursor.fetchone()
-            return row[0] if row else None
+        return self._scalar("""
+            SELECT hash_value FROM hashes
+            WHERE file_id = ? AND hash_type = ?
+        """, (file_id, hash_type))
 
     def get_all_hashes_for_file(self, file_id: int) -> Dict[str, str]:
         """Get all hashes for a file."""
@@ -562,14 +1570,16 @@ class DatabaseManager:
         hash_type: str,
         hash_value: str
     ) -> List[Dict[str, Any]]:
-        """Find all files with a specific hash value."""
-        with self.cursor() as cursor:
-            cursor.execute("""
-                SELECT f.* FROM files f
-                JOIN hashes h ON f.id = h.file_id
-                WHERE h.hash_type = ? AND h.hash_value = ? AND f.is_deleted = 0
-            """, (hash_type, hash_value))
-            return [dict(row) for row in cursor.fetchall()]
+        """Find all files with a specific hash value.
+
+        Each dict holds id, volume_id, relative_path, filename,
+        file_size_bytes, width and height.
+        """
+        with self.readonly() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute(SQL_FIND_BY_HASH, (hash_type, hash_value))
+            return _dict_rows(cursor)
 
     def find_duplicate_hashes(
         self,
@@ -580,32 +1590,36 @@ class DatabaseManager:
 
         Returns list of (hash_value, count) tuples.
         """
-        with self.cursor() as cursor:
-            if volume_ids:
-                placeholders = ",".join("?" * len(volume_ids))
-                cursor.execute(f"""
-                    SELECT h.hash_value, COUNT(*) as cnt
-                    FROM hashes h
-                    JOIN files f ON h.file_id = f.id
-                    WHERE h.hash_type = ?
-                      AND f.is_deleted = 0
-                      AND f.volume_id IN ({placeholders})
-                    GROUP BY h.hash_value
-                    HAVING cnt > 1
-                    ORDER BY cnt DESC
-                """, [hash_type] + volume_ids)
-            else:
-                cursor.execute("""
-                    SELECT h.hash_value, COUNT(*) as cnt
-                    FROM hashes h
-                    JOIN files f ON h.file_id = f.id
-                    WHERE h.hash_type = ? AND f.is_deleted = 0
-                    GROUP BY h.hash_value
-                    HAVING cnt > 1
-                    ORDER BY cnt DESC
-                """, (hash_type,))
+        return list(self.iter_duplicate_hashes(hash_type, volume_ids))
 
-            return [(row[0], row[1]) for row in cursor.fetchall()]
+    def iter_duplicate_hashes(
+        self,
+        hash_type: str,
+        volume_ids: Optional[List[int]] = None,
+        chunk_size: int = 1000
+    ) -> Iterator[Tuple[str, int]]:
+        """Yield find_duplicate_hashes() results one at a time.
+
+        Rows are fetched chunk_size at a time from a read-only connection, so
+        callers can stop early without materializing every duplicate hash.
+        """
+        if volume_ids:
+            query = SQL_FIND_DUPLICATE_HASHES_IN_VOLUMES
+            params: Tuple = (hash_type, _json_array(list(volume_ids)))
+        else:
+            query = SQL_FIND_DUPLICATE_HASHES
+            params = (hash_type,)
+
+        with self.readonly() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.arraysize = chunk_size
+            try:
+                cursor.execute(query, params)
+                while rows := cursor.fetchmany():
+                    yield from rows
+            finally:
+                cursor.close()
 
     def get_set_difference(
         self,
@@ -627,7 +1641,9 @@ class DatabaseManager:
         Returns:
             List of file dictionaries from volume B with no matching hash in A
         """
-        with self.cursor() as cursor:
+        with self.readonly() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
             query = """
                 SELECT DISTINCT f.*, v.name as volume_name, v.mount_point
                 FROM files f
@@ -663,7 +1679,7 @@ class DatabaseManager:
             query += " ORDER BY f.relative_path"
 
             cursor.execute(query, params)
-            return [dict(row) for row in cursor.fetchall()]
+            return _dict_rows(cursor)
 
     def get_set_intersection(
         self,
@@ -685,7 +1701,9 @@ class DatabaseManager:
         Returns:
             List of dicts with paired file info (filename_a, path_a, filename_b, path_b, etc.)
         """
-        with self.cursor() as cursor:
+        with self.readonly() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
             query = """
                 SELECT ha.hash_value,
                     fa.id as file_a_id, fa.filename as filename_a, fa.relative_path as path_a,
@@ -717,7 +1735,61 @@ class DatabaseManager:
             query += " ORDER BY fa.relative_path"
 
             cursor.execute(query, params)
-            return [dict(row) for row in cursor.fetchall()]
+            return _dict_rows(cursor)
+
+    # ==================== File Hash Cache Operations ====================
+
+    def get_cached_file_hashes(
+        self,
+        hash_type: str,
+        keys: List[Tuple[int, int, int, int]]
+    ) -> Dict[Tuple[int, int, int, int], str]:
+        """Look up cached hashes for (device, inode, size, mtime_ns) keys.
+
+        Only keys whose size and mtime_ns still match the cached row are
+        returned, so a modified file is a miss.
+        """
+        if not keys:
+            return {}
+
+        wanted = set(keys)
+        with self.readonly() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute(SQL_GET_CACHED_FILE_HASHES, (
+                _json_array([[device, inode] for device, inode, _, _ in wanted]),
+                hash_type
+            ))
+            return {
+                row[:4]: row[4] for row in cursor.fetchall()
+                if row[:4] in wanted
+            }
+
+    def cache_file_hashes(
+        self,
+        hash_type: str,
+        rows: List[Tuple[int, int, int, int, str]]
+    ):
+        """Store (device, inode, size, mtime_ns, hash_value) rows in one transaction.
+
+        A row for the same device and inode replaces the previous entry.
+        Passing cache hits back in marks them as used today, which keeps
+        run_maintenance() from pruning them.
+        """
+        if not rows:
+            return
+
+        today = date.today().isoformat()
+        with self.cursor() as cursor:
+            cursor.executemany(SQL_CACHE_FILE_HASH, [
+                (device, inode, hash_type, size, mtime_ns, hash_value, today)
+                for device, inode, size, mtime_ns, hash_value in rows
+            ])
+
+    def clear_file_hash_cache(self):
+        """Forget every cached file hash."""
+        with self.cursor() as cursor:
+            cursor.execute("DELETE FROM file_hash_cache")
 
     # ==================== Scan Session Operations ====================
 
@@ -727,7 +1799,7 @@ class DatabaseManager:
         scan_path: Optional[str] = None
     ) -> int:
         """Start a new scan session. Returns session ID."""
-        now = datetime.now().isoformat()
+        now = _now()
 
         with self.cursor() as cursor:
             cursor.execute("""
@@ -776,7 +1848,7 @@ class DatabaseManager:
         error_message: Optional[str] = None
     ):
         """Mark a scan session as complete."""
-        now = datetime.now().isoformat()
+        now = _now()
 
         with self.cursor() as cursor:
             cursor.execute("""
@@ -800,7 +1872,9 @@ class DatabaseManager:
         volume_id: int
     ) -> List[Dict[str, Any]]:
         """Get all scan sessions for a volume, ordered by most recent first."""
-        with self.cursor() as cursor:
+        with self.readonly() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
             cursor.execute("""
                 SELECT ss.*, v.name as volume_name, v.uuid as volume_uuid
                 FROM scan_sessions ss
@@ -808,11 +1882,13 @@ class DatabaseManager:
                 WHERE ss.volume_id = ?
                 ORDER BY ss.started_at DESC
             """, (volume_id,))
-            return [dict(row) for row in cursor.fetchall()]
+            return _dict_rows(cursor)
 
     def get_all_scan_sessions(self) -> List[Dict[str, Any]]:
         """Get all scan sessions with volume info, ordered by most recent first."""
-        with self.cursor() as cursor:
+        with self.readonly() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
             cursor.execute("""
                 SELECT ss.*, v.name as volume_name, v.uuid as volume_uuid,
                        v.mount_point as volume_mount_point
@@ -820,7 +1896,7 @@ class DatabaseManager:
                 JOIN volumes v ON ss.volume_id = v.id
                 ORDER BY ss.started_at DESC
             """)
-            return [dict(row) for row in cursor.fetchall()]
+            return _dict_rows(cursor)
 
     def delete_scan_session(self, session_id: int):
         """Delete a scan session and its checkpoints (via CASCADE)."""
@@ -841,7 +1917,7 @@ class DatabaseManager:
         similarity_scores: Optional[Dict[int, float]] = None
     ) -> int:
         """Create a new duplicate group. Returns group ID."""
-        now = datetime.now().isoformat()
+        now = _now()
 
         with self.cursor() as cursor:
             cursor.execute("""
@@ -852,14 +1928,13 @@ class DatabaseManager:
             group_id = cursor.lastrowid
 
             # Add members
-            for file_id in file_ids:
-                is_keep = 1 if file_id == suggested_keep_id else 0
-                score = similarity_scores.get(file_id) if similarity_scores else None
-                cursor.execute("""
-                    INSERT INTO duplicate_group_files
-                    (group_id, file_id, is_suggested_keep, similarity_score)
-                    VALUES (?, ?, ?, ?)
-                """, (group_id, file_id, is_keep, score))
+            scores = similarity_scores or {}
+            cursor.executemany("""
+                INSERT INTO duplicate_group_files
+                (group_id, file_id, is_suggested_keep, similarity_score)
+                VALUES (?, ?, ?, ?)
+            """, [(group_id, file_id, int(file_id == suggested_keep_id), scores.get(file_id))
+                  for file_id in file_ids])
 
             return group_id
 
@@ -869,7 +1944,9 @@ class DatabaseManager:
         hash_type: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """Get duplicate groups with optional filtering."""
-        with self.cursor() as cursor:
+        with self.readonly() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
             query = "SELECT * FROM duplicate_groups WHERE 1=1"
             params = []
 
@@ -882,14 +1959,16 @@ class DatabaseManager:
 
             query += " ORDER BY created_at DESC"
             cursor.execute(query, params)
-            return [dict(row) for row in cursor.fetchall()]
+            return _dict_rows(cursor)
 
     def get_duplicate_group_files(
         self,
         group_id: int
     ) -> List[Dict[str, Any]]:
         """Get all files in a duplicate group."""
-        with self.cursor() as cursor:
+        with self.readonly() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
             cursor.execute("""
                 SELECT f.*, dgf.is_suggested_keep, dgf.similarity_score
                 FROM files f
@@ -897,7 +1976,7 @@ class DatabaseManager:
                 WHERE dgf.group_id = ?
                 ORDER BY dgf.is_suggested_keep DESC, f.file_size_bytes DESC
             """, (group_id,))
-            return [dict(row) for row in cursor.fetchall()]
+            return _dict_rows(cursor)
 
     def update_duplicate_group_status(self, group_id: int, status: str):
         """Update the status of a duplicate group."""
@@ -928,11 +2007,15 @@ class DatabaseManager:
         current_directory: str,
         files_processed: int,
         files_total: int,
-        directories_completed: List[str]
+        new_directories: List[str]
     ):
-        """Save a checkpoint for resuming a paused scan."""
-        import json
-        now = datetime.now().isoformat()
+        """Save a checkpoint for resuming a paused scan.
+
+        Args:
+            new_directories: Directories completed since the previous checkpoint;
+                they are appended to the ones already stored for the session.
+        """
+        now = _now()
 
         with self.cursor() as cursor:
             # Delete old checkpoints for this session
@@ -945,10 +2028,14 @@ class DatabaseManager:
             cursor.execute("""
                 INSERT INTO scan_checkpoints
                 (session_id, checkpoint_at, current_directory, files_processed,
-                 files_total, directories_completed)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (session_id, now, current_directory, files_processed,
-                  files_total, json.dumps(directories_completed)))
+                 files_total)
+                VALUES (?, ?, ?, ?, ?)
+            """, (session_id, now, current_directory, files_processed, files_total))
+
+            cursor.executemany(
+                "INSERT OR IGNORE INTO scan_checkpoint_dirs (session_id, path) VALUES (?, ?)",
+                [(session_id, path) for path in new_directories]
+            )
 
             # Update session with checkpoint info
             cursor.execute("""
@@ -957,11 +2044,26 @@ class DatabaseManager:
                 WHERE id = ?
             """, (files_processed, files_total, current_directory, session_id))
 
+    def _get_checkpoint_directories(
+        self,
+        cursor: sqlite3.Cursor,
+        session_ids: List[int]
+    ) -> Dict[int, List[str]]:
+        """Get completed directories for each of the given sessions."""
+        directories: Dict[int, List[str]] = {session_id: [] for session_id in session_ids}
+        if session_ids:
+            cursor.execute("""
+                SELECT session_id, path FROM scan_checkpoint_dirs
+                WHERE session_id IN (SELECT value FROM json_each(?))
+            """, (_json_array(session_ids),))
+            for session_id, path in cursor.fetchall():
+                directories[session_id].append(path)
+        return directories
+
     def get_scan_checkpoint(self, session_id: int) -> Optional[Dict[str, Any]]:
         """Get the latest checkpoint for a scan session."""
-        import json
-
-        with self.cursor() as cursor:
+        with self.readonly() as conn:
+            cursor = conn.cursor()
             cursor.execute("""
                 SELECT * FROM scan_checkpoints
                 WHERE session_id = ?
@@ -972,13 +2074,9 @@ class DatabaseManager:
             row = cursor.fetchone()
             if row:
                 result = dict(row)
-                # Parse directories_completed JSON
-                if result.get('directories_completed'):
-                    result['directories_completed'] = json.loads(
-                        result['directories_completed']
-                    )
-                else:
-                    result['directories_completed'] = []
+                result['directories_completed'] = self._get_checkpoint_directories(
+                    cursor, [session_id]
+                )[session_id]
                 return result
             return None
 
@@ -989,17 +2087,23 @@ class DatabaseManager:
                 "DELETE FROM scan_checkpoints WHERE session_id = ?",
                 (session_id,)
             )
+            cursor.execute(
+                "DELETE FROM scan_checkpoint_dirs WHERE session_id = ?",
+                (session_id,)
+            )
 
     def get_paused_scan_sessions(
         self,
         volume_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """Get all paused scan sessions, optionally filtered by volume."""
-        with self.cursor() as cursor:
+        with self.readonly() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
             if volume_id:
                 cursor.execute("""
                     SELECT ss.*, sc.current_directory, sc.files_processed,
-                           sc.files_total, sc.directories_completed
+                           sc.files_total
                     FROM scan_sessions ss
                     LEFT JOIN scan_checkpoints sc ON ss.id = sc.session_id
                     WHERE ss.status = 'paused' AND ss.volume_id = ?
@@ -1008,25 +2112,19 @@ class DatabaseManager:
             else:
                 cursor.execute("""
                     SELECT ss.*, sc.current_directory, sc.files_processed,
-                           sc.files_total, sc.directories_completed
+                           sc.files_total
                     FROM scan_sessions ss
                     LEFT JOIN scan_checkpoints sc ON ss.id = sc.session_id
                     WHERE ss.status = 'paused'
                     ORDER BY ss.started_at DESC
                 """)
 
-            results = []
-            for row in cursor.fetchall():
-                result = dict(row)
-                # Parse directories_completed JSON if present
-                if result.get('directories_completed'):
-                    import json
-                    result['directories_completed'] = json.loads(
-                        result['directories_completed']
-                    )
-                else:
-                    result['directories_completed'] = []
-                results.append(result)
+            results = _dict_rows(cursor)
+            directories = self._get_checkpoint_directories(
+                cursor, [result['id'] for result in results]
+            )
+            for result in results:
+                result['directories_completed'] = directories[result['id']]
 
             return results
 
@@ -1040,7 +2138,9 @@ class DatabaseManager:
 
     def get_interrupted_scans(self) -> List[Dict[str, Any]]:
         """Get scans that were interrupted (running status but app closed)."""
-        with self.cursor() as cursor:
+        with self.readonly() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
             cursor.execute("""
                 SELECT ss.*, v.uuid as volume_uuid, v.name as volume_name,
                        v.mount_point
@@ -1049,91 +2149,118 @@ class DatabaseManager:
                 WHERE ss.status IN ('running', 'paused')
                 ORDER BY ss.started_at DESC
             """)
-            return [dict(row) for row in cursor.fetchall()]
+            return _dict_rows(cursor)
 
     # ==================== Custom Extension Operations ====================
 
     def get_custom_included_extensions(self) -> List[str]:
         """Get list of custom included extensions."""
-        with self.cursor() as cursor:
-            cursor.execute(
-                "SELECT extension FROM custom_extensions WHERE action = 'include'"
-            )
-            return [row[0] for row in cursor.fetchall()]
+        return sorted(self._get_custom_extensions('include'))
 
     def get_custom_excluded_extensions(self) -> List[str]:
         """Get list of custom excluded extensions."""
-        with self.cursor() as cursor:
-            cursor.execute(
-                "SELECT extension FROM custom_extensions WHERE action = 'exclude'"
-            )
-            return [row[0] for row in cursor.fetchall()]
+        return sorted(self._get_custom_extensions('exclude'))
+
+    def get_custom_included_extensions_set(self) -> FrozenSet[str]:
+        """Get custom included extensions as a frozenset for membership tests."""
+        return self._get_custom_extensions('include')
+
+    def get_custom_excluded_extensions_set(self) -> FrozenSet[str]:
+        """Get custom excluded extensions as a frozenset for membership tests."""
+        return self._get_custom_extensions('exclude')
+
+    def _get_custom_extensions(self, action: str) -> FrozenSet[str]:
+        """Extensions for one action, cached until the settings are changed."""
+        cached = self._custom_extensions_cache.get(action)
+        if cached is None:
+            with self.readonly() as conn:
+                cursor = conn.execute(
+                    "SELECT extension FROM custom_extensions WHERE action = ?", (action,)
+                )
+                cached = frozenset(row[0] for row in cursor)
+            self._custom_extensions_cache[action] = cached
+        return cached
 
     def set_custom_included_extensions(self, extensions: List[str]):
         """Set the custom included extensions (replaces existing)."""
-        now = datetime.now().isoformat()
-
-        with self.cursor() as cursor:
-            # Remove existing includes
-            cursor.execute("DELETE FROM custom_extensions WHERE action = 'include'")
-
-            # Insert new includes
-            for ext in extensions:
-                cursor.execute("""
-                    INSERT OR REPLACE INTO custom_extensions (extension, action, added_at)
-                    VALUES (?, 'include', ?)
-                """, (ext.lower(), now))
+        self._set_custom_extensions('include', extensions)
 
     def set_custom_excluded_extensions(self, extensions: List[str]):
         """Set the custom excluded extensions (replaces existing)."""
-        now = datetime.now().isoformat()
+        self._set_custom_extensions('exclude', extensions)
 
-        with self.cursor() as cursor:
-            # Remove existing excludes
-            cursor.execute("DELETE FROM custom_extensions WHERE action = 'exclude'")
+    def _set_custom_extensions(self, action: str, extensions: List[str]):
+        """Replace the extensions for one action, writing only what changed.
 
-            # Insert new excludes
-            for ext in extensions:
-                cursor.execute("""
-                    INSERT OR REPLACE INTO custom_extensions (extension, action, added_at)
-                    VALUES (?, 'exclude', ?)
-                """, (ext.lower(), now))
+        Unchanged rows are left alone, so re-saving the same list writes
+        nothing.
+        """
+        wanted = {ext.lower() for ext in extensions}
+        now = _now()
+
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(
+                    "SELECT extension FROM custom_extensions WHERE action = ?", (action,)
+                )
+                existing = {row[0] for row in cursor.fetchall()}
+
+                cursor.executemany(
+                    "DELETE FROM custom_extensions WHERE extension = ? AND action = ?",
+                    [(ext, action) for ext in existing - wanted]
+                )
+                # INSERT OR REPLACE also moves an extension over from the other action
+                cursor.executemany(SQL_SET_CUSTOM_EXTENSION, [
+                    (ext, action, now) for ext in wanted - existing
+                ])
+        finally:
+            # Both actions: an extension may have moved from one to the other
+            self._custom_extensions_cache.clear()
 
     def clear_custom_extensions(self):
         """Clear all custom extension settings."""
-        with self.cursor() as cursor:
-            cursor.execute("DELETE FROM custom_extensions")
+        try:
+            with self.cursor() as cursor:
+                # custom_extensions has no triggers, so this unfiltered DELETE
+                # is truncated by SQLite instead of removing rows one by one
+                cursor.execute("DELETE FROM custom_extensions")
+        finally:
+            self._custom_extensions_cache.clear()
 
     # ==================== Unknown Extension Operations ====================
 
     def add_unknown_extension(self, extension: str):
         """Add or increment count for an unknown extension."""
-        now = datetime.now().isoformat()
+        now = _now()
         ext = extension.lower()
 
         with self.cursor() as cursor:
-            # Try to update existing
-            cursor.execute("""
-                UPDATE unknown_extensions
-                SET occurrence_count = occurrence_count + 1, last_seen_at = ?
-                WHERE extension = ?
-            """, (now, ext))
+            cursor.execute(SQL_ADD_UNKNOWN_EXTENSION, (ext, 1, now, now))
 
-            if cursor.rowcount == 0:
-                # Insert new
-                cursor.execute("""
-                    INSERT INTO unknown_extensions
-                    (extension, occurrence_count, first_seen_at, last_seen_at)
-                    VALUES (?, 1, ?, ?)
-                """, (ext, now, now))
+    def add_unknown_extensions_bulk(self, counts: Dict[str, int]):
+        """Add occurrence counts for many unknown extensions in one transaction.
+
+        Args:
+            counts: Mapping (e.g. a collections.Counter) of extension to the
+                    number of files seen since the last call
+        """
+        if not counts:
+            return
+
+        now = _now()
+
+        with self.cursor() as cursor:
+            cursor.executemany(SQL_ADD_UNKNOWN_EXTENSION, [
+                (ext.lower(), count, now, now) for ext, count in counts.items()
+            ])
 
     def get_unknown_extensions(self) -> Dict[str, int]:
         """Get all unknown extensions with their occurrence counts."""
-        with self.cursor() as cursor:
-            cursor.execute(
-                "SELECT extension, occurrence_count FROM unknown_extensions"
-            )
-            return {row[0]: row[1] for row in cursor.fetchall()}
+        with self.readonly() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute("SELECT extension, occurrence_count FROM unknown_extensions")
+            return dict(cursor)
 
     def update_unknown_extensions(self, remaining: set):
         """Update unknown extensions table to only keep specified extensions."""
@@ -1141,16 +2268,17 @@ class DatabaseManager:
             if not remaining:
                 cursor.execute("DELETE FROM unknown_extensions")
             else:
-                # Delete extensions not in the remaining set
-                placeholders = ",".join("?" * len(remaining))
-                cursor.execute(f"""
+                # Delete extensions not in the remaining set, passed as one
+                # JSON array so its size is not bound by the parameter limit
+                cursor.execute("""
                     DELETE FROM unknown_extensions
-                    WHERE extension NOT IN ({placeholders})
-                """, list(remaining))
+                    WHERE extension NOT IN (SELECT value FROM json_each(?))
+                """, (_json_array(list(remaining)),))
 
     def clear_unknown_extensions(self):
         """Clear all unknown extensions."""
         with self.cursor() as cursor:
+            # Trigger-free like custom_extensions, so SQLite truncates unknown_extensions
             cursor.execute("DELETE FROM unknown_extensions")
 
     def add_extension_sample_path(
@@ -1163,17 +2291,32 @@ class DatabaseManager:
 
         Used to track where unknown/excluded extensions were found during scanning.
         """
-        ext = extension.lower().lstrip('.')
-        # Normalize path: get directory portion only
-        dir_path = str(Path(relative_path).parent) if '/' in relative_path else ''
+        ext = _normalize_extension(extension)
+        dir_path = self.sample_directory(relative_path)
 
         with self.cursor() as cursor:
-            cursor.execute("""
-                INSERT INTO extension_sample_paths (extension, volume_id, relative_path, file_count)
-                VALUES (?, ?, ?, 1)
-                ON CONFLICT(extension, volume_id, relative_path)
-                DO UPDATE SET file_count = file_count + 1
-            """, (ext, volume_id, dir_path))
+            cursor.execute(SQL_ADD_EXTENSION_SAMPLE_PATH, (ext, volume_id, dir_path, 1))
+
+    def add_extension_sample_paths_bulk(self, counts: Dict[Tuple[str, int, str], int]):
+        """Add file counts for many extension sample directories in one transaction.
+
+        Args:
+            counts: Mapping of (extension, volume_id, directory) to the number
+                    of files seen there; directory comes from sample_directory()
+        """
+        if not counts:
+            return
+
+        with self.cursor() as cursor:
+            cursor.executemany(SQL_ADD_EXTENSION_SAMPLE_PATH, [
+                (_normalize_extension(ext), volume_id, dir_path, count)
+                for (ext, volume_id, dir_path), count in counts.items()
+            ])
+
+    @staticmethod
+    def sample_directory(relative_path: str) -> str:
+        """Directory portion of a relative file path, as stored for sample paths."""
+        return relative_path.rpartition('/')[0]
 
     def get_extension_sample_paths(self, extension: str) -> List[Dict[str, Any]]:
         """Get sample paths where an extension was found.
@@ -1181,32 +2324,13 @@ class DatabaseManager:
         Returns list of dicts with 'directory', 'volume_id', 'volume_name',
         'mount_point', and 'file_count' keys.
         """
-        ext = extension.lower().lstrip('.')
+        ext = _normalize_extension(extension)
 
-        with self.cursor() as cursor:
-            cursor.execute("""
-                SELECT
-                    esp.relative_path as directory,
-                    esp.volume_id,
-                    v.name as volume_name,
-                    v.mount_point,
-                    esp.file_count
-                FROM extension_sample_paths esp
-                JOIN volumes v ON esp.volume_id = v.id
-                WHERE esp.extension = ?
-                ORDER BY esp.file_count DESC, esp.relative_path ASC
-            """, (ext,))
-
-            results = []
-            for row in cursor.fetchall():
-                results.append({
-                    'directory': row[0] or '/',
-                    'volume_id': row[1],
-                    'volume_name': row[2],
-                    'mount_point': row[3],
-                    'file_count': row[4]
-                })
-            return results
+        with self.readonly() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute(SQL_GET_EXTENSION_SAMPLE_PATHS, (ext,))
+            return [_directory_dict(row) for row in cursor]
 
     def clear_extension_sample_paths(self, volume_id: Optional[int] = None):
         """Clear sample paths, optionally for a specific volume."""
@@ -1220,15 +2344,22 @@ class DatabaseManager:
                 cursor.execute("DELETE FROM extension_sample_paths")
 
     def get_extension_counts(self) -> Dict[str, int]:
-        """Get counts of files by extension from the files table."""
+        """Get counts of live files by extension.
+
+        Read from the trigger-maintained extension_counts table, so this does
+        not scan files.
+        """
+        with self.readonly() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute(SQL_GET_EXTENSION_COUNTS)
+            return dict(cursor)
+
+    def rebuild_extension_counts(self):
+        """Recompute the extension_counts summary table from the files table."""
         with self.cursor() as cursor:
-            cursor.execute("""
-                SELECT extension, COUNT(*) as cnt
-                FROM files
-                WHERE is_deleted = 0 AND extension IS NOT NULL AND extension != ''
-                GROUP BY extension
-            """)
-            return {row[0]: row[1] for row in cursor.fetchall()}
+            cursor.execute("DELETE FROM extension_counts")
+            cursor.execute(SQL_REBUILD_EXTENSION_COUNTS)
 
     def get_directories_by_extension(self, extension: str) -> List[Dict[str, Any]]:
         """Get all directories containing files with a specific extension.
@@ -1236,37 +2367,29 @@ class DatabaseManager:
         Returns list of dicts with 'directory', 'volume_id', 'volume_name',
         'mount_point', and 'file_count' keys.
         """
-        ext = extension.lower().lstrip('.')
+        return list(self.iter_directories_by_extension(extension))
 
-        with self.cursor() as cursor:
-            cursor.execute("""
-                SELECT
-                    CASE
-                        WHEN INSTR(f.relative_path, '/') > 0
-                        THEN SUBSTR(f.relative_path, 1, LENGTH(f.relative_path) - LENGTH(f.filename) - 1)
-                        ELSE ''
-                    END as directory,
-                    f.volume_id,
-                    v.name as volume_name,
-                    v.mount_point,
-                    COUNT(*) as file_count
-                FROM files f
-                JOIN volumes v ON f.volume_id = v.id
-                WHERE f.extension = ? AND f.is_deleted = 0
-                GROUP BY directory, f.volume_id
-                ORDER BY file_count DESC, directory ASC
-            """, (ext,))
-
-            results = []
-            for row in cursor.fetchall():
-                results.append({
-                    'directory': row[0] or '/',
-                    'volume_id': row[1],
-                    'volume_name': row[2],
-                    'mount_point': row[3],
-                    'file_count': row[4]
-                })
-            return results
+    def iter_directories_by_extension(
+        self,
+        extension: str,
+        chunk_size: int = 512
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield get_directories_by_extension() results one at a time.
+
+        Rows are fetched chunk_size at a time from a read-only connection.
+        """
+        ext = _normalize_extension(extension)
+
+        with self.readonly() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.arraysize = chunk_size
+            try:
+                cursor.execute(SQL_GET_DIRECTORIES_BY_EXTENSION, (ext,))
+                while rows := cursor.fetchmany():
+                    yield from map(_directory_dict, rows)
+            finally:
+                cursor.close()
 
     # ==================== Excluded Paths Operations ====================
 
@@ -1280,20 +2403,36 @@ class DatabaseManager:
         Returns:
             True if added, False if already exists
         """
-        now = datetime.now().isoformat()
-        # Normalize path: remove leading/trailing slashes
-        normalized = relative_path.strip('/')
+        try:
+            return bool(self.add_excluded_paths(volume_id, [relative_path]))
+        except sqlite3.IntegrityError:
+            return False
+
+    def add_excluded_paths(self, volume_id: int, relative_paths: Iterable[str]) -> List[str]:
+        """Add several excluded paths for a volume in one statement.
+
+        Args:
+            volume_id: The volume ID
+            relative_paths: Paths relative to volume mount point
+
+        Returns:
+            The normalized paths that were added, in input order; paths that
+            were already excluded are skipped
+        """
+        # Normalize paths: remove leading/trailing slashes, drop repeats
+        normalized = list(dict.fromkeys(path.strip('/') for path in relative_paths))
+        if not normalized:
+            return []
 
         with self.cursor() as cursor:
-            try:
-                cursor.execute("""
-                    INSERT INTO excluded_paths (volume_id, relative_path, added_at)
-                    VALUES (?, ?, ?)
-                """, (volume_id, normalized, now))
-                return True
-            except sqlite3.IntegrityError:
-                # Already exists
-                return False
+            cursor.execute("""
+                INSERT OR IGNORE INTO excluded_paths (volume_id, relative_path, added_at)
+                SELECT ?, value, ? FROM json_each(?)
+                RETURNING relative_path
+            """, (volume_id, _now(), _json_array(normalized)))
+            added = {row[0] for row in cursor.fetchall()}
+
+        return [path for path in normalized if path in added]
 
     def remove_excluded_path(self, volume_id: int, relative_path: str) -> bool:
         """Remove an excluded path for a volume.
@@ -1316,13 +2455,13 @@ class DatabaseManager:
         Returns:
             List of relative paths (e.g., ['Users/foo/bar', 'Library/Caches'])
         """
-        with self.cursor() as cursor:
-            cursor.execute("""
+        with self.readonly() as conn:
+            cursor = conn.execute("""
                 SELECT relative_path FROM excluded_paths
                 WHERE volume_id = ?
                 ORDER BY relative_path
             """, (volume_id,))
-            return [row[0] for row in cursor.fetchall()]
+            return [row[0] for row in cursor]
 
     def clear_excluded_paths(self, volume_id: int):
         """Clear all excluded paths for a volume."""
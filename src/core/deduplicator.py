@@ -1,19 +1,36 @@
 """Duplicate detection using perceptual hashing for visual duplicates."""
 
 from pathlib import Path
-from typing import List, Dict, Optional, Callable, Set, Tuple
+from typing import Any, List, Dict, Optional, Callable, Set, Tuple, TYPE_CHECKING
 from collections import defaultdict
+import filecmp
 import hashlib
+import logging
+import mmap
 import multiprocessing
+import os
 import re
+import sqlite3
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import chain
 
 from PIL import Image
 import imagehash
 
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
 from ..models.image_file import ImageFile
 from ..models.duplicate_group import DuplicateGroup
 
+if TYPE_CHECKING:
+    from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
 
 def extract_date_prefix(folder_name: str) -> Optional[str]:
     """
@@ -113,27 +130,128 @@ def extract_base_filename(filename: str) -> str:
     return name.strip()
 
 
-def compute_file_hash(file_path: str, chunk_size: int = 65536) -> Optional[str]:
+# Algorithms accepted for whole-file hashes. These hashes are only compared
+# with each other within one run, so the fastest installed one is the default.
+FILE_HASH_METHODS = ("blake3", "md5", "sha256")
+DEFAULT_HASH_METHOD = "blake3" if BLAKE3_AVAILABLE else "md5"
+
+# Bytes read from each end of a file for its quick fingerprint
+QUICK_FINGERPRINT_BYTES = 65536
+
+# Files at least this large are memory-mapped for hashing; smaller ones are
+# read with a single read() call
+MMAP_HASH_THRESHOLD = 1024 * 1024
+
+# Below this many files, hashing runs on the calling thread instead of the pool
+INLINE_HASH_LIMIT = 4
+
+# SQLite stores signed 64-bit integers; identities beyond that are not cached
+MAX_CACHE_KEY = 2**63
+
+
+def compute_file_hash(
+    file_path: str,
+    chunk_size: int = 65536,
+    hash_method: str = DEFAULT_HASH_METHOD
+) -> Optional[str]:
     """
-    Compute MD5 hash of a file (full file bytes).
+    Compute a hash of a file (full file bytes).
+
+    Files of MMAP_HASH_THRESHOLD bytes or more are memory-mapped and hashed
+    in one call, so the hash runs over the page cache without a Python loop.
 
     Args:
         file_path: Path to the file.
-        chunk_size: Size of chunks to read (default 64KB).
+        chunk_size: Size of chunks to read when a file cannot be mapped
+            (default 64KB).
+        hash_method: 'blake3', 'md5' or 'sha256'. BLAKE3 falls back to MD5
+            when the blake3 package is not installed.
 
     Returns:
-        Hex string of MD5 hash, or None if file cannot be read.
+        Hex string of the hash, or None if file cannot be read.
     """
     try:
-        hasher = hashlib.md5()
+        if hash_method == "blake3" and BLAKE3_AVAILABLE:
+            # Multithreaded, reading straight from a memory map
+            hasher = blake3.blake3(max_threads=blake3.blake3.AUTO)
+            hasher.update_mmap(file_path)
+            return hasher.hexdigest()
+
+        hasher = hashlib.sha256() if hash_method == "sha256" else hashlib.md5()
         with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(chunk_size), b''):
-                hasher.update(chunk)
+            if os.fstat(f.fileno()).st_size < MMAP_HASH_THRESHOLD:
+                hasher.update(f.read())
+                return hasher.hexdigest()
+
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    hasher.update(mapped)
+            except (ValueError, OSError):
+                # Not mappable (e.g. some network filesystems); stream instead
+                for chunk in iter(lambda: f.read(chunk_size), b''):
+                    hasher.update(chunk)
         return hasher.hexdigest()
     except (IOError, OSError):
         return None
 
 
+def compute_quick_fingerprint(
+    file_path: str,
+    sample_size: int = QUICK_FINGERPRINT_BYTES,
+    hash_method: str = DEFAULT_HASH_METHOD
+) -> Optional[Tuple[int, str]]:
+    """
+    Hash the first and last sample_size bytes of a file.
+
+    Files no larger than 2 * sample_size are read in full, so for them the
+    fingerprint equals compute_file_hash with the same hash_method.
+
+    Args:
+        file_path: Path to the file.
+        sample_size: Bytes read from each end of the file (default 64KB).
+        hash_method: 'blake3', 'md5' or 'sha256', as for compute_file_hash.
+
+    Returns:
+        (file size, hex string of the fingerprint), or None if file cannot be read.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            head = f.read(sample_size)
+            size = f.seek(0, os.SEEK_END)
+            # Never re-read bytes already in head
+            f.seek(max(sample_size, size - sample_size))
+            tail = f.read()
+    except (IOError, OSError):
+        return None
+
+    if hash_method == "blake3" and BLAKE3_AVAILABLE:
+        hasher = blake3.blake3()
+    else:
+        hasher = hashlib.sha256() if hash_method == "sha256" else hashlib.md5()
+    hasher.update(head)
+    hasher.update(tail)
+    return size, hasher.hexdigest()
+
+
+def files_identical(paths: Tuple[str, str]) -> bool:
+    """
+    Compare two files byte by byte, stopping at the first difference.
+
+    Args:
+        paths: The two file paths to compare.
+
+    Returns:
+        True if both files have the same content, False if they differ or
+        either cannot be read.
+    """
+    try:
+        return filecmp.cmp(paths[0], paths[1], shallow=False)
+    except (IOError, OSError):
+        return False
+
+
 def compute_image_hash(file_path: str) -> Optional[str]:
     """
     Compute MD5 hash of image pixel data only, ignoring EXIF metadata.
@@ -253,11 +371,12 @@ class Deduplicator:
         cnn_threshold: float = 0.85,  # Ignored - kept for API compatibility
         use_cnn: bool = False,  # Ignored - kept for API compatibility
         focus_intra_directory: bool = True,
-        hash_method: str = "md5",  # md5 (fast) or sha256 (more secure)
+        hash_method: str = DEFAULT_HASH_METHOD,  # blake3 (fastest), md5 or sha256
         num_workers: int = 0,  # 0 = auto (use all CPU cores)
         detection_mode: str = "exact",  # "exact" (MD5 pixel) or "perceptual" (pHash)
         perceptual_threshold: int = 10,  # Hamming distance threshold (0=strict, 20=loose)
-        hash_algorithm: str = "phash"  # phash, dhash, ahash, or whash
+        hash_algorithm: str = "phash",  # phash, dhash, ahash, or whash
+        hash_cache: Optional["DatabaseManager"] = None  # Persist file hashes between runs
     ):
         """
         Initialize the deduplicator.
@@ -267,19 +386,31 @@ class Deduplicator:
             cnn_threshold: Ignored (kept for compatibility).
             use_cnn: Ignored (kept for compatibility).
             focus_intra_directory: Process each directory separately.
-            hash_method: Hash algorithm - 'md5' (fast) or 'sha256' (secure).
+            hash_method: File hash algorithm - 'blake3' (fastest, needs the blake3
+                package), 'md5' or 'sha256'. Other values use the default.
             num_workers: Number of parallel workers (0 = auto-detect CPU cores).
             detection_mode: "exact" for MD5 of pixel data, "perceptual" for pHash.
             perceptual_threshold: Max Hamming distance for perceptual matching (0=strict, 20=loose).
             hash_algorithm: Perceptual hash algorithm - 'phash', 'dhash', 'ahash', or 'whash'.
+            hash_cache: Database to cache whole-file hashes in, keyed by device,
+                inode, size and mtime, so unchanged files are not read in full
+                again. None disables the cache.
         """
         self.focus_intra_directory = focus_intra_directory
         self.hash_method = hash_method.lower()
+        if self.hash_method not in FILE_HASH_METHODS:
+            self.hash_method = DEFAULT_HASH_METHOD
+        elif self.hash_method == "blake3" and not BLAKE3_AVAILABLE:
+            # Name the digest compute_file_hash actually produces, so cached
+            # hashes never mix MD5 values under the blake3 key
+            self.hash_method = "md5"
         self.detection_mode = detection_mode
         self.perceptual_threshold = perceptual_threshold
         self.hash_algorithm = hash_algorithm
         # Auto-detect CPU cores if not specified
         self.num_workers = num_workers if num_workers > 0 else multiprocessing.cpu_count()
+        self.hash_cache = hash_cache
+        self._executor: Optional[ThreadPoolExecutor] = None
         self._cancelled = False
 
     def cancel(self):
@@ -363,6 +494,8 @@ class Deduplicator:
 
             processed_dirs += 1
 
+        self.close()
+
         if progress_callback:
             progress_callback("Complete", total_dirs, total_dirs)
 
@@ -394,26 +527,58 @@ class Deduplicator:
         if self._cancelled:
             return []
 
-        # Compute file hashes in parallel
+        # Identical files have identical sizes, so only files sharing their
+        # size with another file need hashing
+        size_to_images: Dict[int, List[ImageFile]] = defaultdict(list)
+        for img in images:
+            size_to_images[img.file_size].append(img)
+        candidates = [
+            img for bucket in size_to_images.values() if len(bucket) > 1
+            for img in bucket
+        ]
+        if not candidates:
+            return []
+
+        # Files that differ usually do so near the start or end (metadata,
+        # thumbnails), so a cheap head/tail fingerprint narrows the candidates
+        # before any file is hashed in full
         hash_to_paths: Dict[str, List[str]] = defaultdict(list)
 
-        def hash_file(img: ImageFile) -> Tuple[str, Optional[str]]:
-            """Hash a single file and return (path, hash)."""
-            file_hash = compute_file_hash(str(img.path))
-            return (str(img.path), file_hash)
+        fingerprints = self._hash_paths(
+            [str(img.path) for img in candidates],
+            lambda path: compute_quick_fingerprint(path, hash_method=self.hash_method)
+        )
+        if fingerprints is None:
+            return []
 
-        # Parallel hash computation using threads (I/O bound)
-        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
-            futures = {executor.submit(hash_file, img): img for img in images}
+        fingerprint_to_paths: Dict[Tuple[int, str], List[str]] = defaultdict(list)
+        for path, fingerprint in fingerprints.items():
+            fingerprint_to_paths[fingerprint].append(path)
 
-            for future in as_completed(futures):
-                if self._cancelled:
-                    executor.shutdown(wait=False, cancel_futures=True)
-                    return []
+        to_hash: List[str] = []
+        pairs: List[Tuple[str, str]] = []
+        for (size, fingerprint), paths in fingerprint_to_paths.items():
+            if len(paths) < 2:
+                continue
+            if size <= 2 * QUICK_FINGERPRINT_BYTES:
+                # The fingerprint already covered every byte
+                hash_to_paths[fingerprint] = paths
+            elif len(paths) == 2 and self.hash_cache is None:
+                # One comparison settles a pair without hashing either file.
+                # With a cache, hashing lets the next run skip both reads.
+                pairs.append((paths[0], paths[1]))
+            else:
+                to_hash.extend(paths)
+
+        identical_pairs = self._hash_paths(pairs, files_identical)
+        if identical_pairs is None:
+            return []
 
-                path, file_hash = future.result()
-                if file_hash:
-                    hash_to_paths[file_hash].append(path)
+        file_hashes = self._hash_files(to_hash)
+        if file_hashes is None:
+            return []
+        for path, file_hash in file_hashes.items():
+            hash_to_paths[file_hash].append(path)
 
         if self._cancelled:
             return []
@@ -422,33 +587,149 @@ class Deduplicator:
         groups: List[DuplicateGroup] = []
         group_id = start_group_id
 
-        for file_hash, paths in hash_to_paths.items():
+        for paths in chain(hash_to_paths.values(), map(list, identical_pairs)):
             if len(paths) < 2:
                 continue
 
-            # Create group with images that have identical hashes
+            # Create group with images that have identical content
             image_list = [path_to_image[p] for p in paths if p in path_to_image]
 
             if len(image_list) < 2:
                 continue
 
-            # All files in group are exact duplicates (similarity = 1.0)
-            group_scores = {}
-            for i, p1 in enumerate(paths):
-                for p2 in paths[i+1:]:
-                    key = tuple(sorted([p1, p2]))
-                    group_scores[key] = 1.0
-
+            # Every pair is an exact match, so one score covers the whole group
             group = DuplicateGroup(
                 group_id=group_id,
                 images=image_list,
-                similarity_scores=group_scores
+                uniform_score=1.0
             )
             groups.append(group)
             group_id += 1
 
         return groups
 
+    def _hash_paths(
+        self,
+        paths: List[Any],
+        hash_func: Callable[[Any], Optional[Any]]
+    ) -> Optional[Dict[Any, Any]]:
+        """
+        Hash files, in parallel on the shared hashing pool when worthwhile.
+
+        Each entry of paths is passed to hash_func as-is, so it may also be a
+        tuple of paths for functions such as files_identical.
+
+        Fewer than INLINE_HASH_LIMIT files are hashed on the calling thread,
+        where handing them to the pool would cost more than it saves.
+
+        Returns:
+            Dict of path to hash, leaving out unreadable files and other falsy
+            results, or None if the operation was cancelled.
+        """
+        results: Dict[Any, Any] = {}
+
+        if len(paths) < INLINE_HASH_LIMIT or self.num_workers == 1:
+            for path in paths:
+                if self._cancelled:
+                    return None
+                file_hash = hash_func(path)
+                if file_hash:
+                    results[path] = file_hash
+            return results
+
+        # Parallel hash computation using threads (I/O bound)
+        executor = self._get_executor()
+        futures = {executor.submit(hash_func, path): path for path in paths}
+
+        for future in as_completed(futures):
+            if self._cancelled:
+                # The pool is shared across calls, so drop only this call's work
+                for pending in futures:
+                    pending.cancel()
+                return None
+
+            file_hash = future.result()
+            if file_hash:
+                results[futures[future]] = file_hash
+
+        return results
+
+    def _hash_files(self, paths: List[str]) -> Optional[Dict[str, str]]:
+        """
+        Hash whole files, reusing hashes from hash_cache where the file is unchanged.
+
+        Returns:
+            Dict of path to hash, leaving out unreadable files, or None if
+            the operation was cancelled.
+        """
+        def hash_func(path: str) -> Optional[str]:
+            return compute_file_hash(path, hash_method=self.hash_method)
+
+        if self.hash_cache is None or not paths:
+            return self._hash_paths(paths, hash_func)
+
+        path_keys: Dict[str, Tuple[int, int, int, int]] = {}
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if st.st_dev < MAX_CACHE_KEY and st.st_ino < MAX_CACHE_KEY:
+                path_keys[path] = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+        # The cache only saves work, so a locked or broken database just
+        # means hashing without it
+        try:
+            cached = self.hash_cache.get_cached_file_hashes(
+                self.hash_method, list(path_keys.values())
+            )
+        except sqlite3.Error as e:
+            logger.warning("File hash cache lookup failed, hashing all files: %s", e)
+            cached = {}
+        results: Dict[str, str] = {
+            path: cached[key] for path, key in path_keys.items() if key in cached
+        }
+
+        computed = self._hash_paths(
+            [path for path in paths if path not in results], hash_func
+        )
+        if computed is None:
+            return None
+
+        results.update(computed)
+
+        # One batch per call rather than a write per file. Hits are included
+        # so their rows are marked as still in use.
+        try:
+            self.hash_cache.cache_file_hashes(self.hash_method, [
+                (*path_keys[path], file_hash)
+                for path, file_hash in results.items() if path in path_keys
+            ])
+        except sqlite3.Error as e:
+            logger.warning("Could not store file hashes in the cache: %s", e)
+        return results
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get the hashing thread pool, creating it on first use.
+
+        One pool serves every directory instead of a new one per call; its
+        threads are only started as work arrives.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.num_workers,
+                thread_name_prefix="dedupe_hash"
+            )
+        return self._executor
+
+    def close(self):
+        """Shut down the hashing thread pool. It is recreated if needed again."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        # filecmp remembers every comparison it has made
+        filecmp.clear_cache()
+
     def _find_duplicates_with_exact_hashes(
         self,
         images: List[ImageFile],
@@ -496,17 +777,11 @@ class Deduplicator:
             if len(image_list) < 2:
                 continue
 
-            # All files in group are exact duplicates (similarity = 1.0)
-            group_scores = {}
-            for i, p1 in enumerate(paths):
-                for p2 in paths[i+1:]:
-                    key = tuple(sorted([p1, p2]))
-                    group_scores[key] = 1.0
-
+            # Every pair is an exact match, so one score covers the whole group
             group = DuplicateGroup(
                 group_id=group_id,
                 images=image_list,
-                similarity_scores=group_scores
+                uniform_score=1.0
             )
             groups.append(group)
             group_id += 1
@@ -575,7 +850,7 @@ class Deduplicator:
                     # Convert distance to similarity (0 distance = 1.0 similarity)
                     # Max distance for 64-bit hash is 64
                     similarity = 1.0 - (distance / 64.0)
-                    key = tuple(sorted([path1, path2]))
+                    key = (path1, path2) if path1 <= path2 else (path2, path1)
                     similarity_scores[key] = similarity
 
         # Group paths by their root parent
@@ -601,7 +876,7 @@ class Deduplicator:
             group_scores = {}
             for i, p1 in enumerate(paths):
                 for p2 in paths[i+1:]:
-                    key = tuple(sorted([p1, p2]))
+                    key = (p1, p2) if p1 <= p2 else (p2, p1)
                     if key in similarity_scores:
                         group_scores[key] = similarity_scores[key]
 
@@ -658,18 +933,11 @@ class Deduplicator:
                 # All files are in the same directory - not a cross-directory duplicate
                 continue
 
-            # Create similarity scores (use 1.0 for filename matches)
-            group_scores = {}
-            paths = [str(img.path) for img in matching_images]
-            for i, p1 in enumerate(paths):
-                for p2 in paths[i+1:]:
-                    key = tuple(sorted([p1, p2]))
-                    group_scores[key] = 1.0
-
+            # Filename matches score 1.0 for every pair
             group = DuplicateGroup(
                 group_id=group_id,
                 images=matching_images,
-                similarity_scores=group_scores
+                uniform_score=1.0
             )
             groups.append(group)
             group_id += 1
@@ -937,18 +1205,11 @@ class Deduplicator:
             if len(image_list) < 2:
                 continue
 
-            # Create similarity scores (all 1.0 for exact matches)
-            group_scores = {}
-            paths = [str(img.path) for img in image_list]
-            for j, p1 in enumerate(paths):
-                for p2 in paths[j+1:]:
-                    key = tuple(sorted([p1, p2]))
-                    group_scores[key] = 1.0
-
+            # Every pair is an exact match, so one score covers the whole group
             group = DuplicateGroup(
                 group_id=group_id,
                 images=image_list,
-                similarity_scores=group_scores
+                uniform_score=1.0
             )
             all_groups.append(group)
             group_id += 1
@@ -1041,18 +1302,11 @@ class Deduplicator:
             if len(image_list) < 2:
                 continue
 
-            # Create similarity scores
-            group_scores = {}
-            paths = [str(img.path) for img in image_list]
-            for j, p1 in enumerate(paths):
-                for p2 in paths[j+1:]:
-                    key = tuple(sorted([p1, p2]))
-                    group_scores[key] = 1.0
-
+            # Every pair is an exact match, so one score covers the whole group
             group = DuplicateGroup(
                 group_id=group_id,
                 images=image_list,
-                similarity_scores=group_scores
+                uniform_score=1.0
             )
             group.is_cross_volume = True
             all_groups.append(group)
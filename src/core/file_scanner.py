@@ -8,13 +8,13 @@ Supports multi-threaded hash computation for improved performance on multi-core
 
 from __future__ import annotations
 
+from collections import Counter
 from concurrent.futures import ThreadPoolExecutor, Future, as_completed
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Callable, Generator, Dict, Tuple, TYPE_CHECKING
+from typing import List, Optional, Callable, Generator, Dict, FrozenSet, Tuple, TYPE_CHECKING
 import os
-import threading
 import warnings
 
 from .database import DatabaseManager
@@ -96,6 +96,12 @@ class FileScanner:
     # Size of the hash job batch before waiting for results
     HASH_BATCH_SIZE = 50
 
+    # Number of scanned files written per bulk insert (also flushed at checkpoints)
+    FILE_BATCH_SIZE = 500
+
+    # Number of unknown-extension files tallied in memory before writing counts
+    EXTENSION_FLUSH_INTERVAL = 10000
+
     def __init__(
         self,
         db_manager: Optional[DatabaseManager] = None,
@@ -125,8 +131,10 @@ class FileScanner:
         self._current_session_id: Optional[int] = None
         self._current_directory: str = ""
         self._directories_completed: List[str] = []
+        self._directories_saved: int = 0  # Prefix of _directories_completed already checkpointed
+        self._resumed_directories: FrozenSet[str] = frozenset()  # Completed before a resume
         self._total_files: int = 0
-        self._excluded_paths: List[str] = []  # User-defined excluded paths
+        self._excluded_paths: FrozenSet[str] = frozenset()  # User-defined excluded paths
         self._volume_mount_point: Optional[Path] = None  # For relative path calculations
 
         # Multi-threading configuration
@@ -139,7 +147,10 @@ class FileScanner:
 
         self._thread_pool: Optional[ThreadPoolExecutor] = None
         self._pending_hash_futures: List[Future] = []
-        self._db_lock = threading.Lock()  # Lock for thread-safe DB writes
+        self._pending_files: List[Tuple[Path, str, Tuple]] = []
+        self._unknown_extension_counts: Counter = Counter()
+        self._sample_path_counts: Counter = Counter()
+        self._unknown_files_pending: int = 0
 
     def cancel(self):
         """Cancel the current scan operation."""
@@ -157,10 +168,16 @@ class FileScanner:
         self._current_session_id = None
         self._current_directory = ""
         self._directories_completed = []
+        self._directories_saved = 0
+        self._resumed_directories = frozenset()
         self._total_files = 0
-        self._excluded_paths = []
+        self._excluded_paths = frozenset()
         self._volume_mount_point = None
         self._pending_hash_futures = []
+        self._pending_files = []
+        self._unknown_extension_counts = Counter()
+        self._sample_path_counts = Counter()
+        self._unknown_files_pending = 0
 
         # Shutdown existing thread pool if any
         if self._thread_pool:
@@ -197,13 +214,14 @@ class FileScanner:
             # Path is not under the mount point
             return False
 
-        # Check if this path matches or is under any excluded path
-        for excluded in self._excluded_paths:
-            # Check if the path equals or starts with the excluded path
-            if relative_str == excluded or relative_str.startswith(excluded + '/'):
+        # Check the path and each of its ancestors, so the cost depends on
+        # path depth rather than on how many paths are excluded
+        while True:
+            if relative_str in self._excluded_paths:
                 return True
-
-        return False
+            relative_str, sep, _ = relative_str.rpartition('/')
+            if not sep:
+                return False
 
     def scan_volume(
         self,
@@ -239,7 +257,7 @@ class FileScanner:
         self._volume_mount_point = volume_info.mount_point
 
         # Load user-defined excluded paths for this volume
-        self._excluded_paths = self.db.get_excluded_paths(volume_id)
+        self._excluded_paths = frozenset(self.db.get_excluded_paths(volume_id))
 
         # Determine scan root
         root_path = scan_path or volume_info.mount_point
@@ -254,6 +272,8 @@ class FileScanner:
             # Restore state from checkpoint
             if checkpoint:
                 self._directories_completed = checkpoint.get('directories_completed', [])
+                self._directories_saved = len(self._directories_completed)
+                self._resumed_directories = frozenset(self._directories_completed)
                 self._total_files = checkpoint.get('files_total', 0)
                 # Restore stats from session
                 session = self.db.get_scan_session(session_id)
@@ -277,6 +297,7 @@ class FileScanner:
                 self._total_files = self._count_files(root_path)
                 # Reset directories_completed after counting (it gets populated during count)
                 self._directories_completed = []
+                self._directories_saved = 0
 
             total_files = self._total_files
             processed = self._stats.files_scanned + self._stats.files_unchanged
@@ -300,9 +321,7 @@ class FileScanner:
                 if file_type == FileType.OTHER:
                     ext = file_path.suffix.lower().lstrip('.')
                     if ext:  # Only track if there's an extension
-                        self.db.add_unknown_extension(ext)
-                        # Also record the path for directory listing
-                        self.db.add_extension_sample_path(ext, volume_id, relative_path)
+                        self._record_unknown_extension(ext, volume_id, relative_path)
                     continue
 
                 # Check file filter (including size check)
@@ -311,7 +330,7 @@ class FileScanner:
                     continue
 
                 # Check if file already exists in database
-                existing = self.db.get_file_by_path(volume_id, relative_path)
+                existing = self.db.get_file_modified_by_path(volume_id, relative_path)
 
                 # Get file stats
                 try:
@@ -323,9 +342,9 @@ class FileScanner:
 
                 # Check if file needs updating
                 if existing:
-                    # File exists - check if modified
-                    if existing.get('file_modified_at') == file_modified:
-                        # File unchanged, skip
+                    # File exists - check if modified, or stored without hashes
+                    if existing[1] == file_modified and existing[2]:
+                        # File unchanged and hashed, skip
                         self._stats.files_unchanged += 1
                         processed += 1
                         if progress_callback:
@@ -341,23 +360,21 @@ class FileScanner:
                     file_path, volume_id, volume_info.mount_point, file_type
                 )
 
-                # Store in database
-                file_id = self.db.add_file(
-                    volume_id=volume_id,
-                    relative_path=relative_path,
-                    filename=scanned_file.filename,
-                    extension=scanned_file.extension,
-                    file_size_bytes=scanned_file.file_size_bytes,
-                    file_type=file_type,
-                    width=scanned_file.width,
-                    height=scanned_file.height,
-                    duration_seconds=scanned_file.duration_seconds,
-                    file_created_at=scanned_file.file_created_at.isoformat() if scanned_file.file_created_at else None,
-                    file_modified_at=scanned_file.file_modified_at.isoformat() if scanned_file.file_modified_at else None,
-                )
-
-                # Compute and store hash for the file
-                self._compute_and_store_hash(file_id, file_path, file_type)
+                # Queue for the next bulk insert; hashing follows once the ID is known
+                self._pending_files.append((file_path, file_type, (
+                    relative_path,
+                    scanned_file.filename,
+                    scanned_file.extension,
+                    scanned_file.file_size_bytes,
+                    file_type,
+                    scanned_file.width,
+                    scanned_file.height,
+                    scanned_file.duration_seconds,
+                    scanned_file.file_created_at.isoformat() if scanned_file.file_created_at else None,
+                    file_modified,  # Same string the unchanged check compares against
+                )))
+                if len(self._pending_files) >= self.FILE_BATCH_SIZE:
+                    self._flush_pending_files(volume_id)
 
                 processed += 1
                 self._stats.files_scanned += 1
@@ -368,58 +385,83 @@ class FileScanner:
 
                 # Save checkpoint periodically
                 if processed % self.CHECKPOINT_INTERVAL == 0:
-                    self._save_checkpoint(session_id, current_dir, processed, total_files)
+                    self._flush_pending_files(volume_id)
+                    # Tallies and the checkpoint that covers them share a commit
+                    with self.db.bulk():
+                        self._flush_extension_counts()
+                        self._save_checkpoint(session_id, current_dir, processed, total_files)
+
+            self._flush_pending_files(volume_id)
 
             # Wait for all pending hash jobs to complete before finalizing
             if self._hash_workers > 1:
                 self._process_completed_hash_futures(wait_all=True)
-
-            # Update scan session
-            self.db.update_scan_session(
-                session_id=session_id,
-                files_scanned=self._stats.files_scanned,
-                files_added=self._stats.files_added,
-                files_updated=self._stats.files_updated,
-            )
-
-            # Handle paused state
-            if self._paused:
-                # Save checkpoint and exit
-                self._save_checkpoint(
-                    session_id, self._current_directory, processed, total_files
+            self.db.flush_writes()
+
+            # Record the outcome in a single transaction
+            with self.db.bulk():
+                self._flush_extension_counts()
+
+                # Update scan session
+                self.db.update_scan_session(
+                    session_id=session_id,
+                    files_scanned=self._stats.files_scanned,
+                    files_added=self._stats.files_added,
+                    files_updated=self._stats.files_updated,
                 )
-                self.db.pause_scan_session(session_id)
 
-                # Update volume status to partial
+                # Handle paused state
+                if self._paused:
+                    # Save checkpoint and exit
+                    self._save_checkpoint(
+                        session_id, self._current_directory, processed, total_files
+                    )
+                    self.db.pause_scan_session(session_id)
+
+                    # Update volume status to partial
+                    file_count = self.db.get_file_count_by_volume(volume_id)
+                    self.db.update_volume_scan_status(
+                        volume_id=volume_id,
+                        status='partial',
+                        file_count=file_count
+                    )
+                    return session_id, self._stats
+
+                # Mark session complete
+                status = 'cancelled' if self._cancelled else 'completed'
+                self.db.complete_scan_session(session_id, status=status)
+
+                # Delete checkpoint on completion
+                self.db.delete_scan_checkpoint(session_id)
+
+                # Update volume status
                 file_count = self.db.get_file_count_by_volume(volume_id)
                 self.db.update_volume_scan_status(
                     volume_id=volume_id,
-                    status='partial',
+                    status='complete' if not self._cancelled else 'partial',
                     file_count=file_count
                 )
-                return session_id, self._stats
 
-            # Mark session complete
-            status = 'cancelled' if self._cancelled else 'completed'
-            self.db.complete_scan_session(session_id, status=status)
-
-            # Delete checkpoint on completion
-            self.db.delete_scan_checkpoint(session_id)
-
-            # Update volume status
-            file_count = self.db.get_file_count_by_volume(volume_id)
-            self.db.update_volume_scan_status(
-                volume_id=volume_id,
-                status='complete' if not self._cancelled else 'partial',
-                file_count=file_count
-            )
+            # Fold the scan's WAL back into the database and refresh statistics
+            self.db.run_maintenance()
 
             return session_id, self._stats
 
         except Exception as e:
+            # Store whatever was already scanned so the checkpoint stays accurate
+            try:
+                self._flush_pending_files(volume_id)
+                self._flush_extension_counts()
+            except Exception:
+                self._pending_files.clear()
+
             # Wait for pending hash jobs before error handling
             if self._hash_workers > 1:
                 self._process_completed_hash_futures(wait_all=True)
+            try:
+                self.db.flush_writes()
+            except Exception:
+                pass  # The original error is the one worth reporting
 
             # Save checkpoint on error so scan can be resumed
             self._save_checkpoint(session_id, self._current_directory, processed, total_files)
@@ -436,6 +478,47 @@ class FileScanner:
                 self._thread_pool.shutdown(wait=False)
                 self._thread_pool = None
 
+    def _flush_pending_files(self, volume_id: int):
+        """Bulk-insert queued files, then hash them using their new IDs."""
+        if not self._pending_files:
+            return
+
+        pending, self._pending_files = self._pending_files, []
+        file_ids = self.db.add_files_bulk(volume_id, [row for _, _, row in pending])
+
+        if self._hash_workers > 1:
+            for file_id, (file_path, file_type, _) in zip(file_ids, pending):
+                self._compute_and_store_hash(file_id, file_path, file_type)
+        else:
+            # Hash the whole batch first, then store it in one transaction
+            self._store_hash_results([
+                self._process_hash_job(self._create_hash_job(file_id, file_path, file_type))
+                for file_id, (file_path, file_type, _) in zip(file_ids, pending)
+            ])
+
+    def _record_unknown_extension(self, ext: str, volume_id: int, relative_path: str):
+        """Tally an unknown-extension file; counts are written in batches."""
+        self._unknown_extension_counts[ext] += 1
+        self._sample_path_counts[
+            (ext, volume_id, DatabaseManager.sample_directory(relative_path))
+        ] += 1
+        self._unknown_files_pending += 1
+        if self._unknown_files_pending >= self.EXTENSION_FLUSH_INTERVAL:
+            self._flush_extension_counts()
+
+    def _flush_extension_counts(self):
+        """Write tallied unknown extensions and sample paths in one transaction."""
+        if not self._unknown_files_pending:
+            return
+
+        unknown, self._unknown_extension_counts = self._unknown_extension_counts, Counter()
+        samples, self._sample_path_counts = self._sample_path_counts, Counter()
+        self._unknown_files_pending = 0
+
+        with self.db.bulk():
+            self.db.add_unknown_extensions_bulk(unknown)
+            self.db.add_extension_sample_paths_bulk(samples)
+
     def _save_checkpoint(
         self,
         session_id: int,
@@ -443,14 +526,18 @@ class FileScanner:
         files_processed: int,
         files_total: int
     ):
-        """Save current scan progress as a checkpoint."""
+        """Save current scan progress as a checkpoint.
+
+        Only directories completed since the previous checkpoint are written.
+        """
         self.db.save_scan_checkpoint(
             session_id=session_id,
             current_directory=current_directory,
             files_processed=files_processed,
             files_total=files_total,
-            directories_completed=self._directories_completed
+            new_directories=self._directories_completed[self._directories_saved:]
         )
+        self._directories_saved = len(self._directories_completed)
 
     def scan_directory(
         self,
@@ -542,7 +629,7 @@ class FileScanner:
 
             # Skip files if directory already completed (for resume)
             # But still allow traversal into subdirectories
-            if current_dir_str in self._directories_completed:
+            if current_dir_str in self._resumed_directories:
                 continue
 
             # Yield files
@@ -703,28 +790,30 @@ class FileScanner:
                 error=str(e)
             )
 
-    def _store_hash_result(self, result: HashResult):
-        """Store hash result in the database (thread-safe).
+    def _store_hash_results(self, results: List[HashResult]):
+        """Queue hash results for the database's background writer.
 
         Args:
-            result: Hash result to store
+            results: Hash results to store
         """
-        if result.error:
-            return
-
-        with self._db_lock:
+        rows = []
+        for result in results:
+            if result.error:
+                continue
             if result.primary_hash_value:
-                self.db.add_hash(
+                rows.append((
                     result.file_id,
                     result.primary_hash_type,
                     result.primary_hash_value
-                )
+                ))
             if result.secondary_hash_value and result.secondary_hash_type:
-                self.db.add_hash(
+                rows.append((
                     result.file_id,
                     result.secondary_hash_type,
                     result.secondary_hash_value
-                )
+                ))
+
+        self.db.queue_hashes(rows)
 
     def _submit_hash_job(self, job: HashJob):
         """Submit a hash job to the thread pool.
@@ -754,12 +843,12 @@ class FileScanner:
         if not self._pending_hash_futures:
             return
 
+        results = []
         if wait_all:
             # Wait for all futures to complete
             for future in as_completed(self._pending_hash_futures):
                 try:
-                    result = future.result()
-                    self._store_hash_result(result)
+                    results.append(future.result())
                 except Exception:
                     pass  # Already handled in _process_hash_job
             self._pending_hash_futures.clear()
@@ -769,14 +858,15 @@ class FileScanner:
             for future in self._pending_hash_futures:
                 if future.done():
                     try:
-                        result = future.result()
-                        self._store_hash_result(result)
+                        results.append(future.result())
                     except Exception:
                         pass
                 else:
                     still_pending.append(future)
             self._pending_hash_futures = still_pending
 
+        self._store_hash_results(results)
+
     def _compute_and_store_hash(
         self,
         file_id: int,
@@ -786,6 +876,7 @@ class FileScanner:
         """Compute hash(es) for a file and store in the database.
 
         Uses multi-threading if hash_workers > 1, otherwise computes synchronously.
+        Either way the results are stored through _store_hash_results().
 
         Uses the appropriate hash strategy based on file type:
         - Images (jpg, jpeg, gif): perceptual pHash + pixel MD5
@@ -797,24 +888,12 @@ class FileScanner:
             file_path: Path to the file
             file_type: File type (image, video, etc.)
         """
+        job = self._create_hash_job(file_id, file_path, file_type)
         if self._hash_workers > 1:
             # Multi-threaded: submit job to thread pool
-            job = self._create_hash_job(file_id, file_path, file_type)
             self._submit_hash_job(job)
         else:
-            # Single-threaded: compute and store synchronously
-            primary_hash, secondary_hash = self.classifier.get_hash_strategy(file_path)
-
-            # Compute primary hash
-            hash_value = self._compute_hash(file_path, primary_hash, file_type)
-            if hash_value:
-                self.db.add_hash(file_id, primary_hash, hash_value)
-
-            # Compute secondary hash if defined (e.g., for images)
-            if secondary_hash:
-                hash_value = self._compute_hash(file_path, secondary_hash, file_type)
-                if hash_value:
-                    self.db.add_hash(file_id, secondary_hash, hash_value)
+            self._store_hash_results([self._process_hash_job(job)])
 
     def _compute_hash(
         self,
@@ -988,12 +1067,13 @@ class FileScanner:
         """
         self._cancelled = False
 
-        # Register volume
-        volume_id = self.db.register_volume(
+        # Register volume (single UPSERT, same as scan_volume)
+        volume_id = self.db.add_volume(
             uuid=volume_info.uuid,
             name=volume_info.name,
             mount_point=str(volume_info.mount_point),
-            total_bytes=volume_info.total_bytes,
+            is_internal=volume_info.is_internal,
+            total_size_bytes=volume_info.total_bytes,
             filesystem=volume_info.filesystem,
         )
 
@@ -1052,15 +1132,16 @@ class FileScanner:
                 # This is an unknown/excluded extension - record it
                 extension_counts[ext] = extension_counts.get(ext, 0) + 1
 
-                # Record the directory path
+                # Record the directory path and the unknown_extensions count
                 try:
                     relative_path = str(file_path.relative_to(volume_mount))
-                    self.db.add_extension_sample_path(ext, volume_id, relative_path)
+                    self._record_unknown_extension(ext, volume_id, relative_path)
                 except ValueError:
-                    pass  # File not under volume mount
+                    # File not under volume mount: count it without a sample path
+                    self._unknown_extension_counts[ext] += 1
+                    self._unknown_files_pending += 1
 
-                # Also update the unknown_extensions count
-                self.db.add_unknown_extension(ext)
+        self._flush_extension_counts()
 
         if progress_callback:
             progress_callback("Complete", total_files, total_files)
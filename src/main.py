@@ -31,13 +31,15 @@ def main():
     app.setStyle("Fusion")
 
     # Initialize database
-    DatabaseManager.get_instance()
+    db = DatabaseManager.get_instance()
 
     # Create and show the unified window
     window = UnifiedWindow()
     window.show()
 
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    db.close()
+    sys.exit(exit_code)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 """Data models for the Duplicate Image Finder."""
 
-from .image_file import ImageFile
+from .image_file import ImageFile, ImageSummary
 from .duplicate_group import DuplicateGroup
 
-__all__ = ["ImageFile", "DuplicateGroup"]
+__all__ = ["ImageFile", "ImageSummary", "DuplicateGroup"]
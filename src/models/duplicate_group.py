@@ -1,6 +1,7 @@
 """Duplicate group model representing a set of similar images."""
 
 from dataclasses import dataclass, field
+from functools import cached_property
 from pathlib import Path
 from typing import List, Optional, Dict, Tuple
 from .image_file import ImageFile
@@ -12,6 +13,16 @@ class KeepStrategy:
     SHORTEST_NAME = "shortest_name"  # Keep file with shortest filename
 
 
+# Derived values cached on first access; cleared whenever the images or the
+# suggested keep change.
+_CACHED_PROPERTIES = ("suggested_delete", "total_size", "potential_savings")
+
+
+def _pair_key(path1: str, path2: str) -> Tuple[str, str]:
+    """Order-independent key for a pair of paths in similarity_scores."""
+    return (path1, path2) if path1 <= path2 else (path2, path1)
+
+
 @dataclass
 class DuplicateGroup:
     """Represents a group of duplicate/similar images."""
@@ -19,6 +30,7 @@ class DuplicateGroup:
     group_id: int
     images: List[ImageFile] = field(default_factory=list)
     similarity_scores: Dict[Tuple[str, str], float] = field(default_factory=dict)
+    uniform_score: Optional[float] = None  # Score for every pair; overrides similarity_scores
     suggested_keep: Optional[ImageFile] = None
     is_intra_directory: bool = True
     is_cross_volume: bool = False  # True if files span multiple volumes/drives
@@ -31,14 +43,26 @@ class DuplicateGroup:
             self._determine_suggested_keep()
         self._check_intra_directory()
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in ("images", "suggested_keep"):
+            self._invalidate_cached_properties()
+
+    def _invalidate_cached_properties(self):
+        """Drop cached derived values so they are recomputed on next access."""
+        for name in _CACHED_PROPERTIES:
+            self.__dict__.pop(name, None)
+
     def add_image(self, image: ImageFile, similarity_to_existing: Optional[Dict[str, float]] = None):
         """Add an image to the group with optional similarity scores."""
         if image not in self.images:
             self.images.append(image)
+            self._invalidate_cached_properties()
 
             if similarity_to_existing:
+                path = str(image.path)
                 for existing_path, score in similarity_to_existing.items():
-                    key = tuple(sorted([str(image.path), existing_path]))
+                    key = _pair_key(path, existing_path)
                     self.similarity_scores[key] = score
 
             self._determine_suggested_keep()
@@ -99,7 +123,7 @@ class DuplicateGroup:
             return self.images[0].directory
         return None
 
-    @property
+    @cached_property
     def suggested_delete(self) -> List[ImageFile]:
         """Get list of images suggested for deletion."""
         if not self.suggested_keep:
@@ -111,12 +135,12 @@ class DuplicateGroup:
         """Get the number of images in the group."""
         return len(self.images)
 
-    @property
+    @cached_property
     def total_size(self) -> int:
         """Get total size of all images in the group."""
         return sum(img.file_size for img in self.images)
 
-    @property
+    @cached_property
     def potential_savings(self) -> int:
         """Get potential space savings if duplicates are removed."""
         return sum(img.file_size for img in self.suggested_delete)
@@ -133,11 +157,15 @@ class DuplicateGroup:
 
     def get_similarity(self, img1: ImageFile, img2: ImageFile) -> Optional[float]:
         """Get similarity score between two images."""
-        key = tuple(sorted([str(img1.path), str(img2.path)]))
+        if self.uniform_score is not None:
+            return self.uniform_score
+        key = _pair_key(str(img1.path), str(img2.path))
         return self.similarity_scores.get(key)
 
     def get_average_similarity(self) -> float:
         """Get average similarity score for the group."""
+        if self.uniform_score is not None:
+            return self.uniform_score
         if not self.similarity_scores:
             return 1.0  # Assume exact match if no scores
         return sum(self.similarity_scores.values()) / len(self.similarity_scores)
@@ -1,11 +1,34 @@
 """Image file model with metadata."""
 
 from dataclasses import dataclass, field
+from functools import cached_property
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import NamedTuple, Optional, Tuple
 import os
 
 
+class ImageSummary(NamedTuple):
+    """Lightweight snapshot of an image's displayable attributes."""
+
+    path: str
+    filename: str
+    size: int
+    size_str: str
+    resolution: int
+    dimensions: str
+    path_depth: int
+
+
+# Cached derived properties, keyed by the field they are computed from.
+# Assigning the field drops the cached values so they are recomputed.
+_CACHED_PROPERTIES = {
+    "path": ("filename", "directory", "extension", "path_depth", "summary"),
+    "file_size": ("file_size_str", "summary"),
+    "width": ("resolution", "dimensions_str", "summary"),
+    "height": ("resolution", "dimensions_str", "summary"),
+}
+
+
 @dataclass
 class ImageFile:
     """Represents an image file with its metadata."""
@@ -26,22 +49,29 @@ class ImageFile:
         if self.file_size == 0 and self.path.exists():
             self.file_size = self.path.stat().st_size
 
-    @property
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        cached = _CACHED_PROPERTIES.get(name)
+        if cached:
+            for prop in cached:
+                self.__dict__.pop(prop, None)
+
+    @cached_property
     def filename(self) -> str:
         """Get the filename."""
         return self.path.name
 
-    @property
+    @cached_property
     def directory(self) -> Path:
         """Get the parent directory."""
         return self.path.parent
 
-    @property
+    @cached_property
     def extension(self) -> str:
         """Get the file extension (lowercase, without dot)."""
         return self.path.suffix.lower().lstrip(".")
 
-    @property
+    @cached_property
     def resolution(self) -> int:
         """Get total pixel count (width * height)."""
         return self.width * self.height
@@ -51,12 +81,12 @@ class ImageFile:
         """Get dimensions as (width, height) tuple."""
         return (self.width, self.height)
 
-    @property
+    @cached_property
     def path_depth(self) -> int:
         """Get the path depth (number of path components)."""
         return len(self.path.parts)
 
-    @property
+    @cached_property
     def file_size_str(self) -> str:
         """Get human-readable file size."""
         size = self.file_size
@@ -66,13 +96,26 @@ class ImageFile:
             size /= 1024
         return f"{size:.1f} TB"
 
-    @property
+    @cached_property
     def dimensions_str(self) -> str:
         """Get dimensions as string."""
         if self.width and self.height:
             return f"{self.width} x {self.height}"
         return "Unknown"
 
+    @cached_property
+    def summary(self) -> ImageSummary:
+        """Get a summary of the image's displayable attributes."""
+        return ImageSummary(
+            path=str(self.path),
+            filename=self.filename,
+            size=self.file_size,
+            size_str=self.file_size_str,
+            resolution=self.resolution,
+            dimensions=self.dimensions_str,
+            path_depth=self.path_depth,
+        )
+
     def load_metadata(self) -> bool:
         """
         Load image metadata (dimensions) from file.
@@ -18,6 +18,7 @@ from .results_view import ResultsView
 from .image_preview import ImagePreviewPanel
 
 from ..core.scanner import ImageScanner
+from ..core.database import DatabaseManager
 from ..core.deduplicator import Deduplicator
 from ..core.file_operations import FileOperations
 from ..utils.export import ResultsExporter
@@ -85,7 +86,8 @@ class ScanWorker(QThread):
             hash_method=hash_method,
             detection_mode=detection_mode,
             perceptual_threshold=perceptual_threshold,
-            hash_algorithm=hash_algorithm
+            hash_algorithm=hash_algorithm,
+            hash_cache=DatabaseManager.get_instance()
         )
         self._cancelled = False
 
@@ -193,6 +195,7 @@ class ScanWorker(QThread):
 
             processed_dirs += 1
 
+        self._deduplicator.close()
         self.progress.emit("Complete", total_dirs, total_dirs)
 
     def cancel(self):
@@ -1098,8 +1101,6 @@ class MainWindow(QMainWindow):
         This is called from the drive manager when user selects 'Find Duplicates'.
         Uses pre-computed hashes from the database for fast duplicate detection.
         """
-        from ..core.database import DatabaseManager
-
         db = DatabaseManager.get_instance()
         vol = db.get_volume_by_uuid(volume_uuid)
 
@@ -1153,8 +1154,6 @@ class MainWindow(QMainWindow):
         This is called from the drive manager for cross-drive duplicate detection.
         Finds files that exist on multiple drives (not duplicates within same drive).
         """
-        from ..core.database import DatabaseManager
-
         db = DatabaseManager.get_instance()
 
         # Get volume IDs and names for display
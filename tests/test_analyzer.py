@@ -169,6 +169,29 @@ class TestImageAnalyzer:
         assert "img2" in comparison
         assert len(comparison["differences"]) > 0
 
+        assert comparison["img1"]["filename"] == "img1.jpg"
+        assert comparison["img1"]["dimensions"] == "2000 x 1500"
+        assert comparison["img2"]["size"] == 1000000
+
+    def test_compare_images_returns_dicts(self, temp_dir):
+        """Test that each compared image is described by a plain dict."""
+        img1 = ImageFile(path=temp_dir / "img1.jpg", file_size=2048, width=10, height=10)
+        img2 = ImageFile(path=temp_dir / "img2.jpg", file_size=1024, width=10, height=10)
+
+        comparison = ImageAnalyzer().compare_images(img1, img2)
+
+        assert type(comparison["img1"]) is dict
+        assert type(comparison["img2"]) is dict
+        assert comparison["img1"] == {
+            "path": str(temp_dir / "img1.jpg"),
+            "filename": "img1.jpg",
+            "size": 2048,
+            "size_str": img1.file_size_str,
+            "resolution": 100,
+            "dimensions": "10 x 10",
+            "path_depth": img1.path_depth,
+        }
+
     def test_empty_group(self):
         """Test analyzing an empty group."""
         group = DuplicateGroup(group_id=1, images=[])
@@ -194,3 +217,271 @@ class TestImageAnalyzer:
 
         assert len(ranked) == 1
         assert ranked[0][0] == img
+        # Full resolution (40) and size (35) points, none for depth/name
+        assert ranked[0][1] == pytest.approx(75.0)
+
+    def test_large_group_ranking_matches_small_group_scoring(self, temp_dir):
+        """Test that vectorized scoring of large groups matches the per-image loop."""
+        images = [
+            ImageFile(
+                path=temp_dir / ("d/" * (i % 4)) / f"img_{'x' * i}.jpg",
+                file_size=1000000 + (i * 7919) % 500000,
+                width=1000 + (i * 37) % 400,
+                height=800
+            )
+            for i in range(12)
+        ]
+
+        analyzer = ImageAnalyzer()
+        for count in (3, 5):
+            expected = analyzer._score_images(images[:count])
+            vectorized = analyzer._score_images_vectorized(images[:count])
+
+            assert list(vectorized) == pytest.approx(expected)
+
+        ranked = analyzer.rank_images(DuplicateGroup(group_id=2, images=images))
+        assert len(ranked) == len(images)
+        assert all(a[1] >= b[1] for a, b in zip(ranked, ranked[1:]))
+
+    def test_score_group_kernel(self):
+        """Test the array scoring kernel (compiled when Numba is installed)."""
+        import numpy as np
+        from src.core.analyzer import _score_group
+
+        res = np.array([100.0, 50.0], dtype=np.float64)
+        size = np.array([10.0, 20.0], dtype=np.float64)
+        depth = np.array([2.0, 4.0], dtype=np.float64)
+        name_len = np.array([5.0, 10.0], dtype=np.float64)
+
+        scores = _score_group(res, size, depth, name_len, True, True, True)
+
+        assert scores[0] == pytest.approx(40 + 17.5 + 7.5 + 5)
+        assert scores[1] == pytest.approx(20 + 35 + 0 + 0)
+
+        scores = _score_group(res, size, depth, name_len, False, False, False)
+        assert list(scores) == pytest.approx([5.0, 0.0])
+
+    def test_rank_all_groups_matches_rank_images(self, sample_group, temp_dir):
+        """Test that batch ranking gives the same result as ranking each group."""
+        pair = DuplicateGroup(
+            group_id=2,
+            images=[
+                ImageFile(path=temp_dir / "a/small.jpg", file_size=1000, width=10, height=10),
+                ImageFile(path=temp_dir / "big.jpg", file_size=9000, width=30, height=30),
+            ]
+        )
+        groups = [sample_group, DuplicateGroup(group_id=3, images=[]), pair]
+
+        analyzer = ImageAnalyzer()
+        batch = analyzer.rank_all_groups(groups)
+
+        assert len(batch) == 3
+        assert batch[1] == []
+        for group, ranked in zip(groups, batch):
+            expected = analyzer.rank_images(group)
+            assert [img for img, _ in ranked] == [img for img, _ in expected]
+            for (_, s1), (_, s2) in zip(ranked, expected):
+                assert s1 == pytest.approx(s2)
+
+    def test_compare_images_difference_messages(self, temp_dir):
+        """Test the wording and image order of comparison differences."""
+        img1 = ImageFile(
+            path=temp_dir / "deep" / "img1.jpg",
+            file_size=1000000,
+            width=2000,
+            height=1500
+        )
+
+        img2 = ImageFile(
+            path=temp_dir / "img2.jpg",
+            file_size=2000000,
+            width=2000,
+            height=1500
+        )
+
+        analyzer = ImageAnalyzer()
+        differences = analyzer.compare_images(img1, img2)["differences"]
+
+        depth1, depth2 = img1.path_depth, img2.path_depth
+        assert differences == [
+            f"Image 2 is larger ({img2.file_size_str} vs {img1.file_size_str})",
+            f"Image 2 has shorter path (depth {depth2} vs {depth1})",
+        ]
+
+    def test_group_statistics_follow_group_changes(self, sample_group, temp_dir):
+        """Test that cached group statistics are refreshed when the group changes."""
+        assert sample_group.total_size == 7500000
+        assert sample_group.potential_savings == 2500000
+
+        sample_group.add_image(ImageFile(
+            path=temp_dir / "biggest.jpg",
+            file_size=8000000,
+            width=4000,
+            height=3000
+        ))
+
+        assert sample_group.total_size == 15500000
+        assert sample_group.suggested_keep.filename == "biggest.jpg"
+        assert sample_group.potential_savings == 7500000
+        assert len(sample_group.suggested_delete) == 3
+
+    def test_format_size(self):
+        """Test human-readable size formatting at unit boundaries."""
+        analyzer = ImageAnalyzer()
+
+        assert analyzer._format_size(0) == "0.0 B"
+        assert analyzer._format_size(1023) == "1023.0 B"
+        assert analyzer._format_size(1024) == "1.0 KB"
+        assert analyzer._format_size(1536 * 1024) == "1.5 MB"
+        assert analyzer._format_size(3 * 1024 ** 3) == "3.0 GB"
+        assert analyzer._format_size(2048 * 1024 ** 4) == "2048.0 TB"
+
+    def test_recommendation_matches_ranking(self, temp_dir):
+        """Test that the recommendation keeps the top-ranked image, ties included."""
+        images = [
+            ImageFile(path=temp_dir / "b.jpg", file_size=1000, width=10, height=10),
+            ImageFile(path=temp_dir / "a.jpg", file_size=2000, width=10, height=10),
+            ImageFile(path=temp_dir / "c.jpg", file_size=2000, width=10, height=10),
+        ]
+        group = DuplicateGroup(group_id=1, images=images)
+
+        analyzer = ImageAnalyzer()
+        ranked = analyzer.rank_images(group)
+        rec = analyzer.get_recommendation(group)
+
+        assert rec["keep"] is ranked[0][0]
+        assert rec["keep"].filename == "a.jpg"
+        assert rec["keep_score"] == pytest.approx(ranked[0][1])
+        assert [img for img, _ in rec["delete"]] == [img for img, _ in ranked[1:]]
+        assert rec["reasons"] == []
+
+    def test_image_derived_attributes_follow_field_changes(self, temp_dir):
+        """Test that cached ImageFile attributes are refreshed when fields change."""
+        img = ImageFile(path=temp_dir / "a" / "photo.jpg", file_size=2048, width=10, height=20)
+
+        assert img.resolution == 200
+        assert img.dimensions_str == "10 x 20"
+        assert img.file_size_str == "2.0 KB"
+        depth = img.path_depth
+
+        img.width, img.height = 30, 40
+        img.file_size = 1024 * 1024
+        img.path = temp_dir / "other.png"
+
+        assert img.resolution == 1200
+        assert img.dimensions_str == "30 x 40"
+        assert img.file_size_str == "1.0 MB"
+        assert img.filename == "other.png"
+        assert img.extension == "png"
+        assert img.path_depth == depth - 1
+
+    def test_compare_images_reflects_metadata_updates(self, temp_dir):
+        """Test that comparisons use current dimensions after metadata changes."""
+        img1 = ImageFile(path=temp_dir / "img1.jpg", file_size=1000, width=10, height=10)
+        img2 = ImageFile(path=temp_dir / "img2.jpg", file_size=1000, width=10, height=10)
+
+        analyzer = ImageAnalyzer()
+        assert analyzer.compare_images(img1, img2)["differences"] == []
+
+        img2.width, img2.height = 20, 20
+        comparison = analyzer.compare_images(img1, img2)
+
+        assert comparison["img2"]["dimensions"] == "20 x 20"
+        assert comparison["differences"] == [
+            "Image 2 has higher resolution (20 x 20 vs 10 x 10)"
+        ]
+
+    def test_get_recommendations(self, sample_group):
+        """Test batch recommendations match per-group recommendations."""
+        analyzer = ImageAnalyzer()
+        groups = [sample_group, DuplicateGroup(group_id=2, images=[])]
+
+        for workers in (1, 4):
+            recs = analyzer.get_recommendations(groups, num_workers=workers)
+
+            assert len(recs) == 2
+            assert recs[0]["keep"] == analyzer.get_recommendation(sample_group)["keep"]
+            assert recs[1]["keep"] is None
+
+    def test_small_groups_stay_on_calling_thread(self, temp_dir, monkeypatch):
+        """Only groups large enough for the compiled kernel go to the pool."""
+        import threading
+        from src.core import analyzer as analyzer_module
+        from src.core.analyzer import VECTORIZE_MIN_GROUP_SIZE
+
+        monkeypatch.setattr(analyzer_module, "NUMBA_AVAILABLE", True)
+        monkeypatch.setattr(analyzer_module, "CYTHON_AVAILABLE", False)
+
+        def make_group(group_id, count):
+            return DuplicateGroup(group_id=group_id, images=[
+                ImageFile(path=temp_dir / f"g{group_id}_{i}.jpg", file_size=1000 + i,
+                          width=10, height=10)
+                for i in range(count)
+            ])
+
+        groups = [make_group(0, 2), make_group(1, VECTORIZE_MIN_GROUP_SIZE),
+                  make_group(2, 3), make_group(3, VECTORIZE_MIN_GROUP_SIZE)]
+
+        analyzer = ImageAnalyzer()
+        threads = {}
+        real_get_recommendation = analyzer.get_recommendation
+
+        def recording(group, with_scores=True):
+            threads[group.group_id] = threading.current_thread()
+            return real_get_recommendation(group, with_scores)
+
+        monkeypatch.setattr(analyzer, "get_recommendation", recording)
+        recs = analyzer.get_recommendations(groups, num_workers=4)
+
+        main = threading.current_thread()
+        assert threads[0] is main and threads[2] is main
+        assert threads[1] is not main and threads[3] is not main
+        assert [rec["keep"] for rec in recs] == [group.images[-1] for group in groups]
+
+    def test_analyze_groups_with_workers_adds_recommendations(self, sample_group):
+        """Passing num_workers to analyze_groups also returns recommendations."""
+        analyzer = ImageAnalyzer()
+        assert "recommendations" not in analyzer.analyze_groups([sample_group])
+
+        result = analyzer.analyze_groups((g for g in [sample_group]), num_workers=2)
+        assert [rec["keep"] for rec in result["recommendations"]] == [
+            analyzer.get_recommendation(sample_group)["keep"]
+        ]
+
+    def test_analyze_groups_accepts_generator(self, sample_group):
+        """Test that analyze_groups consumes a generator in a single pass."""
+        analyzer = ImageAnalyzer()
+        expected = analyzer.analyze_groups([sample_group])
+
+        result = analyzer.analyze_groups(g for g in [sample_group])
+
+        assert result == expected
+        assert result["groups"] == [sample_group]
+        assert result["intra_directory_groups"] + result["cross_directory_groups"] == 1
+
+    def test_compiled_score_group_matches_kernel(self):
+        """Test the Cython scoring kernel against the reference kernel."""
+        fast = pytest.importorskip("src.core._analyzer_fast")
+        import numpy as np
+        from src.core.analyzer import _score_group
+
+        res = np.array([100.0, 50.0, 0.0], dtype=np.float64)
+        size = np.array([10.0, 20.0, 5.0], dtype=np.float64)
+        depth = np.array([2.0, 4.0, 3.0], dtype=np.float64)
+        name_len = np.array([5.0, 10.0, 7.0], dtype=np.float64)
+
+        for flags in ((True, True, True), (False, True, False)):
+            expected = _score_group(res, size, depth, name_len, *flags)
+            assert list(fast.score_group(res, size, depth, name_len, *flags)) == pytest.approx(list(expected))
+
+    def test_get_recommendation_without_scores(self, sample_group):
+        """Test the score-free recommendation variant."""
+        analyzer = ImageAnalyzer()
+        full = analyzer.get_recommendation(sample_group)
+        rec = analyzer.get_recommendation(sample_group, with_scores=False)
+
+        assert "keep_score" not in rec
+        assert rec["keep"] == full["keep"]
+        assert set(rec["delete"]) == {img for img, _ in full["delete"]}
+        assert rec["savings"] == full["savings"]
+        assert rec["reasons"] == full["reasons"]
@@ -0,0 +1,1089 @@
+"""Tests for the SQLite database manager."""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+import pytest
+
+from src.core.database import (
+    SCHEMA_VERSION,
+    DatabaseManager,
+    SQL_FIND_BY_HASH,
+    SQL_GET_DIRECTORIES_BY_EXTENSION,
+    SQL_GET_EXTENSION_SAMPLE_PATHS,
+    SQL_REBUILD_EXTENSION_COUNTS,
+)
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Create a database manager backed by a temporary file."""
+    manager = DatabaseManager(tmp_path / "test_dedupe.db")
+    yield manager
+    manager.close()
+
+
+class TestConnectionSettings:
+    """Tests for connection-level configuration."""
+
+    def test_wal_journal_mode(self, db):
+        """Database file should use write-ahead logging."""
+        assert db.journal_mode == "wal"
+        with db.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            assert cursor.fetchone()[0] == "wal"
+
+    def test_connection_pragmas(self, db):
+        """Per-connection PRAGMAs should be applied on open."""
+        with db.cursor() as cursor:
+            cursor.execute("PRAGMA foreign_keys")
+            assert cursor.fetchone()[0] == 1
+            cursor.execute("PRAGMA synchronous")
+            assert cursor.fetchone()[0] == 1  # NORMAL
+            cursor.execute("PRAGMA busy_timeout")
+            assert cursor.fetchone()[0] == 5000
+            cursor.execute("PRAGMA cache_size")
+            assert cursor.fetchone()[0] == -65536
+            cursor.execute("PRAGMA secure_delete")
+            assert cursor.fetchone()[0] == 0
+            cursor.execute("PRAGMA wal_autocheckpoint")
+            assert cursor.fetchone()[0] == 10000
+
+    @pytest.mark.parametrize("table", ["custom_extensions", "unknown_extensions"])
+    def test_unfiltered_clear_is_truncation(self, db, table):
+        """Clearing a table without triggers or FK references compiles to a Clear."""
+        with db.cursor() as cursor:
+            opcodes = [row[1] for row in cursor.execute(f"EXPLAIN DELETE FROM {table}")]
+        assert "Clear" in opcodes
+
+    def test_close_reopens_lazily(self, db):
+        """Closing drops the thread connection; the next call reconnects."""
+        db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        db.close()
+        assert db.get_volume_by_uuid("uuid-1")["name"] == "Disk"
+
+
+class TestThreadConnections:
+    """Tests for the per-thread connection cache."""
+
+    @staticmethod
+    def _touch_from_threads(db, count):
+        # Keep every thread alive until all have connected; thread idents of
+        # finished threads are reused, which would share a cache entry.
+        barrier = threading.Barrier(count)
+
+        def work():
+            db.get_volume_by_id(1)
+            barrier.wait()
+
+        threads = [threading.Thread(target=work) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_cache_is_bounded(self, db):
+        """Idle connections from other threads are evicted beyond the cap."""
+        from src.core.database import MAX_THREAD_CONNECTIONS
+
+        self._touch_from_threads(db, MAX_THREAD_CONNECTIONS + 4)
+        assert len(db._connections) == MAX_THREAD_CONNECTIONS
+
+    def test_close_idle(self, db):
+        """close_idle drops connections unused for longer than the limit."""
+        before = len(db._connections)
+        self._touch_from_threads(db, 3)
+        db.close_idle(3600)
+        assert len(db._connections) == before + 3
+        db.close_idle(0)
+        assert len(db._connections) == 0
+
+    def test_connection_in_bulk_is_not_closed(self, db):
+        """An open transaction survives close_idle and close."""
+        with db.bulk():
+            db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+            db.close_idle(0)
+            db.close()
+        assert len(db.get_all_volumes()) == 1
+
+class TestSingleton:
+    """Tests for the shared database manager instance."""
+
+    def test_get_instance_returns_same_manager(self, tmp_path):
+        """Repeated lookups share one manager for the same path."""
+        DatabaseManager.reset_instance()
+        db_path = tmp_path / "shared.db"
+        try:
+            manager = DatabaseManager.get_instance(db_path)
+            assert DatabaseManager.get_instance() is manager
+            assert DatabaseManager.get_instance(db_path) is manager
+        finally:
+            DatabaseManager.reset_instance()
+            manager.close()
+
+    def test_get_instance_rejects_other_path(self, tmp_path):
+        """A second path is reported instead of silently ignored."""
+        DatabaseManager.reset_instance()
+        try:
+            manager = DatabaseManager.get_instance(tmp_path / "first.db")
+            with pytest.raises(ValueError):
+                DatabaseManager.get_instance(tmp_path / "second.db")
+        finally:
+            DatabaseManager.reset_instance()
+            manager.close()
+
+
+class TestBulkOperations:
+    """Tests for executemany-based bulk writes."""
+
+    @staticmethod
+    def _row(path, size=100):
+        return (path, path.rsplit('/', 1)[-1], "jpg", size, "image",
+                None, None, None, None, None)
+
+    def test_add_files_bulk_returns_ids_in_order(self, db):
+        """IDs should line up with the input rows and match get_file_by_path."""
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        paths = ["b/2.jpg", "a/1.jpg", "c/3.jpg"]
+
+        file_ids = db.add_files_bulk(volume_id, [self._row(p) for p in paths])
+
+        assert len(set(file_ids)) == 3
+        for path, file_id in zip(paths, file_ids):
+            assert db.get_file_by_path(volume_id, path)["id"] == file_id
+
+    def test_add_files_bulk_updates_existing(self, db):
+        """Re-adding a path keeps its ID, updates fields and clears is_deleted."""
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        file_id = db.add_file(volume_id, "a/1.jpg", "1.jpg", "jpg", 100, "image")
+        db.mark_file_deleted(file_id)
+
+        assert db.add_files_bulk(volume_id, [self._row("a/1.jpg", 250)]) == [file_id]
+        row = db.get_file_by_id(file_id)
+        assert type(row) is dict
+        assert row == db.get_file_by_path(volume_id, "a/1.jpg")
+        assert row["file_size_bytes"] == 250
+        assert row["is_deleted"] == 0
+
+    def test_add_hashes_bulk(self, db):
+        """Bulk hashes are stored and replace earlier values."""
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        f1, f2 = db.add_files_bulk(volume_id, [self._row("1.jpg"), self._row("2.jpg")])
+        db.add_hash(f1, "exact_md5", "old")
+
+        db.add_hashes_bulk([(f1, "exact_md5", "aaa"), (f2, "exact_md5", "bbb"),
+                            (f2, "perceptual_phash", "ccc")])
+
+        assert db.get_all_hashes_for_file(f1) == {"exact_md5": "aaa"}
+        assert db.get_all_hashes_for_file(f2) == {"exact_md5": "bbb",
+                                                   "perceptual_phash": "ccc"}
+
+
+class TestUpserts:
+    """Tests for single-statement insert-or-update helpers."""
+
+    def test_add_volume_returns_same_id(self, db):
+        """Re-adding a volume updates it in place and keeps first_seen_at."""
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        first_seen = db.get_volume_by_id(volume_id)["first_seen_at"]
+
+        assert db.add_volume("uuid-1", "Renamed", "/Volumes/Renamed") == volume_id
+        volume = db.get_volume_by_id(volume_id)
+        assert volume["name"] == "Renamed"
+        assert volume["first_seen_at"] == first_seen
+
+    def test_add_file_returns_same_id(self, db):
+        """Re-adding a file path returns the existing ID with updated fields."""
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        file_id = db.add_file(volume_id, "a/1.jpg", "1.jpg", "jpg", 100, "image")
+        other_id = db.add_file(volume_id, "a/2.jpg", "2.jpg", "jpg", 100, "image")
+
+        assert db.add_file(volume_id, "a/1.jpg", "1.jpg", "jpg", 300, "image") == file_id
+        assert other_id != file_id
+        assert db.get_file_by_id(file_id)["file_size_bytes"] == 300
+
+
+class TestDuplicateQueries:
+    """Tests for duplicate hash lookups."""
+
+    def test_find_duplicate_hashes_ignores_deleted(self, db):
+        """Soft-deleted files should not count towards a duplicate."""
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        ids = [db.add_file(volume_id, f"{i}.jpg", f"{i}.jpg", "jpg", 100, "image")
+               for i in range(3)]
+        db.add_hashes_bulk([(ids[0], "exact_md5", "aaa"), (ids[1], "exact_md5", "aaa"),
+                            (ids[2], "exact_md5", "aaa")])
+        assert db.find_duplicate_hashes("exact_md5") == [("aaa", 3)]
+
+        db.mark_file_deleted(ids[0])
+        db.mark_file_deleted(ids[1])
+        assert db.find_duplicate_hashes("exact_md5") == []
+
+    def test_iter_duplicate_hashes_streams_in_chunks(self, db):
+        """Iteration yields every duplicate hash regardless of chunk size."""
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        ids = [db.add_file(volume_id, f"{i}.jpg", f"{i}.jpg", "jpg", 100, "image")
+               for i in range(6)]
+        db.add_hashes_bulk([(file_id, "exact_md5", f"h{i // 2}")
+                            for i, file_id in enumerate(ids)])
+
+        streamed = list(db.iter_duplicate_hashes("exact_md5", chunk_size=2))
+        assert sorted(streamed) == [("h0", 2), ("h1", 2), ("h2", 2)]
+        assert list(db.iter_duplicate_hashes("exact_md5", [volume_id])) == streamed
+
+    def test_hash_lookup_uses_covering_index(self, db):
+        """Grouping by hash value should be answered from the covering index."""
+        with db.cursor() as cursor:
+            cursor.execute("""
+                EXPLAIN QUERY PLAN
+                SELECT hash_value, COUNT(*) FROM hashes
+                WHERE hash_type = ? GROUP BY hash_value
+            """, ("exact_md5",))
+            plan = " ".join(row[3] for row in cursor.fetchall())
+        assert "COVERING INDEX idx_hashes_cover" in plan
+
+    def test_hashes_by_file_use_unique_index(self, db):
+        """Per-file hash lookups use the UNIQUE(file_id, hash_type) index."""
+        with db.cursor() as cursor:
+            cursor.execute("""
+                EXPLAIN QUERY PLAN
+                SELECT hash_type, hash_value FROM hashes WHERE file_id = ?
+            """, (1,))
+            assert "sqlite_autoindex_hashes_1" in cursor.fetchone()[3]
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_hashes_file'"
+            )
+            assert cursor.fetchone() is None
+
+    def test_find_files_by_hash_projection(self, db):
+        """Hash lookups return only the grouping columns, via the covering index."""
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        file_id = db.add_file(volume_id, "a/1.jpg", "1.jpg", "jpg", 100, "image",
+                              width=640, height=480)
+        db.add_hash(file_id, "exact_md5", "aaa")
+
+        assert db.find_files_by_hash("exact_md5", "aaa") == [{
+            "id": file_id, "volume_id": volume_id, "relative_path": "a/1.jpg",
+            "filename": "1.jpg", "file_size_bytes": 100, "width": 640, "height": 480,
+        }]
+
+        with db.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + SQL_FIND_BY_HASH, ("exact_md5", "aaa"))
+            plan = " ".join(row[3] for row in cursor.fetchall())
+        assert "COVERING INDEX idx_hashes_cover" in plan
+
+    def test_live_file_queries_use_indexes(self, db):
+        """Live-row filters are served by the live-file indexes."""
+        with db.cursor() as cursor:
+            cursor.execute("""
+                EXPLAIN QUERY PLAN
+                SELECT COUNT(*) FROM files WHERE volume_id = ? AND is_deleted = 0
+            """, (1,))
+            assert "COVERING INDEX idx_files_volume_deleted" in cursor.fetchone()[3]
+            cursor.execute("""
+                EXPLAIN QUERY PLAN
+                SELECT id FROM files
+                WHERE volume_id = ? AND file_type = ? AND is_deleted = 0
+            """, (1, "image"))
+            assert "idx_files_type_live" in cursor.fetchone()[3]
+            cursor.execute("""
+                SELECT name FROM sqlite_master
+                WHERE type = 'index' AND name IN ('idx_files_deleted', 'idx_files_file_type')
+            """)
+            assert cursor.fetchall() == []
+
+    def test_duplicate_hash_queries_are_index_only(self, db):
+        """Duplicate grouping reads hashes and live file IDs from indexes alone."""
+        from src.core.database import SQL_FIND_DUPLICATE_HASHES_IN_VOLUMES
+
+        with db.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + SQL_FIND_DUPLICATE_HASHES_IN_VOLUMES,
+                           ("exact_md5", "[1, 2]"))
+            plan = " ".join(row[3] for row in cursor.fetchall())
+        assert "COVERING INDEX idx_hashes_cover" in plan
+        assert "COVERING INDEX idx_files_volume_deleted" in plan
+
+    def test_scalar_queries(self, db):
+        """Count and single-hash lookups return plain values."""
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        assert db.get_file_count_by_volume(volume_id) == 0
+        file_id = db.add_file(volume_id, "1.jpg", "1.jpg", "jpg", 100, "image")
+        db.add_hash(file_id, "exact_md5", "aaa")
+
+        assert db.get_file_count_by_volume(volume_id) == 1
+        assert db.get_hash(file_id, "exact_md5") == "aaa"
+        assert db.get_hash(file_id, "perceptual_phash") is None
+        with db.bulk():
+            db.mark_file_deleted(file_id)
+            assert db.get_file_count_by_volume(volume_id) == 0
+
+
+class TestHashUpsert:
+    """Tests for add_hash conflict handling."""
+
+    def test_unchanged_hash_is_not_rewritten(self, db):
+        """Re-adding the same value leaves the row untouched."""
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        file_id = db.add_file(volume_id, "1.jpg", "1.jpg", "jpg", 100, "image")
+        db.add_hash(file_id, "exact_md5", "aaa")
+
+        with db.connection() as conn:
+            before = conn.total_changes
+        db.add_hash(file_id, "exact_md5", "aaa")
+        db.add_hashes_bulk([(file_id, "exact_md5", "aaa")])
+        with db.connection() as conn:
+            assert conn.total_changes == before
+
+    def test_changed_hash_is_updated(self, db):
+        """A different value replaces the stored hash."""
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        file_id = db.add_file(volume_id, "1.jpg", "1.jpg", "jpg", 100, "image")
+        db.add_hash(file_id, "exact_md5", "aaa")
+        db.add_hash(file_id, "exact_md5", "bbb")
+        assert db.get_hash(file_id, "exact_md5") == "bbb"
+
+
+class TestFileHashCache:
+    """Tests for the deduplicator's file hash cache."""
+
+    def test_hit_requires_matching_size_and_mtime(self, db):
+        """Only keys whose size and mtime still match are returned."""
+        db.cache_file_hashes("md5", [(1, 10, 100, 5000, "aaa"), (1, 11, 200, 6000, "bbb")])
+
+        hits = db.get_cached_file_hashes("md5", [
+            (1, 10, 100, 5000),   # Unchanged
+            (1, 11, 200, 7000),   # Modified since caching
+            (2, 10, 100, 5000),   # Other device
+        ])
+        assert hits == {(1, 10, 100, 5000): "aaa"}
+        assert db.get_cached_file_hashes("sha256", [(1, 10, 100, 5000)]) == {}
+
+    def test_recaching_replaces_entry(self, db):
+        """A new hash for the same inode replaces the old row."""
+        db.cache_file_hashes("md5", [(1, 10, 100, 5000, "aaa")])
+        db.cache_file_hashes("md5", [(1, 10, 120, 9000, "ccc")])
+
+        assert db.get_cached_file_hashes("md5", [(1, 10, 120, 9000)]) == {(1, 10, 120, 9000): "ccc"}
+        with db.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM file_hash_cache").fetchone()[0] == 1
+
+        db.clear_file_hash_cache()
+        assert db.get_cached_file_hashes("md5", [(1, 10, 120, 9000)]) == {}
+
+    def test_maintenance_prunes_unused_entries(self, db):
+        """Rows not used within FILE_HASH_CACHE_MAX_AGE_DAYS are deleted."""
+        db.cache_file_hashes("md5", [(1, 10, 100, 5000, "aaa"), (1, 11, 200, 6000, "bbb")])
+        with db.cursor() as cursor:
+            cursor.execute("UPDATE file_hash_cache SET used_on = '2000-01-01' WHERE inode = 11")
+
+        db.run_maintenance()
+
+        hits = db.get_cached_file_hashes("md5", [(1, 10, 100, 5000), (1, 11, 200, 6000)])
+        assert hits == {(1, 10, 100, 5000): "aaa"}
+
+
+class TestBulkTransaction:
+    """Tests for the bulk() group-commit context manager."""
+
+    def test_bulk_commits_once(self, db):
+        """Writes inside bulk() stay uncommitted until the block exits."""
+        with db.bulk() as conn:
+            db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+            db.add_volume("uuid-2", "Other", "/Volumes/Other")
+            assert conn.in_transaction
+        assert not conn.in_transaction
+        assert len(db.get_all_volumes()) == 2
+
+    def test_bulk_rolls_back_on_error(self, db):
+        """An exception discards every write made inside the block."""
+        with pytest.raises(RuntimeError):
+            with db.bulk():
+                db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+                raise RuntimeError("boom")
+        assert db.get_all_volumes() == []
+
+        # Normal auto-commit behaviour resumes afterwards
+        db.add_volume("uuid-2", "Other", "/Volumes/Other")
+        assert len(db.get_all_volumes()) == 1
+
+    def test_nested_bulk_joins_outer(self, db):
+        """A nested bulk() block commits with the outermost one."""
+        with db.bulk() as conn:
+            with db.bulk():
+                db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+            assert conn.in_transaction
+        assert len(db.get_all_volumes()) == 1
+
+
+class TestScanCheckpoints:
+    """Tests for scan checkpoint storage."""
+
+    def test_checkpoint_directories_accumulate(self, db):
+        """Each checkpoint appends its new directories to the stored set."""
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        session_id = db.start_scan_session(volume_id)
+
+        db.save_scan_checkpoint(session_id, "/a", 10, 100, ["/a", "/b"])
+        db.save_scan_checkpoint(session_id, "/c", 20, 100, ["/c", "/b"])
+
+        checkpoint = db.get_scan_checkpoint(session_id)
+        assert checkpoint["files_processed"] == 20
+        assert sorted(checkpoint["directories_completed"]) == ["/a", "/b", "/c"]
+
+        db.pause_scan_session(session_id)
+        paused = db.get_paused_scan_sessions(volume_id)
+        assert sorted(paused[0]["directories_completed"]) == ["/a", "/b", "/c"]
+
+        db.delete_scan_checkpoint(session_id)
+        assert db.get_scan_checkpoint(session_id) is None
+        db.save_scan_checkpoint(session_id, "/d", 0, 100, [])
+        assert db.get_scan_checkpoint(session_id)["directories_completed"] == []
+
+    def test_json_directories_migrated(self, tmp_path):
+        """A checkpoint saved with the old JSON column still resumes after upgrading."""
+        db_path = tmp_path / "old.db"
+        manager = DatabaseManager(db_path)
+        volume_id = manager.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        session_id = manager.start_scan_session(volume_id)
+        manager.save_scan_checkpoint(session_id, "/b", 10, 100, [])
+        manager.pause_scan_session(session_id)
+        manager.close()
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("DROP TABLE scan_checkpoint_dirs")
+        conn.execute("ALTER TABLE scan_checkpoints ADD COLUMN directories_completed TEXT")
+        conn.execute("UPDATE scan_checkpoints SET directories_completed = ?",
+                     (json.dumps(["/a", "/b"]),))
+        conn.execute("UPDATE schema_version SET version = 1")
+        conn.commit()
+        conn.close()
+
+        manager = DatabaseManager(db_path)
+        try:
+            checkpoint = manager.get_scan_checkpoint(session_id)
+            assert sorted(checkpoint["directories_completed"]) == ["/a", "/b"]
+            paused = manager.get_paused_scan_sessions(volume_id)
+            assert sorted(paused[0]["directories_completed"]) == ["/a", "/b"]
+        finally:
+            manager.close()
+
+
+class TestReadonlyPool:
+    """Tests for pooled read-only connections."""
+
+    def test_readonly_rejects_writes(self, db):
+        """Pooled connections cannot modify the database."""
+        with db.readonly() as conn:
+            with pytest.raises(sqlite3.OperationalError):
+                conn.execute("DELETE FROM volumes")
+
+    def test_exhausted_pool_falls_back_to_temporary_connection(self, db, monkeypatch):
+        """Open iterators holding every pooled connection do not block a read."""
+        from src.core.database import READONLY_POOL_SIZE
+
+        monkeypatch.setattr("src.core.database.READONLY_WAIT_S", 0.01)
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        db.add_file(volume_id, "1.jpg", "1.jpg", "jpg", 100, "image")
+
+        iterators = [db.iter_files_by_volume(volume_id) for _ in range(READONLY_POOL_SIZE)]
+        for iterator in iterators:
+            next(iterator)
+        assert db.get_volume_by_uuid("uuid-1")["name"] == "Disk"
+        assert len(db.get_all_volumes()) == 1
+        for iterator in iterators:
+            iterator.close()
+
+    def test_in_memory_database_reads(self):
+        """An in-memory database serves reads from its writer connection."""
+        manager = DatabaseManager(Path(":memory:"))
+        try:
+            volume_id = manager.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+            manager.add_file(volume_id, "1.jpg", "1.jpg", "jpg", 100, "image")
+            assert [v["uuid"] for v in manager.get_all_volumes()] == ["uuid-1"]
+            assert [f.filename for f in manager.iter_files_by_volume(volume_id)] == ["1.jpg"]
+        finally:
+            manager.close()
+
+    def test_readonly_sees_committed_data(self, db):
+        """Readers observe rows committed by the writer connection."""
+        with db.readonly() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM volumes").fetchone()[0] == 0
+        db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        with db.readonly() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM volumes").fetchone()[0] == 1
+
+    def test_readonly_inside_bulk_sees_pending_writes(self, db):
+        """Inside bulk() reads use the writer so uncommitted rows are visible."""
+        with db.bulk():
+            volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+            file_id = db.add_file(volume_id, "1.jpg", "1.jpg", "jpg", 100, "image")
+            db.add_hash(file_id, "exact_md5", "aaa")
+            assert [f["id"] for f in db.find_files_by_hash("exact_md5", "aaa")] == [file_id]
+
+    def test_extension_getters_read_during_writes(self, db):
+        """Settings getters see committed rows, and pending ones inside bulk()."""
+        db.set_custom_excluded_extensions(["tmp"])
+        assert db.get_custom_excluded_extensions() == ["tmp"]
+
+        with db.bulk():
+            volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+            db.add_excluded_path(volume_id, "/Library/Caches/")
+            assert db.get_excluded_paths(volume_id) == ["Library/Caches"]
+
+    def test_listing_getters_read_during_other_thread_write(self, db):
+        """Listings use a reader, so another thread's open write is not seen."""
+        db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        writing = threading.Event()
+        release = threading.Event()
+
+        def writer():
+            with db.bulk():
+                db.add_volume("uuid-2", "Backup", "/Volumes/Backup")
+                writing.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            assert writing.wait(5)
+            assert [v["uuid"] for v in db.get_all_volumes()] == ["uuid-1"]
+        finally:
+            release.set()
+            thread.join()
+        assert len(db.get_all_volumes()) == 2
+
+    def test_readonly_memory_maps_file(self, db):
+        """Readers use a larger mmap window and a smaller page cache."""
+        from src.core.database import MMAP_SUPPORTED
+
+        with db.readonly() as conn:
+            assert conn.execute("PRAGMA cache_size").fetchone()[0] == -20000
+            if MMAP_SUPPORTED:
+                assert conn.execute("PRAGMA mmap_size").fetchone()[0] == 1073741824
+
+    def test_pool_reuses_connections(self, db):
+        """Sequential readers share one pooled connection."""
+        with db.readonly() as first:
+            pass
+        with db.readonly() as second:
+            assert second is first
+
+
+class TestTimestamps:
+    """Tests for stored timestamps."""
+
+    def test_timestamps_are_iso_seconds(self, db):
+        """Write timestamps parse as ISO-8601 and carry no microseconds."""
+        from datetime import datetime
+
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        file_id = db.add_file(volume_id, "1.jpg", "1.jpg", "jpg", 100, "image")
+        indexed_at = datetime.fromisoformat(db.get_file_by_id(file_id)["indexed_at"])
+        assert indexed_at.microsecond == 0
+        assert abs((datetime.now() - indexed_at).total_seconds()) < 5
+
+    def test_bulk_insert_shares_one_timestamp(self, db, monkeypatch):
+        """A bulk insert stamps every row once, even if the clock moves on."""
+        import itertools
+
+        from src.core import database
+
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        clock = itertools.count(1_700_000_000)
+        monkeypatch.setattr(database, "_time", lambda: next(clock))
+        rows = [
+            (f"{i}.jpg", f"{i}.jpg", "jpg", 100, "image",
+             None, None, None, None, None)
+            for i in range(5)
+        ]
+        file_ids = db.add_files_bulk(volume_id, rows)
+        stamps = {db.get_file_by_id(file_id)["indexed_at"] for file_id in file_ids}
+        assert len(stamps) == 1
+
+
+class TestDuplicateGroups:
+    """Tests for persisted duplicate groups."""
+
+    def test_create_duplicate_group_members(self, db):
+        """Members are stored with their keep flag and similarity score."""
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        ids = [db.add_file(volume_id, f"{i}.jpg", f"{i}.jpg", "jpg", 100 + i, "image")
+               for i in range(3)]
+
+        group_id = db.create_duplicate_group(
+            "exact_md5", ids, suggested_keep_id=ids[1],
+            similarity_scores={ids[0]: 0.9}
+        )
+
+        members = db.get_duplicate_group_files(group_id)
+        assert [m["id"] for m in members] == [ids[1], ids[2], ids[0]]
+        assert [m["is_suggested_keep"] for m in members] == [1, 0, 0]
+        assert {m["id"]: m["similarity_score"] for m in members} == {
+            ids[0]: 0.9, ids[1]: None, ids[2]: None
+        }
+
+
+class TestFileQueries:
+    """Tests for per-volume file listings."""
+
+    def test_path_lookups_skip_deleted_files(self, db):
+        """ID and existence lookups only see live files."""
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        file_id = db.add_file(volume_id, "a/1.jpg", "1.jpg", "jpg", 100, "image",
+                              file_modified_at="2020-01-01T00:00:00")
+
+        assert db.get_file_id_by_path(volume_id, "a/1.jpg") == file_id
+        assert db.get_file_modified_by_path(volume_id, "a/1.jpg") == (
+            file_id, "2020-01-01T00:00:00", 0
+        )
+        db.add_hash(file_id, "exact_md5", "aaa")
+        assert db.get_file_modified_by_path(volume_id, "a/1.jpg")[2] == 1
+        assert db.file_exists(volume_id, "a/1.jpg")
+        assert db.get_file_id_by_path(volume_id, "a/2.jpg") is None
+        assert not db.file_exists(volume_id, "a/2.jpg")
+
+        db.mark_file_deleted(file_id)
+        assert db.get_file_id_by_path(volume_id, "a/1.jpg") is None
+        assert db.get_file_modified_by_path(volume_id, "a/1.jpg") is None
+        assert not db.file_exists(volume_id, "a/1.jpg")
+
+    def test_list_getters_return_plain_dicts(self, db):
+        """Multi-row getters hand back dicts keyed by column name."""
+        db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        db.add_volume("uuid-2", "Backup", "/Volumes/Backup")
+
+        volumes = db.get_all_volumes()
+        assert all(type(volume) is dict for volume in volumes)
+        assert {volume["uuid"] for volume in volumes} == {"uuid-1", "uuid-2"}
+        assert volumes[0].get("mount_point").startswith("/Volumes/")
+
+    def test_iter_files_by_volume_streams_in_chunks(self, db):
+        """Iteration yields every live file regardless of chunk size."""
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        ids = [db.add_file(volume_id, f"{i}.jpg", f"{i}.jpg", "jpg", 100, "image")
+               for i in range(5)]
+        db.add_file(volume_id, "clip.mov", "clip.mov", "mov", 100, "video")
+        db.mark_file_deleted(ids[0])
+
+        rows = list(db.iter_files_by_volume(volume_id, file_type="image", chunk_size=2))
+
+        assert sorted(row.id for row in rows) == ids[1:]
+        assert db.get_files_by_volume(volume_id, file_type="image") == [
+            row._asdict() for row in rows
+        ]
+        assert len(db.get_files_by_volume(volume_id, include_deleted=True)) == 6
+
+    def test_directories_by_extension(self, db):
+        """Directories are grouped from the stored column via a covering index."""
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        db.add_file(volume_id, "a/b/1.jpg", "1.jpg", "jpg", 100, "image")
+        db.add_files_bulk(volume_id, [
+            ("a/b/2.jpg", "2.jpg", "jpg", 100, "image", None, None, None, None, None),
+            ("top.jpg", "top.jpg", "jpg", 100, "image", None, None, None, None, None),
+        ])
+
+        assert [(row['directory'], row['file_count'])
+                for row in db.get_directories_by_extension(".JPG")] == [("a/b", 2), ("/", 1)]
+
+        assert list(db.iter_directories_by_extension("jpg", chunk_size=1)) == \
+            db.get_directories_by_extension("jpg")
+
+        with db.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + SQL_GET_DIRECTORIES_BY_EXTENSION, ("jpg",))
+            plan = " ".join(row[3] for row in cursor.fetchall())
+        assert "COVERING INDEX idx_files_ext_dir" in plan
+
+    def test_directory_column_migrated(self, tmp_path):
+        """Databases created before the directory column get it backfilled."""
+        db_path = tmp_path / "old.db"
+        manager = DatabaseManager(db_path)
+        volume_id = manager.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        manager.add_file(volume_id, "a/b/1.jpg", "1.jpg", "jpg", 100, "image")
+        manager.close()
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("DROP INDEX idx_files_ext_dir")
+        conn.execute("ALTER TABLE files DROP COLUMN directory")
+        conn.execute("UPDATE schema_version SET version = 1")
+        conn.commit()
+        conn.close()
+
+        manager = DatabaseManager(db_path)
+        try:
+            assert manager.get_directories_by_extension("jpg")[0]['directory'] == "a/b"
+            with manager.cursor() as cursor:
+                cursor.execute("SELECT version FROM schema_version")
+                assert cursor.fetchone()[0] == SCHEMA_VERSION
+        finally:
+            manager.close()
+
+    def test_duplicate_group_files_rebuilt_without_rowid(self, tmp_path):
+        """Group memberships survive the move to a WITHOUT ROWID table."""
+        db_path = tmp_path / "old.db"
+        manager = DatabaseManager(db_path)
+        volume_id = manager.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        ids = [manager.add_file(volume_id, f"{i}.jpg", f"{i}.jpg", "jpg", 100, "image")
+               for i in range(2)]
+        group_id = manager.create_duplicate_group("exact_md5", ids, suggested_keep_id=ids[0])
+        manager.close()
+
+        conn = sqlite3.connect(db_path)
+        conn.executescript("""
+            DROP INDEX idx_duplicate_group_files_file;
+            ALTER TABLE duplicate_group_files RENAME TO members;
+            CREATE TABLE duplicate_group_files (
+                group_id INTEGER NOT NULL,
+                file_id INTEGER NOT NULL,
+                is_suggested_keep INTEGER DEFAULT 0,
+                similarity_score REAL,
+                PRIMARY KEY (group_id, file_id)
+            );
+            INSERT INTO duplicate_group_files SELECT * FROM members;
+            DROP TABLE members;
+            UPDATE schema_version SET version = 4;
+        """)
+        conn.close()
+
+        manager = DatabaseManager(db_path)
+        try:
+            members = manager.get_duplicate_group_files(group_id)
+            assert [m["id"] for m in members] == ids
+            with manager.cursor() as cursor:
+                cursor.execute(
+                    "SELECT sql FROM sqlite_master WHERE name = 'duplicate_group_files'"
+                )
+                assert "WITHOUT ROWID" in cursor.fetchone()[0]
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'duplicate_group_files_old'"
+                )
+                assert cursor.fetchone() is None
+        finally:
+            manager.close()
+
+    def test_current_schema_skips_ddl(self, tmp_path):
+        """Reopening a current database skips SCHEMA_SQL; an older one reruns it."""
+        db_path = tmp_path / "schema.db"
+        DatabaseManager(db_path).close()
+
+        def has_size_index():
+            conn = sqlite3.connect(db_path)
+            try:
+                return conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'idx_files_size'"
+                ).fetchone() is not None
+            finally:
+                conn.close()
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("DROP INDEX idx_files_size")
+        conn.commit()
+        conn.close()
+        DatabaseManager(db_path).close()
+        assert not has_size_index()
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE schema_version SET version = ?", (SCHEMA_VERSION - 1,))
+        conn.commit()
+        conn.close()
+        DatabaseManager(db_path).close()
+        assert has_size_index()
+
+
+class TestExtensionCounts:
+    """Tests for the trigger-maintained extension_counts table."""
+
+    def _recount(self, db):
+        with db.cursor() as cursor:
+            cursor.execute("""
+                SELECT extension, COUNT(*) FROM files
+                WHERE is_deleted = 0 AND extension != '' GROUP BY extension
+            """)
+            return dict(cursor.fetchall())
+
+    def test_counts_follow_file_changes(self, db):
+        """Inserts, upserts, soft deletes and cascades all keep counts exact."""
+        vol_a = db.add_volume("uuid-a", "A", "/Volumes/A")
+        vol_b = db.add_volume("uuid-b", "B", "/Volumes/B")
+        jpg = db.add_file(vol_a, "1.jpg", "1.jpg", "jpg", 100, "image")
+        db.add_files_bulk(vol_a, [
+            ("2.jpg", "2.jpg", "jpg", 100, "image", None, None, None, None, None),
+            ("3.png", "3.png", "png", 100, "image", None, None, None, None, None),
+            ("noext", "noext", "", 100, "image", None, None, None, None, None),
+        ])
+        db.add_file(vol_b, "4.mov", "4.mov", "mov", 100, "video")
+        assert db.get_extension_counts() == {"jpg": 2, "png": 1, "mov": 1}
+
+        db.add_file(vol_a, "3.png", "3.png", "jpeg", 100, "image")  # Extension changed
+        db.mark_file_deleted(jpg)
+        assert db.get_extension_counts() == {"jpg": 1, "jpeg": 1, "mov": 1}
+
+        db.add_file(vol_a, "1.jpg", "1.jpg", "jpg", 100, "image")  # Revived by upsert
+        db.delete_volume(vol_b)
+        assert db.get_extension_counts() == {"jpg": 2, "jpeg": 1} == self._recount(db)
+
+    def test_rebuild_reads_covering_index(self, db):
+        """The rebuild aggregates live rows from idx_files_ext_dir alone."""
+        with db.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + SQL_REBUILD_EXTENSION_COUNTS)
+            plan = " ".join(row[3] for row in cursor.fetchall())
+        assert "COVERING INDEX idx_files_ext_dir" in plan
+
+    def test_rebuild_matches_triggers(self, db):
+        """rebuild_extension_counts() recomputes the same counts from files."""
+        volume_id = db.add_volume("uuid-a", "A", "/Volumes/A")
+        db.add_file(volume_id, "1.jpg", "1.jpg", "jpg", 100, "image")
+        db.add_file(volume_id, "2.jpg", "2.jpg", "jpg", 100, "image")
+        with db.cursor() as cursor:
+            cursor.execute("UPDATE extension_counts SET cnt = 99")
+
+        db.rebuild_extension_counts()
+        assert db.get_extension_counts() == {"jpg": 2}
+
+
+class TestMaintenance:
+    """Tests for background database maintenance."""
+
+    def test_maintenance_thread_running(self, db):
+        """Each manager starts a daemon maintenance thread."""
+        assert db._maintenance_thread.daemon
+        assert db._maintenance_thread.is_alive()
+
+    def test_run_maintenance_truncates_wal(self, db):
+        """Maintenance checkpoints the WAL and gathers planner statistics."""
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        db.add_file(volume_id, "1.jpg", "1.jpg", "jpg", 100, "image")
+        db.close()
+
+        db.run_maintenance()
+
+        wal_path = db.db_path.with_name(db.db_path.name + "-wal")
+        assert not wal_path.exists() or wal_path.stat().st_size == 0
+        with db.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM sqlite_stat1")
+            assert cursor.fetchone()[0] > 0
+
+    def test_statistics_gathered_on_first_open(self, tmp_path):
+        """Schema init runs ANALYZE when the file has no statistics yet."""
+        db_path = tmp_path / "stats.db"
+        manager = DatabaseManager(db_path)
+        volume_id = manager.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        manager.add_file(volume_id, "1.jpg", "1.jpg", "jpg", 100, "image")
+        with manager.cursor() as cursor:
+            cursor.execute("DROP TABLE sqlite_stat1")
+        manager.close()
+
+        manager = DatabaseManager(db_path)
+        try:
+            with manager.cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) FROM sqlite_stat1 WHERE tbl = 'files'")
+                assert cursor.fetchone()[0] > 0
+        finally:
+            manager.close()
+
+
+class TestWriteBehindQueue:
+    """Tests for the background hash writer."""
+
+    def test_queued_hashes_visible_after_flush(self, db):
+        """Queued rows are all stored once flush_writes() returns."""
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        ids = db.add_files_bulk(volume_id, [
+            (f"{i}.jpg", f"{i}.jpg", "jpg", 100, "image", None, None, None, None, None)
+            for i in range(50)
+        ])
+
+        db.queue_hashes([(file_id, "exact_md5", f"h{file_id % 5}") for file_id in ids])
+        db.flush_writes()
+
+        assert sorted(count for _, count in db.find_duplicate_hashes("exact_md5")) == [10] * 5
+
+    def test_writer_error_raised_on_flush(self, db):
+        """A failed batch surfaces from the next flush_writes() call."""
+        db.queue_hashes([(999, "exact_md5", "aaa")])  # No such file: FK violation
+        with pytest.raises(sqlite3.IntegrityError):
+            db.flush_writes()
+        db.flush_writes()  # Error is reported once
+
+    def test_busy_batch_is_retried(self, db, monkeypatch):
+        """A batch that finds the database locked is retried, not dropped."""
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        file_id = db.add_file(volume_id, "1.jpg", "1.jpg", "jpg", 100, "image")
+
+        real_add = db.add_hashes_bulk
+        attempts = []
+
+        def add_hashes_bulk(rows):
+            attempts.append(rows)
+            if len(attempts) == 1:
+                raise sqlite3.OperationalError("database is locked")
+            real_add(rows)
+
+        monkeypatch.setattr("src.core.database.WRITE_RETRY_DELAY_S", 0)
+        monkeypatch.setattr(db, "add_hashes_bulk", add_hashes_bulk)
+        db.queue_hashes([(file_id, "exact_md5", "aaa")])
+        db.flush_writes()
+
+        assert len(attempts) == 2
+        assert db.get_hash(file_id, "exact_md5") == "aaa"
+
+    def test_busy_batch_gives_up_after_timeout(self, db, monkeypatch):
+        """A lock that outlasts WRITE_RETRY_TIMEOUT_S is raised by flush_writes()."""
+        def add_hashes_bulk(rows):
+            raise sqlite3.OperationalError("database is locked")
+
+        monkeypatch.setattr("src.core.database.WRITE_RETRY_DELAY_S", 0)
+        monkeypatch.setattr("src.core.database.WRITE_RETRY_TIMEOUT_S", 0.05)
+        monkeypatch.setattr(db, "add_hashes_bulk", add_hashes_bulk)
+        db.queue_hashes([(1, "exact_md5", "aaa")])
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            db.flush_writes()
+
+    def test_rows_join_callers_transaction(self, db):
+        """Inside bulk() rows are written by the caller, not the writer thread."""
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        file_id = db.add_file(volume_id, "1.jpg", "1.jpg", "jpg", 100, "image")
+
+        with db.bulk():
+            db.queue_hashes([(file_id, "exact_md5", "aaa")])
+            assert db._write_queue.unfinished_tasks == 0
+            assert db.get_hash(file_id, "exact_md5") == "aaa"
+
+
+class TestJsonArray:
+    """Tests for JSON parameter encoding."""
+
+    def test_json_array_roundtrip_through_json_each(self, db):
+        """Encoded arrays are text that json_each expands back to the values."""
+        from src.core.database import _json_array
+
+        values = ["a/b.jpg", "café/\"q\".png", 'x\\y']
+        encoded = _json_array(values)
+        assert isinstance(encoded, str)
+        with db.cursor() as cursor:
+            cursor.execute("SELECT value FROM json_each(?)", (encoded,))
+            assert [row[0] for row in cursor.fetchall()] == values
+
+
+class TestCustomExtensions:
+    """Tests for custom include/exclude extension settings."""
+
+    def test_set_replaces_only_same_action(self, db):
+        """Setting includes replaces prior includes but keeps excludes."""
+        db.set_custom_included_extensions(["RAW", "heic"])
+        db.set_custom_excluded_extensions(["tmp"])
+        db.set_custom_included_extensions(["dng"])
+
+        assert db.get_custom_included_extensions() == ["dng"]
+        assert db.get_custom_excluded_extensions() == ["tmp"]
+
+    def test_set_writes_only_changes(self, db):
+        """Re-saving a list keeps unchanged rows; moving an extension switches action."""
+        db.set_custom_included_extensions(["raw", "heic"])
+        with db.cursor() as cursor:
+            cursor.execute("SELECT extension, id FROM custom_extensions")
+            before = dict(cursor.fetchall())
+
+        db.set_custom_included_extensions(["RAW", "heic", "dng"])
+        db.set_custom_excluded_extensions(["heic"])
+
+        with db.cursor() as cursor:
+            cursor.execute("SELECT id FROM custom_extensions WHERE extension = 'raw'")
+            assert cursor.fetchone()[0] == before["raw"]
+        assert sorted(db.get_custom_included_extensions()) == ["dng", "raw"]
+        assert db.get_custom_excluded_extensions() == ["heic"]
+
+    def test_cached_sets_invalidated_by_writes(self, db):
+        """Cached frozensets are reused until a setter or clear changes them."""
+        db.set_custom_included_extensions(["raw"])
+        first = db.get_custom_included_extensions_set()
+        assert first == frozenset({"raw"})
+        assert db.get_custom_included_extensions_set() is first
+
+        db.set_custom_excluded_extensions(["raw"])  # Moves raw to exclude
+        assert db.get_custom_included_extensions_set() == frozenset()
+        assert db.get_custom_excluded_extensions_set() == frozenset({"raw"})
+
+        db.clear_custom_extensions()
+        assert db.get_custom_excluded_extensions() == []
+
+    def test_set_empty_clears(self, db):
+        """An empty list removes all extensions for that action."""
+        db.set_custom_included_extensions(["raw"])
+        db.set_custom_included_extensions([])
+        assert db.get_custom_included_extensions() == []
+
+
+class TestUnknownExtensions:
+    """Tests for unknown extension tracking."""
+
+    def test_add_unknown_extension_counts(self, db):
+        """Repeated adds increment one row, case-insensitively."""
+        db.add_unknown_extension("XYZ")
+        db.add_unknown_extension("xyz")
+        db.add_unknown_extension("abc")
+
+        assert db.get_unknown_extensions() == {"xyz": 2, "abc": 1}
+        with db.cursor() as cursor:
+            cursor.execute("SELECT first_seen_at <= last_seen_at FROM unknown_extensions")
+            assert all(row[0] for row in cursor.fetchall())
+
+    def test_update_keeps_only_remaining(self, db):
+        """Extensions outside the remaining set are deleted, however large it is."""
+        for ext in ("abc", "def", "ghi"):
+            db.add_unknown_extension(ext)
+
+        db.update_unknown_extensions({"abc", "ghi"} | {f"x{i}" for i in range(40000)})
+        assert set(db.get_unknown_extensions()) == {"abc", "ghi"}
+
+        db.update_unknown_extensions(set())
+        assert db.get_unknown_extensions() == {}
+
+    def test_sample_paths_read_in_index_order(self, db):
+        """Sample paths come back ordered straight from the covering index."""
+        with db.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + SQL_GET_EXTENSION_SAMPLE_PATHS, ("xyz",))
+            plan = " ".join(row[3] for row in cursor.fetchall())
+        assert "COVERING INDEX idx_extension_sample_paths_order" in plan
+        assert "TEMP B-TREE" not in plan
+
+    def test_bulk_counts_accumulate(self, db):
+        """Bulk adds add their counts onto existing rows."""
+        from collections import Counter
+
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        db.add_unknown_extension("xyz")
+        db.add_extension_sample_path("xyz", volume_id, "a/b/one.xyz")
+
+        db.add_unknown_extensions_bulk(Counter({"xyz": 3, "abc": 2}))
+        db.add_extension_sample_paths_bulk(Counter({
+            ("xyz", volume_id, db.sample_directory("a/b/two.xyz")): 3,
+            ("abc", volume_id, db.sample_directory("top.abc")): 2,
+        }))
+
+        assert db.get_unknown_extensions() == {"xyz": 4, "abc": 2}
+        samples = {
+            (row["directory"], row["file_count"])
+            for row in db.get_extension_sample_paths("xyz") + db.get_extension_sample_paths("abc")
+        }
+        assert samples == {("a/b", 4), ("/", 2)}
+
+
+class TestExcludedPaths:
+    """Tests for per-volume excluded paths."""
+
+    def test_add_excluded_paths_reports_new_paths(self, db):
+        """Bulk adds normalize, skip existing paths and keep input order."""
+        volume_id = db.add_volume("uuid-1", "Disk", "/Volumes/Disk")
+        assert db.add_excluded_path(volume_id, "/Library/Caches/")
+        assert not db.add_excluded_path(volume_id, "Library/Caches")
+
+        added = db.add_excluded_paths(volume_id, ["tmp/", "Library/Caches", "/a/b", "tmp"])
+
+        assert added == ["tmp", "a/b"]
+        assert db.get_excluded_paths(volume_id) == ["Library/Caches", "a/b", "tmp"]
+
+    def test_add_excluded_path_unknown_volume(self, db):
+        """A path for a missing volume is rejected rather than raising."""
+        assert not db.add_excluded_path(999, "tmp")
@@ -4,7 +4,12 @@ import pytest
 from pathlib import Path
 
 from src.core.scanner import ImageScanner
-from src.core.deduplicator import Deduplicator, compute_perceptual_hash
+from src.core.deduplicator import (
+    DEFAULT_HASH_METHOD,
+    Deduplicator,
+    compute_file_hash,
+    compute_perceptual_hash,
+)
 from src.models.duplicate_group import DuplicateGroup
 
 
@@ -145,6 +150,243 @@ class TestDeduplicator:
         assert isinstance(groups, list)
 
 
+class TestFileHash:
+    """Test cases for whole-file hashing."""
+
+    def test_hash_methods_match_hashlib(self, temp_dir):
+        """MD5 and SHA-256 digests match hashlib over the whole file."""
+        import hashlib
+
+        path = temp_dir / "data.bin"
+        data = bytes(range(256)) * 1000
+        path.write_bytes(data)
+
+        assert compute_file_hash(str(path), hash_method="md5") == hashlib.md5(data).hexdigest()
+        assert compute_file_hash(str(path), hash_method="sha256") == hashlib.sha256(data).hexdigest()
+
+    def test_large_files_hash_through_mmap(self, temp_dir):
+        """Files above the mmap threshold hash to the same digest as hashlib."""
+        import hashlib
+        from src.core.deduplicator import MMAP_HASH_THRESHOLD
+
+        path = temp_dir / "large.bin"
+        data = bytes(range(256)) * (MMAP_HASH_THRESHOLD // 256 + 1)
+        path.write_bytes(data)
+
+        assert compute_file_hash(str(path), hash_method="md5") == hashlib.md5(data).hexdigest()
+
+    def test_missing_file_returns_none(self, temp_dir):
+        """Unreadable files yield no hash."""
+        assert compute_file_hash(str(temp_dir / "missing.jpg")) is None
+
+    @staticmethod
+    def _record_hashing(monkeypatch):
+        """Record the file names passed to each hashing stage."""
+        from src.core import deduplicator
+
+        calls = {"quick": [], "full": []}
+        for stage, name in (("quick", "compute_quick_fingerprint"), ("full", "compute_file_hash")):
+            def recording(file_path, *args, _real=getattr(deduplicator, name), _stage=stage, **kwargs):
+                calls[_stage].append(Path(file_path).name)
+                return _real(file_path, *args, **kwargs)
+
+            monkeypatch.setattr(deduplicator, name, recording)
+        return calls
+
+    def test_unique_sizes_are_not_hashed(self, temp_dir, monkeypatch):
+        """Only files sharing a size with another file are fingerprinted."""
+        from src.models.image_file import ImageFile
+
+        for name, data in [("a.jpg", b"x" * 10), ("b.jpg", b"x" * 10), ("c.jpg", b"y" * 11)]:
+            (temp_dir / name).write_bytes(data)
+        images = [ImageFile(path=temp_dir / name) for name in ("a.jpg", "b.jpg", "c.jpg")]
+
+        calls = self._record_hashing(monkeypatch)
+        groups = Deduplicator()._find_duplicates_in_set(images, 0)
+
+        assert sorted(calls["quick"]) == ["a.jpg", "b.jpg"]
+        assert calls["full"] == []  # Small files are covered by the fingerprint
+        assert len(groups) == 1
+        assert sorted(img.filename for img in groups[0].images) == ["a.jpg", "b.jpg"]
+
+    def test_full_hash_only_for_matching_fingerprints(self, temp_dir, monkeypatch):
+        """Large files are hashed in full only when head and tail both match."""
+        from src.core.deduplicator import QUICK_FINGERPRINT_BYTES
+        from src.models.image_file import ImageFile
+
+        size = 3 * QUICK_FINGERPRINT_BYTES
+        base = bytes(range(256)) * (size // 256)
+        middle = size // 2
+        contents = {
+            "a.jpg": base,
+            "b.jpg": base[:middle] + b"!" + base[middle + 1:],  # Differs only in the middle
+            "c.jpg": b"!" + base[1:],                           # Differs in the head
+            "d.jpg": base,
+        }
+        for name, data in contents.items():
+            (temp_dir / name).write_bytes(data)
+        images = [ImageFile(path=temp_dir / name) for name in contents]
+
+        calls = self._record_hashing(monkeypatch)
+        groups = Deduplicator()._find_duplicates_in_set(images, 0)
+
+        assert sorted(calls["quick"]) == ["a.jpg", "b.jpg", "c.jpg", "d.jpg"]
+        assert sorted(calls["full"]) == ["a.jpg", "b.jpg", "d.jpg"]
+        assert len(groups) == 1
+        assert sorted(img.filename for img in groups[0].images) == ["a.jpg", "d.jpg"]
+
+    def test_matching_pairs_are_compared_without_hashing(self, temp_dir, monkeypatch):
+        """Two large files with the same fingerprint are compared byte by byte."""
+        from src.core.deduplicator import QUICK_FINGERPRINT_BYTES
+        from src.models.image_file import ImageFile
+
+        size = 3 * QUICK_FINGERPRINT_BYTES
+        base = bytes(range(256)) * (size // 256)
+        middle = size // 2
+        contents = {
+            "a.jpg": base,
+            "b.jpg": base,
+            "c.jpg": base[:middle] + b"!" + base[middle + 1:],
+            "d.jpg": base[:middle] + b"?" + base[middle + 1:],
+        }
+        for name, data in contents.items():
+            (temp_dir / name).write_bytes(data)
+
+        calls = self._record_hashing(monkeypatch)
+        dedup = Deduplicator()
+        same = dedup._find_duplicates_in_set(
+            [ImageFile(path=temp_dir / name) for name in ("a.jpg", "b.jpg")], 0
+        )
+        different = dedup._find_duplicates_in_set(
+            [ImageFile(path=temp_dir / name) for name in ("c.jpg", "d.jpg")], 0
+        )
+
+        assert calls["full"] == []
+        assert len(same) == 1
+        assert sorted(img.filename for img in same[0].images) == ["a.jpg", "b.jpg"]
+        assert different == []
+
+    def test_hashing_pool_is_shared_and_skipped_for_small_sets(self, temp_dir):
+        """Small sets hash inline; larger ones reuse one pool until close()."""
+        from src.models.image_file import ImageFile
+
+        def make_images(prefix, count):
+            images = []
+            for i in range(count):
+                path = temp_dir / f"{prefix}{i}.jpg"
+                path.write_bytes(b"same bytes")
+                images.append(ImageFile(path=path))
+            return images
+
+        dedup = Deduplicator(num_workers=2)
+        assert len(dedup._find_duplicates_in_set(make_images("pair", 2), 0)) == 1
+        assert dedup._executor is None
+
+        dedup._find_duplicates_in_set(make_images("a", 4), 0)
+        executor = dedup._executor
+        assert executor is not None
+        dedup._find_duplicates_in_set(make_images("b", 4), 0)
+        assert dedup._executor is executor
+
+        dedup.close()
+        assert dedup._executor is None
+
+    def test_hash_cache_skips_unchanged_files(self, temp_dir, tmp_path, monkeypatch):
+        """A second run reuses cached hashes; a rewritten file is hashed again."""
+        import os
+        from src.core.database import DatabaseManager
+        from src.core.deduplicator import QUICK_FINGERPRINT_BYTES
+        from src.models.image_file import ImageFile
+
+        data = b"z" * (3 * QUICK_FINGERPRINT_BYTES)
+        for name in ("a.jpg", "b.jpg"):
+            (temp_dir / name).write_bytes(data)
+
+        db = DatabaseManager(tmp_path / "cache.db")
+        try:
+            dedup = Deduplicator(hash_cache=db)
+            calls = self._record_hashing(monkeypatch)
+
+            images = [ImageFile(path=temp_dir / name) for name in ("a.jpg", "b.jpg")]
+            assert len(dedup._find_duplicates_in_set(images, 0)) == 1
+            assert sorted(calls["full"]) == ["a.jpg", "b.jpg"]
+
+            calls["full"].clear()
+            assert len(dedup._find_duplicates_in_set(images, 0)) == 1
+            assert calls["full"] == []
+
+            stat = (temp_dir / "b.jpg").stat()
+            os.utime(temp_dir / "b.jpg", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            assert len(dedup._find_duplicates_in_set(images, 0)) == 1
+            assert calls["full"] == ["b.jpg"]
+        finally:
+            db.close()
+
+    def test_hash_cache_errors_fall_back_to_hashing(self, temp_dir):
+        """A locked cache database is skipped rather than aborting detection."""
+        import sqlite3
+        from src.core.deduplicator import QUICK_FINGERPRINT_BYTES
+        from src.models.image_file import ImageFile
+
+        class LockedCache:
+            def get_cached_file_hashes(self, hash_type, keys):
+                raise sqlite3.OperationalError("database is locked")
+
+            def cache_file_hashes(self, hash_type, rows):
+                raise sqlite3.OperationalError("database is locked")
+
+        data = b"z" * (3 * QUICK_FINGERPRINT_BYTES)
+        for name in ("a.jpg", "b.jpg"):
+            (temp_dir / name).write_bytes(data)
+        images = [ImageFile(path=temp_dir / name) for name in ("a.jpg", "b.jpg")]
+
+        groups = Deduplicator(hash_cache=LockedCache())._find_duplicates_in_set(images, 0)
+        assert len(groups) == 1
+
+    def test_small_file_fingerprint_uses_hash_method(self, temp_dir):
+        """Small files are confirmed with the selected hash over their full content."""
+        import hashlib
+        from src.core.deduplicator import compute_quick_fingerprint
+
+        path = temp_dir / "small.jpg"
+        data = bytes(range(256)) * 100
+        path.write_bytes(data)
+
+        size, fingerprint = compute_quick_fingerprint(str(path), hash_method="sha256")
+        assert size == len(data)
+        assert fingerprint == hashlib.sha256(data).hexdigest()
+        assert fingerprint == compute_file_hash(str(path), hash_method="sha256")
+
+    def test_exact_groups_use_uniform_score(self, temp_dir):
+        """Exact groups score every pair 1.0 without storing per-pair scores."""
+        from src.models.image_file import ImageFile
+
+        images = []
+        for name in ("a.jpg", "b.jpg", "c.jpg"):
+            (temp_dir / name).write_bytes(b"same bytes")
+            images.append(ImageFile(path=temp_dir / name))
+
+        [group] = Deduplicator()._find_duplicates_in_set(images, 0)
+        assert group.similarity_scores == {}
+        assert group.get_similarity(images[0], images[2]) == 1.0
+        assert group.get_average_similarity() == 1.0
+
+    def test_unknown_hash_method_uses_default(self):
+        """Legacy values such as 'dhash' fall back to the default file hash."""
+        assert Deduplicator(hash_method="dhash").hash_method == DEFAULT_HASH_METHOD
+        assert Deduplicator(hash_method="SHA256").hash_method == "sha256"
+
+    def test_blake3_without_package_is_named_md5(self, monkeypatch):
+        """Without the blake3 package the method is recorded as the MD5 it runs."""
+        from src.core import deduplicator
+
+        monkeypatch.setattr(deduplicator, "BLAKE3_AVAILABLE", False)
+        assert Deduplicator(hash_method="blake3").hash_method == "md5"
+
+        monkeypatch.setattr(deduplicator, "BLAKE3_AVAILABLE", True)
+        assert Deduplicator(hash_method="blake3").hash_method == "blake3"
+
+
 class TestPerceptualHash:
     """Test cases for perceptual hashing functionality."""
 